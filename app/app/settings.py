@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
 import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -52,6 +53,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -85,13 +88,33 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# Connections are kept open for DB_CONN_MAX_AGE seconds (0 closes them after
+# every request) and, with DB_CONN_HEALTH_CHECKS, checked before reuse.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.backends.postgresql',
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': bool(
+            int(os.environ.get('DB_CONN_HEALTH_CHECKS', 1))
+        ),
+    }
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
     }
 }
 
@@ -99,6 +122,48 @@ DATABASES = {
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
+# Password hashing: the preferred hasher ('argon2' or 'pbkdf2') and the cost
+# of each. Hashes made with another hasher or cost still verify and are
+# rehashed with the preferred one when the user next logs in.
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'argon2')
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get('PASSWORD_ARGON2_TIME_COST', 2))
+PASSWORD_ARGON2_MEMORY_COST = int(
+    os.environ.get('PASSWORD_ARGON2_MEMORY_COST', 19456)
+)
+PASSWORD_ARGON2_PARALLELISM = int(
+    os.environ.get('PASSWORD_ARGON2_PARALLELISM', 1)
+)
+PASSWORD_PBKDF2_ITERATIONS = int(
+    os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 320000)
+)
+
+_PASSWORD_HASHERS = {
+    'argon2': 'user.hashers.Argon2PasswordHasher',
+    'pbkdf2': 'user.hashers.PBKDF2PasswordHasher',
+}
+PASSWORD_HASHERS = [
+    _PASSWORD_HASHERS[PASSWORD_HASHER],
+    *(
+        hasher for name, hasher in _PASSWORD_HASHERS.items()
+        if name != PASSWORD_HASHER
+    ),
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# Processes per worker hashing passwords (0 hashes on the request thread)
+# and how many hashes may be running or waiting at once across all the
+# workers on the host, one per CPU available unless set, before further
+# logins and signups are turned away with a 503. Workers count the hashes
+# in progress with locks on files in PASSWORD_HASH_LOCK_DIR, which must be
+# local to the host.
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 1))
+PASSWORD_HASH_QUEUE_SIZE = int(os.environ.get('PASSWORD_HASH_QUEUE_SIZE', 0))
+PASSWORD_HASH_LOCK_DIR = os.environ.get(
+    'PASSWORD_HASH_LOCK_DIR',
+    os.path.join(tempfile.gettempdir(), 'password-hashing'),
+)
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -138,6 +203,13 @@ MEDIA_URL = '/static/media/'
 MEDIA_ROOT = '/vol/web/media'
 STATIC_ROOT = '/vol/web/static'
 
+DEFAULT_FILE_STORAGE = 'core.storage.ContentAddressedStorage'
+# Seconds an unreferenced stored file is kept before it is deleted, so a
+# request that is saving the same content can still take a reference.
+STORED_FILE_GRACE = int(os.environ.get('STORED_FILE_GRACE', 3600))
+# Writes precompressed copies of static files for nginx to serve.
+STATICFILES_STORAGE = 'core.staticfiles.CompressedStaticFilesStorage'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -145,10 +217,168 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'core.User'
 
+# How scripts/run.sh serves the app: 'wsgi' (uwsgi) or 'asgi' (gunicorn
+# with uvicorn workers, running the same sync views on threads).
+SERVER_MODE = os.environ.get('SERVER_MODE', 'wsgi')
+
+# uwsgi configuration written by the uwsgi_config command. Unless
+# SERVER_WORKERS is set, SERVER_WORKERS_PER_CPU workers are run per CPU
+# available to the container, up to SERVER_MAX_WORKERS; the ASGI server is
+# given as many. Workers are recycled after SERVER_MAX_REQUESTS requests or
+# SERVER_MAX_WORKER_LIFETIME seconds, and killed when a request takes over
+# SERVER_HARAKIRI seconds. SERVER_CHEAPER spawns workers on demand, and
+# SERVER_PRELOAD loads the app in the master so forked workers share its
+# memory.
+SERVER_WORKERS = int(os.environ.get('SERVER_WORKERS', 0))
+SERVER_WORKERS_PER_CPU = int(os.environ.get('SERVER_WORKERS_PER_CPU', 2))
+SERVER_MAX_WORKERS = int(os.environ.get('SERVER_MAX_WORKERS', 64))
+SERVER_THREADS = int(os.environ.get('SERVER_THREADS', 4))
+SERVER_MAX_REQUESTS = int(os.environ.get('SERVER_MAX_REQUESTS', 5000))
+SERVER_MAX_WORKER_LIFETIME = int(
+    os.environ.get('SERVER_MAX_WORKER_LIFETIME', 3600)
+)
+SERVER_HARAKIRI = int(os.environ.get('SERVER_HARAKIRI', 30))
+SERVER_LISTEN = int(os.environ.get('SERVER_LISTEN', 1024))
+SERVER_CHEAPER = bool(int(os.environ.get('SERVER_CHEAPER', 1)))
+SERVER_PRELOAD = bool(int(os.environ.get('SERVER_PRELOAD', 1)))
+
+# Per-request metrics (query count, database and serializer time) reported
+# in Server-Timing headers and logs, and the query count above which a
+# request is logged as a warning (0 for no budget).
+REQUEST_METRICS = bool(int(os.environ.get('REQUEST_METRICS', 0)))
+REQUEST_QUERY_BUDGET = int(os.environ.get('REQUEST_QUERY_BUDGET', 0))
+
+# Compression of textual responses of at least RESPONSE_COMPRESSION_MIN_SIZE
+# bytes. Responses to requests with credentials (an Authorization header or
+# session/CSRF cookies) are left uncompressed unless
+# RESPONSE_COMPRESSION_AUTHENTICATED is set, as compressing secrets next to
+# attacker controlled data can leak them (BREACH).
+RESPONSE_COMPRESSION = bool(int(os.environ.get('RESPONSE_COMPRESSION', 1)))
+RESPONSE_COMPRESSION_MIN_SIZE = int(
+    os.environ.get('RESPONSE_COMPRESSION_MIN_SIZE', 1024)
+)
+RESPONSE_COMPRESSION_AUTHENTICATED = bool(
+    int(os.environ.get('RESPONSE_COMPRESSION_AUTHENTICATED', 0))
+)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'core.middleware': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
+# Login attempts allowed per client address and per email, checked before
+# any password is hashed (e.g. '30/min'; empty to disable), and whether a
+# client presenting a valid token for the posted email gets it back without
+# its password being checked. Attempts are counted in the default cache, so
+# the limits only hold across worker processes when CACHE_BACKEND is shared
+# (memcached, redis); with the per-process LocMemCache each worker allows
+# the full rate.
+LOGIN_THROTTLE_IP_RATE = os.environ.get('LOGIN_THROTTLE_IP_RATE', '30/min')
+LOGIN_THROTTLE_EMAIL_RATE = os.environ.get(
+    'LOGIN_THROTTLE_EMAIL_RATE', '10/min'
+)
+LOGIN_REUSE_PRESENTED_TOKEN = bool(
+    int(os.environ.get('LOGIN_REUSE_PRESENTED_TOKEN', 1))
+)
+
+# Token authentication cache: resolutions held per process (count and
+# seconds) and, optionally, the alias of a shared cache also holding them.
+TOKEN_AUTH_CACHE_SIZE = int(os.environ.get('TOKEN_AUTH_CACHE_SIZE', 1024))
+TOKEN_AUTH_CACHE_TTL = int(os.environ.get('TOKEN_AUTH_CACHE_TTL', 30))
+TOKEN_AUTH_SHARED_CACHE = os.environ.get('TOKEN_AUTH_SHARED_CACHE', '')
+TOKEN_AUTH_SHARED_CACHE_TTL = int(
+    os.environ.get('TOKEN_AUTH_SHARED_CACHE_TTL', 300)
+)
+
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # Proxies in front of the app. The proxy sets X-Forwarded-For to the
+    # address it was connected from, so throttles identify clients by it
+    # rather than by a header the client chose.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 1)),
 }
 
+# Encode and decode API JSON with orjson, when installed, rather than the
+# standard library json module.
+API_FAST_JSON = bool(int(os.environ.get('API_FAST_JSON', 0)))
+if API_FAST_JSON:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ]
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'] = [
+        'core.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ]
+
 SPECTACULAR_SETTINGS = {
     'COMPONENT_SPLIT_REQUEST': True,
-}
\ No newline at end of file
+}
+
+# Prebuilt OpenAPI schema: the directory build_schema writes it to, the code
+# version it belongs to (a digest of the sources when unset) and how many
+# seconds clients may cache it before revalidating its ETag.
+SCHEMA_ROOT = os.environ.get('SCHEMA_ROOT', '/vol/web/schema')
+CODE_VERSION = os.environ.get('CODE_VERSION', '')
+SCHEMA_CACHE_MAX_AGE = int(os.environ.get('SCHEMA_CACHE_MAX_AGE', 300))
+
+# Product list pagination: default page size and the cap applied to the
+# `page_size` query parameter.
+PRODUCT_PAGE_SIZE = int(os.environ.get('PRODUCT_PAGE_SIZE', 50))
+PRODUCT_MAX_PAGE_SIZE = int(os.environ.get('PRODUCT_MAX_PAGE_SIZE', 200))
+
+# Seconds a rendered product response is kept in the cache. Writes to the
+# catalog invalidate cached responses by bumping a version stored in the
+# default cache, which only reaches every worker process when CACHE_BACKEND
+# is shared (memcached, redis). With the per-process LocMemCache only the
+# process that wrote sees the change; the others serve their cached
+# responses for up to this long.
+PRODUCT_CACHE_TIMEOUT = int(os.environ.get('PRODUCT_CACHE_TIMEOUT', 300))
+
+# Bulk product endpoints: the most items accepted per request and how many
+# rows go into a single INSERT/UPDATE statement.
+PRODUCT_BULK_MAX_ITEMS = int(os.environ.get('PRODUCT_BULK_MAX_ITEMS', 5000))
+PRODUCT_BULK_BATCH_SIZE = int(os.environ.get('PRODUCT_BULK_BATCH_SIZE', 500))
+
+# Product image renditions: the longest edge in pixels of each derived image,
+# the number of background threads per worker generating them (0 renders
+# them inline, after the upload commits) and how many failed attempts at an
+# image the generate_renditions command makes before giving up on it.
+PRODUCT_IMAGE_THUMBNAIL_SIZE = int(
+    os.environ.get('PRODUCT_IMAGE_THUMBNAIL_SIZE', 320)
+)
+PRODUCT_IMAGE_MEDIUM_SIZE = int(os.environ.get('PRODUCT_IMAGE_MEDIUM_SIZE', 1024))
+PRODUCT_IMAGE_WORKERS = int(os.environ.get('PRODUCT_IMAGE_WORKERS', 2))
+PRODUCT_IMAGE_MAX_FAILURES = int(
+    os.environ.get('PRODUCT_IMAGE_MAX_FAILURES', 3)
+)
+
+# Product image uploads: the largest accepted file in bytes (chunked uploads
+# may exceed the proxy's per-request body limit) and the largest image in
+# pixels, checked from the header before anything is decoded.
+PRODUCT_IMAGE_MAX_UPLOAD_SIZE = int(
+    os.environ.get('PRODUCT_IMAGE_MAX_UPLOAD_SIZE', 50 * 2 ** 20)
+)
+PRODUCT_IMAGE_MAX_PIXELS = int(
+    os.environ.get('PRODUCT_IMAGE_MAX_PIXELS', 40_000_000)
+)
+# Resumable uploads: how many may be in progress per product, and the
+# seconds after its last chunk an unfinished upload is deleted.
+PRODUCT_IMAGE_MAX_OPEN_UPLOADS = int(
+    os.environ.get('PRODUCT_IMAGE_MAX_OPEN_UPLOADS', 3)
+)
+PRODUCT_IMAGE_UPLOAD_TTL = int(
+    os.environ.get('PRODUCT_IMAGE_UPLOAD_TTL', 24 * 3600)
+)
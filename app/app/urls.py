@@ -13,21 +13,26 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularSwaggerView,
-)
 from django.contrib import admin
 from django.urls import path, include
 from django.conf.urls.static import static
 from django.conf import settings
 
+from core.views import LazyView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('api/schems/', SpectacularAPIView.as_view(), name='api-schema'),
+    path(
+        'api/schems/',
+        LazyView('core.schema.PrebuiltSchemaView'),
+        name='api-schema',
+    ),
     path(
         'api/docs/',
-        SpectacularSwaggerView.as_view(url_name='api-schema'),
+        LazyView(
+            'drf_spectacular.views.SpectacularSwaggerView',
+            url_name='api-schema',
+        ),
         name='api-docs'
     ),
     path('api/user/', include('user.urls')),
@@ -0,0 +1,46 @@
+"""
+PostgreSQL backend with health checks for persistent connections.
+
+A connection kept open between requests (CONN_MAX_AGE) may have been
+dropped by the server or a proxy in the meantime. With CONN_HEALTH_CHECKS
+enabled, a reused connection is checked the first time a request needs it
+and replaced if it is no longer usable, instead of failing that request.
+Requests that never touch the database pay nothing.
+"""
+from django.db.backends.postgresql import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_done = False
+
+    def connect(self):
+        # A fresh connection needs no check.
+        self.health_check_done = True
+        super().connect()
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        # Runs at the start and end of each request; check again on reuse.
+        self.health_check_done = False
+
+    def close_if_health_check_failed(self):
+        """Close a reused connection that no longer works."""
+        if (
+            self.connection is None
+            or self.health_check_done
+            or not self.settings_dict.get('CONN_HEALTH_CHECKS')
+        ):
+            return
+
+        self.health_check_done = True
+        if not self.in_atomic_block and not self.is_usable():
+            self.close()
+
+    def _cursor(self, name=None):
+        # Check on the first query rather than in ensure_connection(), which
+        # Django also calls when tidying up connections between requests.
+        self.close_if_health_check_failed()
+        return super()._cursor(name)
@@ -0,0 +1,182 @@
+"""
+Password hashing on a bounded process pool.
+
+Hashing a password takes tens to hundreds of milliseconds of CPU. Doing it
+on a pool of PASSWORD_HASH_WORKERS processes leaves request threads free to
+serve other requests meanwhile. At most PASSWORD_HASH_QUEUE_SIZE hashes may
+be running or waiting at once across every worker on the host, which caps
+how much of the machine logins and signups can take; beyond that requests
+fail straight away with a 503 instead of queuing behind each other.
+
+Each hash holds an exclusive lock on one of PASSWORD_HASH_QUEUE_SIZE slot
+files in PASSWORD_HASH_LOCK_DIR. The kernel releases the lock when its
+holder exits, so a killed worker never leaks a slot.
+
+The process pool machinery is imported with the pool, so workers that
+never hash a password do not load multiprocessing.
+"""
+import atexit
+import fcntl
+import os
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from core.utils import available_cpus
+
+_pool = None
+_pool_lock = threading.Lock()
+# Descriptors of the slot files locked by this process.
+_held = set()
+
+
+class HashingUnavailable(APIException):
+    """Raised when every password hashing slot is taken."""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = _('Too many password checks in progress, try again.')
+    default_code = 'hashing_unavailable'
+    # Sent as the Retry-After header, in seconds.
+    wait = 1
+
+
+def _get_pool():
+    """Return the process wide hashing pool.
+
+    The pool is created lazily so it is started in each forked worker
+    rather than in a parent process that preloads the application.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS
+            )
+
+        return _pool
+
+
+def _slot_count():
+    """Return how many hashes may be in progress on the host at once."""
+    return settings.PASSWORD_HASH_QUEUE_SIZE or available_cpus()
+
+
+def _slot_path(index):
+    return os.path.join(settings.PASSWORD_HASH_LOCK_DIR, f'slot-{index}')
+
+
+@contextmanager
+def _slot():
+    """Hold a free hashing slot, or raise HashingUnavailable if none is."""
+    os.makedirs(settings.PASSWORD_HASH_LOCK_DIR, exist_ok=True)
+    for index in range(_slot_count()):
+        fd = os.open(_slot_path(index), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            continue
+
+        _held.add(fd)
+        try:
+            yield
+        finally:
+            _held.discard(fd)
+            os.close(fd)
+        return
+
+    raise HashingUnavailable()
+
+
+def _close_held_slots():
+    """Drop the slots a forked child inherited, which its parent holds.
+
+    A lock lasts until every descriptor sharing it is closed, so a pool
+    process forked while a slot is held would otherwise keep it taken.
+    """
+    for fd in list(_held):
+        os.close(fd)
+    _held.clear()
+
+
+os.register_at_fork(after_in_child=_close_held_slots)
+
+
+def _discard_pool(pool=None):
+    """Stop using pool (or the current one), e.g. after a process died."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None and pool in (None, _pool):
+            _pool.shutdown(wait=False)
+            _pool = None
+
+
+# Shut the pool down while the modules it uses are still loaded.
+atexit.register(_discard_pool)
+
+
+@receiver(setting_changed)
+def reset_pool(*, setting, **kwargs):
+    """Start a new pool, whose processes see the changed settings."""
+    if setting.startswith('PASSWORD_'):
+        _discard_pool()
+
+
+def _run(fn, *args):
+    """Return fn(*args), computed on the hashing pool when enabled."""
+    with _slot():
+        if not settings.PASSWORD_HASH_WORKERS:
+            return fn(*args)
+
+        from concurrent.futures.process import BrokenProcessPool
+
+        pool = _get_pool()
+        try:
+            return pool.submit(fn, *args).result()
+        except BrokenProcessPool:
+            _discard_pool(pool)
+            raise HashingUnavailable()
+
+
+def make_password(password):
+    """Return the hash of password with the preferred hasher."""
+    if password is None:
+        # Unusable passwords are random strings, not hashes.
+        return hashers.make_password(None)
+
+    return _run(hashers.make_password, password)
+
+
+def check_password(password, encoded, setter=None):
+    """Return whether password matches encoded, as Django's does.
+
+    When the password matches but was hashed with another hasher or cost,
+    setter is called with it to store an up to date hash.
+    """
+    if password is None or not hashers.is_password_usable(encoded):
+        return False
+
+    try:
+        hasher = hashers.identify_hasher(encoded)
+    except ValueError:
+        return False
+
+    preferred = hashers.get_hasher('default')
+    must_update = (
+        hasher.algorithm != preferred.algorithm
+        or preferred.must_update(encoded)
+    )
+    is_correct = _run(hashers.check_password, password, encoded)
+    if setter and is_correct and must_update:
+        setter(password)
+
+    return is_correct
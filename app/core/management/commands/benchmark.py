@@ -0,0 +1,331 @@
+"""
+Django command to benchmark the product and user APIs.
+
+Requests are made in-process with the test client against data seeded
+inside a transaction that is rolled back afterwards, so the command can be
+pointed at any database without leaving rows behind.
+"""
+import json
+import math
+import platform
+import random
+import tempfile
+import uuid
+from io import BytesIO
+from time import perf_counter
+
+from PIL import Image
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APIRequestFactory
+
+from core.models import Product, ProductTag, Tag
+from product import cache
+from product.serializers import (
+    ProductDetailSerializers,
+    ProductListSerializer,
+    ProductSerializers,
+)
+
+WORDS = [
+    'jazz', 'rock', 'blues', 'running', 'interview', 'live', 'podcast',
+    'session', 'training', 'marathon', 'acoustic', 'weekly',
+]
+PASSWORD = 'benchmark-pass-123'
+TAGS_PER_USER = 5
+BATCH_SIZE = 1000
+
+
+def summarize(samples):
+    """Return latency percentiles (ms) and throughput of samples (s)."""
+    ordered = sorted(samples)
+
+    def percentile(p):
+        return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)] * 1000
+
+    total = sum(ordered)
+    return {
+        'iterations': len(ordered),
+        'mean_ms': round(total / len(ordered) * 1000, 3),
+        'min_ms': round(ordered[0] * 1000, 3),
+        'p50_ms': round(percentile(50), 3),
+        'p90_ms': round(percentile(90), 3),
+        'p99_ms': round(percentile(99), 3),
+        'max_ms': round(ordered[-1] * 1000, 3),
+        'throughput_per_s': round(len(ordered) / total, 1) if total else None,
+    }
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the APIs."""
+    help = (
+        'Seed users and products, then measure the latency of the product '
+        'and user APIs and serializers. Prints the results as JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--products', type=int, default=1000)
+        parser.add_argument('--iterations', type=int, default=100)
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            dest='scenarios',
+            help='Only run the named scenario (may be repeated).',
+        )
+        parser.add_argument(
+            '--output', help='Write the results to this file.'
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if options['users'] < 1 or options['products'] < 1:
+            raise CommandError('Seed at least one user and one product.')
+        if options['iterations'] < 1:
+            raise CommandError('Run at least one iteration.')
+
+        self.rng = random.Random(options['seed'])
+        self.page_size = options['page_size']
+
+        with tempfile.TemporaryDirectory() as media_root, override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+            MEDIA_ROOT=media_root,
+            # Measure logins rather than the throttle rejecting them.
+            LOGIN_THROTTLE_IP_RATE=None,
+            LOGIN_THROTTLE_EMAIL_RATE=None,
+        ):
+            with transaction.atomic():
+                self._seed(options['users'], options['products'])
+                scenarios = self._scenarios()
+                selected = options['scenarios'] or list(scenarios)
+                unknown = set(selected) - set(scenarios)
+                if unknown:
+                    raise CommandError(
+                        f'Unknown scenarios: {", ".join(sorted(unknown))}.'
+                    )
+
+                results = {
+                    name: self._measure(
+                        *scenarios[name],
+                        options['iterations'],
+                        options['warmup'],
+                    )
+                    for name in selected
+                }
+                transaction.set_rollback(True)
+
+        # Drop cached responses rendered from the rolled back rows.
+        cache.bump_catalog_version()
+
+        report = json.dumps({
+            'environment': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': settings.DATABASES['default']['ENGINE'],
+            },
+            'parameters': {
+                name: options[name] for name in [
+                    'users', 'products', 'iterations', 'warmup',
+                    'page_size', 'seed',
+                ]
+            },
+            'results': results,
+        }, indent=2)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(report + '\n')
+        else:
+            self.stdout.write(report)
+
+    def _seed(self, users, products):
+        """Create users with tokens and tags, and their products."""
+        prefix = uuid.uuid4().hex[:8]
+        password = make_password(PASSWORD)
+        self.users = get_user_model().objects.bulk_create([
+            get_user_model()(
+                email=f'bench-{prefix}-{i}@example.com',
+                name=f'Benchmark {i}',
+                password=password,
+            )
+            for i in range(users)
+        ], batch_size=BATCH_SIZE)
+        self.tokens = Token.objects.bulk_create([
+            Token(user=user, key=Token.generate_key()) for user in self.users
+        ], batch_size=BATCH_SIZE)
+
+        tags = Tag.objects.bulk_create([
+            Tag(user=user, name=f'{word}-{i}')
+            for user in self.users
+            for i, word in enumerate(self.rng.sample(WORDS, TAGS_PER_USER))
+        ], batch_size=BATCH_SIZE)
+        tags_by_user = {}
+        for tag in tags:
+            tags_by_user.setdefault(tag.user_id, []).append(tag)
+
+        self.products = []
+        for start in range(0, products, BATCH_SIZE):
+            batch = Product.objects.bulk_create([
+                Product(
+                    user=self.rng.choice(self.users),
+                    title=' '.join(self.rng.sample(WORDS, 3)).title(),
+                    description=' '.join(self.rng.choices(WORDS, k=30)),
+                )
+                for _ in range(start, min(start + BATCH_SIZE, products))
+            ])
+            ProductTag.objects.bulk_create([
+                ProductTag(product=product, tag=tag)
+                for product in batch
+                for tag in self.rng.sample(tags_by_user[product.user_id], 2)
+            ])
+            self.products.extend(batch)
+
+    def _request(self, client, method, url, expected, **kwargs):
+        """Make a request with client, failing on an unexpected status."""
+        res = getattr(client, method)(url, **kwargs)
+        if res.status_code != expected:
+            raise CommandError(
+                f'{method.upper()} {url} returned {res.status_code}, '
+                f'expected {expected}.'
+            )
+        return res
+
+    def _image(self):
+        """Return a new, small JPEG upload."""
+        buffer = BytesIO()
+        color = tuple(self.rng.randrange(256) for _ in range(3))
+        Image.new('RGB', (640, 480), color).save(buffer, format='JPEG')
+        return SimpleUploadedFile(
+            'image.jpg', buffer.getvalue(), content_type='image/jpeg'
+        )
+
+    def _scenarios(self):
+        """Return the scenarios to measure as name: (setup, run).
+
+        setup prepares the arguments of a single run and is not timed.
+        """
+        user = self.products[0].user
+        token = next(t for t in self.tokens if t.user_id == user.id)
+        anonymous = APIClient()
+        authenticated = APIClient()
+        authenticated.force_authenticate(user)
+        token_client = APIClient()
+        token_client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        list_url = reverse('product:product-list')
+        page = {'page_size': self.page_size}
+        own_products = [p for p in self.products if p.user_id == user.id]
+
+        def detail_url(product):
+            return reverse('product:product-detail', args=[product.id])
+
+        def upload_url(product):
+            return reverse('product:product-upload-image', args=[product.id])
+
+        request = APIRequestFactory().get(list_url)
+        serializer_page = list(
+            Product.objects.order_by('-created_at', '-id')
+            .prefetch_related('tags', 'clothing_sizes')[:self.page_size]
+        )
+        serializer_rows = list(
+            Product.objects.order_by('-created_at', '-id')
+            .values(*ProductListSerializer.columns)[:self.page_size]
+        )
+
+        def no_setup():
+            return ()
+
+        def invalidate_cache():
+            cache.bump_catalog_version()
+            return ()
+
+        return {
+            'product-list': (no_setup, lambda: self._request(
+                anonymous, 'get', list_url, 200, data=page,
+            )),
+            'product-list-uncached': (
+                invalidate_cache,
+                lambda: self._request(
+                    anonymous, 'get', list_url, 200, data=page,
+                ),
+            ),
+            'product-search': (
+                lambda: (self.rng.choice(WORDS),),
+                lambda word: self._request(
+                    anonymous, 'get', list_url, 200,
+                    data={**page, 'q': word},
+                ),
+            ),
+            'product-detail': (
+                lambda: (self.rng.choice(self.products),),
+                lambda product: self._request(
+                    anonymous, 'get', detail_url(product), 200,
+                ),
+            ),
+            'product-create': (no_setup, lambda: self._request(
+                authenticated, 'post', list_url, 201,
+                data={
+                    'title': 'Benchmark product',
+                    'tags': [{'name': word} for word in WORDS[:3]],
+                    'clothing_sizes': [{'name': 'M'}],
+                },
+                format='json',
+            )),
+            'product-upload-image': (
+                lambda: (self.rng.choice(own_products), self._image()),
+                lambda product, image: self._request(
+                    authenticated, 'post', upload_url(product), 200,
+                    data={'image': image}, format='multipart',
+                ),
+            ),
+            'user-token': (no_setup, lambda: self._request(
+                anonymous, 'post', reverse('user:token'), 200,
+                data={'email': user.email, 'password': PASSWORD},
+            )),
+            'user-me': (no_setup, lambda: self._request(
+                token_client, 'get', reverse('user:me'), 200,
+            )),
+            'serializer-product-list': (no_setup, lambda: ProductSerializers(
+                serializer_page, many=True, context={'request': request},
+            ).data),
+            # Unlike the above, includes loading the relations of the page.
+            'serializer-product-list-rows': (
+                no_setup,
+                lambda: ProductListSerializer(
+                    serializer_rows, many=True, context={'request': request},
+                ).data,
+            ),
+            'serializer-product-detail': (
+                lambda: (self.rng.choice(serializer_page),),
+                lambda product: ProductDetailSerializers(
+                    product, context={'request': request},
+                ).data,
+            ),
+        }
+
+    def _measure(self, setup, run, iterations, warmup):
+        """Time iterations runs of run after warmup untimed ones."""
+        for _ in range(warmup):
+            run(*setup())
+
+        samples = []
+        for _ in range(iterations):
+            args = setup()
+            start = perf_counter()
+            run(*args)
+            samples.append(perf_counter() - start)
+
+        return summarize(samples)
@@ -0,0 +1,184 @@
+"""
+Django command to compare servers under load from slow clients.
+
+Slow clients connect and trickle their request out a byte at a time, as
+clients on poor networks do, while the latency of regular requests made
+alongside them is measured. Point it at the app served in each mode, e.g.
+
+    uwsgi --http :8001 --workers 4 --threads 4 --module app.wsgi
+    gunicorn app.asgi:application -k uvicorn.workers.UvicornWorker -b :8002
+
+    python manage.py benchmark_slow_clients \\
+        --target wsgi=http://localhost:8001/api/product/product/ \\
+        --target asgi=http://localhost:8002/api/product/product/
+"""
+import asyncio
+import json
+from time import perf_counter
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.management.commands.benchmark import summarize
+
+
+def parse_target(value):
+    """Return (name, host, port, path) of a name=http://host:port/path."""
+    name, _, url = value.partition('=')
+    parts = urlsplit(url)
+    if not name or parts.scheme != 'http' or not parts.hostname:
+        raise CommandError(f'Expected name=http://host:port/path: {value}')
+
+    path = parts.path or '/'
+    if parts.query:
+        path = f'{path}?{parts.query}'
+    return name, parts.hostname, parts.port or 80, path
+
+
+async def slow_client(host, port, path, interval, stop):
+    """Trickle out a request that never completes until stop is set."""
+    while not stop.is_set():
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+        except OSError:
+            await asyncio.sleep(interval)
+            continue
+
+        try:
+            writer.write(
+                f'GET {path} HTTP/1.1\r\nHost: {host}\r\nX-Slow: '.encode()
+            )
+            while not stop.is_set():
+                await writer.drain()
+                try:
+                    await asyncio.wait_for(stop.wait(), interval)
+                except asyncio.TimeoutError:
+                    writer.write(b'a')
+        except (ConnectionError, OSError):
+            # Dropped by the server; come back on a new connection.
+            pass
+        finally:
+            writer.close()
+
+
+async def probe(host, port, path, timeout):
+    """Return the latency and status of one GET of path."""
+    start = perf_counter()
+
+    async def get():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            writer.write(
+                f'GET {path} HTTP/1.1\r\nHost: {host}\r\n'
+                'Connection: close\r\n\r\n'.encode()
+            )
+            await writer.drain()
+            return await reader.read()
+        finally:
+            writer.close()
+
+    response = await asyncio.wait_for(get(), timeout)
+    status = int(response.split(b' ', 2)[1])
+    return perf_counter() - start, status
+
+
+async def measure(target, options):
+    """Return the probe results for target under slow client load."""
+    _, host, port, path = target
+    stop = asyncio.Event()
+    slow_clients = [
+        asyncio.ensure_future(
+            slow_client(host, port, path, options['interval'], stop)
+        )
+        for _ in range(options['slow_clients'])
+    ]
+    # Let the slow clients connect and take hold of the server.
+    await asyncio.sleep(options['interval'])
+
+    semaphore = asyncio.Semaphore(options['concurrency'])
+
+    async def limited_probe():
+        async with semaphore:
+            try:
+                return await probe(host, port, path, options['timeout'])
+            except asyncio.TimeoutError:
+                return 'timeout'
+            except (ConnectionError, OSError, IndexError, ValueError):
+                return 'error'
+
+    start = perf_counter()
+    outcomes = await asyncio.gather(
+        *(limited_probe() for _ in range(options['requests']))
+    )
+    elapsed = perf_counter() - start
+
+    stop.set()
+    await asyncio.gather(*slow_clients)
+
+    samples = [o[0] for o in outcomes if isinstance(o, tuple)]
+    statuses = {}
+    for outcome in outcomes:
+        key = str(outcome[1]) if isinstance(outcome, tuple) else outcome
+        statuses[key] = statuses.get(key, 0) + 1
+
+    return {
+        'latency': summarize(samples) if samples else None,
+        'responses': statuses,
+        'elapsed_s': round(elapsed, 3),
+    }
+
+
+class Command(BaseCommand):
+    """Django command to benchmark servers under slow client load."""
+    help = (
+        'Measure the latency of requests to each target while slow '
+        'clients hold connections to it. Prints the results as JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target',
+            action='append',
+            dest='targets',
+            required=True,
+            help='name=http://host:port/path to measure (may be repeated).',
+        )
+        parser.add_argument('--slow-clients', type=int, default=100)
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Seconds between the bytes slow clients send.',
+        )
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=10)
+        parser.add_argument('--timeout', type=float, default=10.0)
+        parser.add_argument(
+            '--output', help='Write the results to this file.'
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        targets = [parse_target(value) for value in options['targets']]
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('Make at least one request at a time.')
+
+        results = {
+            target[0]: asyncio.run(measure(target, options))
+            for target in targets
+        }
+        report = json.dumps({
+            'parameters': {
+                name: options[name] for name in [
+                    'slow_clients', 'interval', 'requests', 'concurrency',
+                    'timeout',
+                ]
+            },
+            'results': results,
+        }, indent=2)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(report + '\n')
+        else:
+            self.stdout.write(report)
@@ -0,0 +1,33 @@
+"""
+Django command to build the OpenAPI schema served by the API.
+"""
+from django.core.management.base import BaseCommand
+
+from core import schema
+
+
+class Command(BaseCommand):
+    """Django command to build the OpenAPI schema."""
+    help = (
+        'Generate the OpenAPI schema and store it for the current code '
+        'version, unless it is already up to date.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Rebuild the schema even if it is up to date.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        version = schema.code_version()
+        if schema.build(force=options['force']):
+            self.stdout.write(self.style.SUCCESS(
+                f'Built the OpenAPI schema for code version {version}.'
+            ))
+        else:
+            self.stdout.write(
+                f'The OpenAPI schema for code version {version} is up to date.'
+            )
@@ -0,0 +1,51 @@
+"""
+Django command to generate the product image renditions that are missing.
+
+Renditions are generated by a thread pool in each worker, whose queued jobs
+are lost when the worker is recycled or killed. scripts/run.sh runs this
+command periodically to generate them anyway.
+"""
+import json
+import logging
+
+from django.core.management.base import BaseCommand
+
+from product import tasks
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """Django command to generate missing image renditions."""
+    help = (
+        'Generate the renditions of product images that have none, and '
+        'print how many were generated.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=300,
+            help='Skip products updated in the last this many seconds, '
+                 'whose renditions may still be in progress.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        generated = failed = 0
+        for product_id in tasks.missing_renditions(options['min_age']):
+            try:
+                tasks.generate_renditions(product_id)
+            except Exception:
+                logger.exception(
+                    'Failed to generate renditions for product %s',
+                    product_id,
+                )
+                failed += 1
+            else:
+                generated += 1
+
+        self.stdout.write(
+            json.dumps({'generated': generated, 'failed': failed})
+        )
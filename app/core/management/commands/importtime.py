@@ -0,0 +1,134 @@
+"""
+Django command to report where worker startup time goes.
+
+Imports the app in a fresh interpreter under `python -X importtime`, as a
+server worker does, and reports the slowest imports and packages, e.g.
+
+    python manage.py importtime --limit 15
+"""
+import json
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+IMPORT_TIME_RE = re.compile(
+    r'^import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)$'
+)
+
+# Run in the fresh interpreter, printing the seconds taken to stdout. The
+# URLconf is loaded on the first request rather than at import.
+STARTUP_SCRIPT = """
+import time
+start = time.perf_counter()
+__import__({module!r})
+if {urls!r}:
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+    from django.urls import get_resolver
+    get_resolver().url_patterns
+print(time.perf_counter() - start)
+"""
+
+
+def parse_importtime(output):
+    """Return (module, self_us, cumulative_us, depth) of -X importtime."""
+    imports = []
+    for line in output.splitlines():
+        match = IMPORT_TIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            imports.append((
+                module, int(self_us), int(cumulative_us),
+                (len(indent) - 1) // 2,
+            ))
+
+    return imports
+
+
+def report(imports, limit):
+    """Return the slowest modules and packages of imports."""
+    packages = defaultdict(int)
+    for module, self_us, _, _ in imports:
+        packages[module.split('.')[0]] += self_us
+
+    slowest = sorted(imports, key=lambda i: i[2], reverse=True)[:limit]
+    return {
+        'import_ms': round(
+            sum(i[2] for i in imports if i[3] == 0) / 1000, 3
+        ),
+        'modules': [
+            {
+                'module': module,
+                'self_ms': round(self_us / 1000, 3),
+                'cumulative_ms': round(cumulative_us / 1000, 3),
+            }
+            for module, self_us, cumulative_us, _ in slowest
+        ],
+        'packages': [
+            {'package': package, 'self_ms': round(self_us / 1000, 3)}
+            for package, self_us in sorted(
+                packages.items(), key=lambda p: p[1], reverse=True
+            )[:limit]
+        ],
+    }
+
+
+class Command(BaseCommand):
+    """Django command to measure the import time of the app."""
+    help = (
+        'Import the app in a new interpreter with -X importtime and print '
+        'the slowest modules and packages as JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--module',
+            default='app.wsgi',
+            help='Module a worker imports at startup.',
+        )
+        parser.add_argument(
+            '--no-urls',
+            action='store_false',
+            dest='urls',
+            help='Do not load the URLconf, as the first request does.',
+        )
+        parser.add_argument('--limit', type=int, default=25)
+        parser.add_argument(
+            '--output', help='Write the results to this file.'
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        script = STARTUP_SCRIPT.format(
+            module=options['module'], urls=options['urls']
+        )
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', script],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode:
+            raise CommandError(
+                f'Importing {options["module"]} failed:\n{result.stderr}'
+            )
+
+        results = {
+            'module': options['module'],
+            'urls': options['urls'],
+            'startup_ms': round(float(result.stdout.split()[-1]) * 1000, 3),
+            **report(parse_importtime(result.stderr), options['limit']),
+        }
+        output = json.dumps(results, indent=2)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+        else:
+            self.stdout.write(output)
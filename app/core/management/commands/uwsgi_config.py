@@ -0,0 +1,144 @@
+"""
+Django command to write the uwsgi configuration for this host.
+
+The number of workers follows the CPUs available to the container, so the
+same image fits a small staging box and a large production node. Run by
+scripts/run.sh as
+
+    uwsgi --ini "exec://python manage.py uwsgi_config"
+
+or, to size the ASGI server the same way, with --workers to print only the
+number of workers.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.utils import available_cpus, read_fields
+
+SOMAXCONN = '/proc/sys/net/core/somaxconn'
+
+
+def max_listen():
+    """Return the largest listen backlog the kernel accepts, if known."""
+    somaxconn = read_fields(SOMAXCONN)
+    return int(somaxconn[0]) if somaxconn else None
+
+
+def worker_count(cpus):
+    """Return the number of workers to run on a host with cpus CPUs."""
+    workers = settings.SERVER_WORKERS or min(
+        cpus * settings.SERVER_WORKERS_PER_CPU, settings.SERVER_MAX_WORKERS
+    )
+    if workers < 1:
+        raise CommandError('Run at least one worker.')
+    return workers
+
+
+def uwsgi_options(cpus):
+    """Return the uwsgi options for a host with cpus CPUs as pairs."""
+    workers = worker_count(cpus)
+
+    # uwsgi refuses to start with a backlog over net.core.somaxconn.
+    listen = settings.SERVER_LISTEN
+    limit = max_listen()
+    if limit is not None:
+        listen = min(listen, limit)
+
+    options = [
+        ('socket', ':9000'),
+        ('module', 'app.wsgi'),
+        ('master', True),
+        ('strict', True),
+        ('need-app', True),
+        ('die-on-term', True),
+        ('vacuum', True),
+        ('single-interpreter', True),
+        ('enable-threads', True),
+        ('lazy-apps', not settings.SERVER_PRELOAD),
+        ('processes', workers),
+        ('listen', listen),
+    ]
+    if settings.SERVER_THREADS > 1:
+        options.append(('threads', settings.SERVER_THREADS))
+    if workers > 1:
+        # Wake one worker per connection rather than all of them.
+        options.append(('thunder-lock', True))
+
+    # Stagger recycling over 10% of the limit, so workers are not all
+    # restarted at once.
+    if settings.SERVER_MAX_REQUESTS:
+        options += [
+            ('max-requests', settings.SERVER_MAX_REQUESTS),
+            ('max-requests-delta',
+             settings.SERVER_MAX_REQUESTS // (10 * workers)),
+        ]
+    if settings.SERVER_MAX_WORKER_LIFETIME:
+        options += [
+            ('max-worker-lifetime', settings.SERVER_MAX_WORKER_LIFETIME),
+            ('max-worker-lifetime-delta',
+             settings.SERVER_MAX_WORKER_LIFETIME // (10 * workers)),
+        ]
+    if settings.SERVER_HARAKIRI:
+        options.append(('harakiri', settings.SERVER_HARAKIRI))
+
+    if settings.SERVER_CHEAPER and workers > 1:
+        # Keep a quarter of the workers running, spawning the rest when
+        # requests queue up.
+        cheaper = max(1, workers // 4)
+        options += [
+            ('cheaper-algo', 'spare'),
+            ('cheaper', cheaper),
+            ('cheaper-initial', cheaper),
+            ('cheaper-step', max(1, cheaper // 2)),
+        ]
+
+    return options
+
+
+def render_ini(options):
+    """Return options as the [uwsgi] section of an ini file."""
+    lines = ['[uwsgi]']
+    for name, value in options:
+        if isinstance(value, bool):
+            value = 'true' if value else 'false'
+        lines.append(f'{name} = {value}')
+
+    return '\n'.join(lines) + '\n'
+
+
+class Command(BaseCommand):
+    """Django command to write the uwsgi configuration."""
+    help = (
+        'Print a uwsgi ini configuration sized to the CPUs available, '
+        'from the SERVER_* settings.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--cpus',
+            type=int,
+            help='Size for this many CPUs instead of the ones available.',
+        )
+        parser.add_argument(
+            '--output', help='Write the configuration to this file.'
+        )
+        parser.add_argument(
+            '--workers',
+            action='store_true',
+            help='Print only the number of workers.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        cpus = options['cpus'] or available_cpus()
+        if options['workers']:
+            self.stdout.write(str(worker_count(cpus)))
+            return
+
+        ini = render_ini(uwsgi_options(cpus))
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(ini)
+        else:
+            self.stdout.write(ini, ending='')
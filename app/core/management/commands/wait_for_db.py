@@ -1,25 +1,101 @@
 """
 Django command to wait for the database to be available.
+
+Readiness is probed with a single `SELECT 1` over a new connection, and
+retried with exponential backoff and jitter until a deadline, after which
+the command fails.
 """
+import random
 import time
 
 from psycopg2 import OperationalError as Psycopg2OpError
 
+from django.db import DEFAULT_DB_ALIAS, connections
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+
+
+def probe(database, connect_timeout):
+    """Run SELECT 1 on a new connection to database.
+
+    Raises OperationalError when the database is not available.
+    """
+    connection = connections[database]
+    params = connection.get_connection_params()
+    # libpq treats timeouts under 2 seconds as 2 seconds.
+    params['connect_timeout'] = connect_timeout
+    conn = connection.get_new_connection(params)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    finally:
+        conn.close()
+
+
+def backoff(attempt, initial_delay, max_delay):
+    """Return the seconds to wait before retry number attempt.
+
+    The delay doubles with each attempt up to max_delay, and is drawn from
+    its upper half so processes started together spread their retries.
+    """
+    delay = min(max_delay, initial_delay * 2 ** attempt)
+    return random.uniform(delay / 2, delay)
 
 
 class Command(BaseCommand):
     """Django command to wait for database."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=60.0,
+            help='Seconds to wait in total before failing.',
+        )
+        parser.add_argument(
+            '--connect-timeout',
+            type=int,
+            default=2,
+            help='Seconds each connection attempt may take.',
+        )
+        parser.add_argument(
+            '--initial-delay',
+            type=float,
+            default=0.1,
+            help='Seconds to wait after the first failed attempt.',
+        )
+        parser.add_argument(
+            '--max-delay',
+            type=float,
+            default=5.0,
+            help='Longest wait between attempts, in seconds.',
+        )
+
     def handle(self, *args, **options):
         """Entrypoint for command."""
         self.stdout.write('Waiting for database...')
-        db_up = False
-        while db_up is False:
+        deadline = time.monotonic() + options['timeout']
+        attempt = 0
+        while True:
             try:
-                self.check(databases=['default'])
-                db_up = True
-            except (Psycopg2OpError, OperationalError):
-                self.stdout.write('Database unavailable, waiting 1 second...')
-                time.sleep(1)
+                probe(options['database'], options['connect_timeout'])
+                break
+            except (Psycopg2OpError, OperationalError) as e:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise CommandError(
+                        f'Database unavailable after {options["timeout"]:g} '
+                        f'seconds: {e}'
+                    )
+
+                delay = min(remaining, backoff(
+                    attempt, options['initial_delay'], options['max_delay']
+                ))
+                self.stdout.write(
+                    f'Database unavailable, waiting {delay:.2f} seconds...'
+                )
+                time.sleep(delay)
+                attempt += 1
+
         self.stdout.write(self.style.SUCCESS('Database available!'))
@@ -0,0 +1,66 @@
+"""
+Per-request performance metrics.
+
+While RequestMetricsMiddleware handles a request, every SQL query run on
+any connection is counted and timed, and serializers that include
+TimedSerializerMixin add the time spent building their representation.
+"""
+from contextvars import ContextVar
+from time import perf_counter
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Query count and timings, in seconds, of a single request."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        """Count and time a query, as a database execute wrapper."""
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += perf_counter() - start
+
+
+def current():
+    """Return the metrics of the request being handled, if recorded."""
+    return _current.get()
+
+
+def activate(metrics):
+    """Record into metrics until reset() is called with the result."""
+    return _current.set(metrics)
+
+
+def reset(token):
+    """Stop recording into the metrics set by activate()."""
+    _current.reset(token)
+
+
+class TimedSerializerMixin:
+    """Record the time spent in to_representation in request metrics.
+
+    Nested serializers and list items are timed once, by the outermost
+    serializer, and the time includes any queries they trigger.
+    """
+
+    def to_representation(self, instance):
+        metrics = _current.get()
+        if metrics is None or metrics.serializing:
+            return super().to_representation(instance)
+
+        metrics.serializing = True
+        start = perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics.serializing = False
+            metrics.serializer_time += perf_counter() - start
@@ -0,0 +1,182 @@
+"""
+Middleware for the API.
+"""
+import functools
+import json
+import logging
+from contextlib import ExitStack
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_string
+
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'application/vnd.oai.openapi',
+)
+# Brotli's higher levels are too slow to apply to every response.
+BROTLI_QUALITY = 5
+
+
+class RequestMetricsMiddleware:
+    """Report the queries and time each request spends, when enabled.
+
+    The figures are added to the response as a Server-Timing header and
+    logged as JSON; requests running more queries than the configured
+    budget are logged as warnings. Queries are counted on the connections
+    of the request thread, so the middleware is sync only; under ASGI,
+    enabling it runs the views behind it on a thread.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_metrics = metrics.RequestMetrics()
+        token = metrics.activate(request_metrics)
+        start = perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(request_metrics)
+                    )
+                response = self.get_response(request)
+        finally:
+            metrics.reset(token)
+        total_time = perf_counter() - start
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={request_metrics.db_time * 1000:.2f};'
+            f'desc="{request_metrics.queries} queries"',
+            f'serializer;dur={request_metrics.serializer_time * 1000:.2f}',
+            f'total;dur={total_time * 1000:.2f}',
+        ])
+
+        fields = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': request_metrics.queries,
+            'db_ms': round(request_metrics.db_time * 1000, 2),
+            'serializer_ms': round(request_metrics.serializer_time * 1000, 2),
+            'total_ms': round(total_time * 1000, 2),
+        }
+        budget = settings.REQUEST_QUERY_BUDGET
+        level = (
+            logging.WARNING if budget and request_metrics.queries > budget
+            else logging.INFO
+        )
+        logger.log(level, json.dumps(fields), extra={'metrics': fields})
+
+        return response
+
+
+@functools.lru_cache(maxsize=None)
+def get_brotli():
+    """Return the brotli module, or None when it is not installed.
+
+    It is imported when the first response is compressed rather than when
+    workers start.
+    """
+    try:
+        import brotli
+    except ImportError:  # pragma: no cover
+        return None
+
+    return brotli
+
+
+def accepted_encodings(header):
+    """Return the content codings the Accept-Encoding header allows."""
+    accepted = set()
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        params = params.replace(' ', '')
+        if params.startswith('q=') and not params[2:].strip('0.'):
+            continue
+        accepted.add(coding.strip().lower())
+
+    return accepted
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Compress textual responses with brotli or gzip, when enabled.
+
+    Responses smaller than RESPONSE_COMPRESSION_MIN_SIZE are sent as is.
+    Compressing a secret alongside attacker controlled data reveals the
+    secret through the response size (BREACH), so responses to requests
+    carrying credentials are only compressed when
+    RESPONSE_COMPRESSION_AUTHENTICATED is set.
+    """
+
+    def __init__(self, get_response):
+        if not settings.RESPONSE_COMPRESSION:
+            raise MiddlewareNotUsed()
+        super().__init__(get_response)
+
+    def process_response(self, request, response):
+        if (
+            response.streaming
+            or response.has_header('Content-Encoding')
+            or not response.get('Content-Type', '').startswith(
+                COMPRESSIBLE_TYPES
+            )
+            or len(response.content) < settings.RESPONSE_COMPRESSION_MIN_SIZE
+        ):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if self._has_credentials(request):
+            return response
+
+        accepted = accepted_encodings(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        brotli = get_brotli() if 'br' in accepted else None
+        if brotli is not None:
+            encoding = 'br'
+            content = brotli.compress(response.content, quality=BROTLI_QUALITY)
+        elif 'gzip' in accepted:
+            encoding = 'gzip'
+            content = compress_string(response.content)
+        else:
+            return response
+
+        if len(content) >= len(response.content):
+            return response
+
+        response.content = content
+        response['Content-Length'] = str(len(content))
+        response['Content-Encoding'] = encoding
+        # The compressed body differs byte for byte, so a strong ETag
+        # computed from the original no longer holds (RFC 7232 2.1).
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+
+        return response
+
+    def _has_credentials(self, request):
+        """Return whether the response may hold secrets of the client."""
+        if settings.RESPONSE_COMPRESSION_AUTHENTICATED:
+            return False
+
+        return bool(
+            request.META.get('HTTP_AUTHORIZATION')
+            or settings.SESSION_COOKIE_NAME in request.COOKIES
+            or settings.CSRF_COOKIE_NAME in request.COOKIES
+        )
@@ -0,0 +1,46 @@
+# Generated by Django 4.0.10 on 2026-10-17 03:05
+
+from datetime import timedelta
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def spread_created_at(apps, schema_editor):
+    """Give existing products distinct creation times, in id order.
+
+    The column default gives every existing row the same time; they are
+    moved back a microsecond per newer product so ids keep their order.
+    """
+    Product = apps.get_model('core', 'Product')
+
+    batch = []
+    products = Product.objects.order_by('-id').only('id', 'created_at')
+    for offset, product in enumerate(products.iterator()):
+        product.created_at -= timedelta(microseconds=offset)
+        batch.append(product)
+        if len(batch) == 1000:
+            Product.objects.bulk_update(batch, ['created_at'])
+            batch = []
+    Product.objects.bulk_update(batch, ['created_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_alter_product_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(spread_created_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['-created_at', '-id'], name='core_product_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.0.10 on 2026-10-17 03:05
+
+import core.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_product_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='image_medium',
+            field=models.ImageField(editable=False, null=True, upload_to=core.models.product_image_file_path),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='image_thumbnail',
+            field=models.ImageField(editable=False, null=True, upload_to=core.models.product_image_file_path),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='image_webp',
+            field=models.ImageField(editable=False, null=True, upload_to=core.models.product_image_file_path),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.0.10 on 2026-10-17 03:11
+
+from collections import Counter
+
+from django.db import migrations, models
+
+
+def count_existing_files(apps, schema_editor):
+    """Create reference counts for the files rows already point at."""
+    Product = apps.get_model('core', 'Product')
+    Episode = apps.get_model('core', 'Episode')
+    StoredFile = apps.get_model('core', 'StoredFile')
+
+    counts = Counter()
+    for model, fields in [
+        (Product, ['image', 'image_thumbnail', 'image_medium', 'image_webp']),
+        (Episode, ['image']),
+    ]:
+        for names in model.objects.values_list(*fields).iterator():
+            counts.update(filter(None, names))
+
+    StoredFile.objects.bulk_create(
+        [StoredFile(name=name, references=n) for name, n in counts.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_product_image_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('references', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(count_existing_files, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 4.0.10 on 2026-10-17 03:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_product_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductClothingSize',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clothing_size', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='core.clothingsize')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ProductTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='clothing_sizes',
+            field=models.ManyToManyField(blank=True, through='core.ProductClothingSize', to='core.clothingsize'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='tags',
+            field=models.ManyToManyField(blank=True, through='core.ProductTag', to='core.tag'),
+        ),
+        migrations.AddField(
+            model_name='producttag',
+            name='product',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='core.product'),
+        ),
+        migrations.AddField(
+            model_name='producttag',
+            name='tag',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='core.tag'),
+        ),
+        migrations.AddField(
+            model_name='productclothingsize',
+            name='product',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='core.product'),
+        ),
+        migrations.AddIndex(
+            model_name='producttag',
+            index=models.Index(fields=['tag', 'product'], name='core_producttag_tag_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='producttag',
+            constraint=models.UniqueConstraint(fields=('product', 'tag'), name='core_producttag_unique'),
+        ),
+        migrations.AddIndex(
+            model_name='productclothingsize',
+            index=models.Index(fields=['clothing_size', 'product'], name='core_productsize_size_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='productclothingsize',
+            constraint=models.UniqueConstraint(fields=('product', 'clothing_size'), name='core_productclothingsize_unique'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.0.10 on 2026-10-17 03:20
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_names(apps, schema_editor):
+    """Merge each user's tags and clothing sizes that share a name.
+
+    Products assigned any of the duplicates are assigned the oldest one.
+    """
+    for model_name, through_name, field in [
+        ('Tag', 'ProductTag', 'tag'),
+        ('ClothingSize', 'ProductClothingSize', 'clothing_size'),
+    ]:
+        model = apps.get_model('core', model_name)
+        through = apps.get_model('core', through_name)
+        duplicates = model.objects.values('user', 'name').annotate(
+            keep=Min('id'), count=Count('id'),
+        ).filter(count__gt=1)
+
+        for duplicate in duplicates.iterator():
+            group = model.objects.filter(
+                user=duplicate['user'], name=duplicate['name']
+            )
+            assignments = through.objects.filter(**{f'{field}__in': group})
+            products = set(assignments.values_list('product', flat=True))
+            assignments.delete()
+            through.objects.bulk_create([
+                through(product_id=product, **{f'{field}_id': duplicate['keep']})
+                for product in products
+            ])
+            group.exclude(id=duplicate['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_product_tags_clothing_sizes'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_names, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='clothingsize',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='core_clothingsize_unique_user_name'),
+        ),
+        migrations.AddConstraint(
+            model_name='tag',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='core_tag_unique_user_name'),
+        ),
+    ]
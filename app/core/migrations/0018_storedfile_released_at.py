@@ -0,0 +1,18 @@
+# Generated by Django 4.0.10 on 2026-10-17 04:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_unique_tag_clothing_size_names'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='storedfile',
+            name='released_at',
+            field=models.DateTimeField(db_index=True, null=True),
+        ),
+    ]
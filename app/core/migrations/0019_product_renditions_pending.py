@@ -0,0 +1,40 @@
+# Generated by Django 4.0.10 on 2026-10-17 04:53
+
+from django.db import migrations, models
+
+
+def mark_pending_renditions(apps, schema_editor):
+    """Mark the images that have no renditions yet as pending."""
+    Product = apps.get_model('core', 'Product')
+    Product.objects.exclude(
+        models.Q(image__isnull=True) | models.Q(image='')
+    ).filter(
+        models.Q(image_thumbnail__isnull=True) | models.Q(image_thumbnail='')
+    ).update(renditions_pending=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_storedfile_released_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rendition_failures',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='renditions_pending',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(
+            mark_pending_renditions, migrations.RunPython.noop
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('renditions_pending', True)), fields=['updated_at'], name='core_product_renditions_idx'),
+        ),
+    ]
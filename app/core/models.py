@@ -5,6 +5,8 @@ import os
 import uuid
 
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.contrib.auth.models import (
     AbstractBaseUser,
@@ -12,6 +14,8 @@ from django.contrib.auth.models import (
     PermissionsMixin,
 )
 
+from core import hashing
+
 
 def product_image_file_path(instance, filename):
     """Generate file path for new product image."""
@@ -52,6 +56,20 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     USERNAME_FIELD = 'email'
 
+    def set_password(self, raw_password):
+        """Set the password hash, hashing off-thread."""
+        self.password = hashing.make_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        """Return whether raw_password is correct, hashing off-thread."""
+        def setter(raw_password):
+            self.set_password(raw_password)
+            self._password = None
+            self.save(update_fields=['password'])
+
+        return hashing.check_password(raw_password, self.password, setter)
+
 
 class Product(models.Model):
     """Product objects."""
@@ -65,12 +83,59 @@ class Product(models.Model):
     # price = models.DecimalField(max_digits=5, decimal_places=2)
     youtube = models.TextField(blank=True)
     spotify = models.TextField(blank=True)
-    # tags = models.ManyToManyField('Tag')
-    # clothing_sizes = models.ManyToManyField('ClothingSize')
+    tags = models.ManyToManyField('Tag', through='ProductTag', blank=True)
+    clothing_sizes = models.ManyToManyField(
+        'ClothingSize',
+        through='ProductClothingSize',
+        blank=True,
+    )
     image = models.ImageField(null=True, upload_to=product_image_file_path)
+    # Derived from image by the background rendition workers.
+    image_thumbnail = models.ImageField(
+        null=True,
+        editable=False,
+        upload_to=product_image_file_path,
+    )
+    image_medium = models.ImageField(
+        null=True,
+        editable=False,
+        upload_to=product_image_file_path,
+    )
+    image_webp = models.ImageField(
+        null=True,
+        editable=False,
+        upload_to=product_image_file_path,
+    )
+    # Whether the renditions of image are still to be generated, and how
+    # many attempts to generate them have failed.
+    renditions_pending = models.BooleanField(default=False, editable=False)
+    rendition_failures = models.PositiveSmallIntegerField(
+        default=0, editable=False
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Weighted title and description, maintained by a database trigger.
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         verbose_name = "Episode"
+        indexes = [
+            # Backs the keyset pagination of the product list.
+            models.Index(
+                fields=['-created_at', '-id'],
+                name='core_product_created_id_idx',
+            ),
+            GinIndex(
+                fields=['search_vector'],
+                name='core_product_search_idx',
+            ),
+            # Finds the images left without renditions.
+            models.Index(
+                fields=['updated_at'],
+                name='core_product_renditions_idx',
+                condition=models.Q(renditions_pending=True),
+            ),
+        ]
 
     def __str__(self):
         """Returns the string representation of the object (product title)."""
@@ -85,6 +150,15 @@ class Tag(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        constraints = [
+            # Lets names be created in bulk, ignoring existing ones.
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='core_tag_unique_user_name',
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -97,10 +171,75 @@ class ClothingSize(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        constraints = [
+            # Lets names be created in bulk, ignoring existing ones.
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='core_clothingsize_unique_user_name',
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
 
+class ProductTag(models.Model):
+    """A tag assigned to a product."""
+    # The unique constraint indexes (product, tag) for prefetching a page's
+    # tags and Meta.indexes adds (tag, product) for filtering by tag, so
+    # the single column foreign key indexes would be redundant.
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        db_index=False,
+    )
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, db_index=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['product', 'tag'],
+                name='core_producttag_unique',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['tag', 'product'],
+                name='core_producttag_tag_idx',
+            ),
+        ]
+
+
+class ProductClothingSize(models.Model):
+    """A clothing size a product is available in."""
+    # Indexed like ProductTag.
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        db_index=False,
+    )
+    clothing_size = models.ForeignKey(
+        ClothingSize,
+        on_delete=models.CASCADE,
+        db_index=False,
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['product', 'clothing_size'],
+                name='core_productclothingsize_unique',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['clothing_size', 'product'],
+                name='core_productsize_size_idx',
+            ),
+        ]
+
+
 class Episode(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -114,3 +253,15 @@ class Episode(models.Model):
 
     def __str__(self):
         return self.title
+
+
+class StoredFile(models.Model):
+    """Reference count of a file in the content addressed storage."""
+    name = models.CharField(max_length=255, unique=True)
+    references = models.IntegerField(default=0)
+    # When the last reference was dropped, or the file was saved again
+    # while unreferenced; the file is deleted a grace period later.
+    released_at = models.DateTimeField(null=True, db_index=True)
+
+    def __str__(self):
+        return self.name
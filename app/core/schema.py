@@ -0,0 +1,180 @@
+"""
+Prebuilt OpenAPI schema.
+
+Generating the schema introspects every view and serializer, so it is
+built once per code version by the `build_schema` command at deploy,
+stored on disk and served from there instead of on each request.
+"""
+import functools
+import hashlib
+import logging
+import os
+import threading
+from importlib import metadata
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.views import SCHEMA_KWARGS, SpectacularAPIView
+
+logger = logging.getLogger(__name__)
+
+RENDERERS = {'yaml': OpenApiYamlRenderer, 'json': OpenApiJsonRenderer}
+VERSION_FILE = 'VERSION'
+# Installed packages whose upgrade changes the generated schema.
+PACKAGES = ['django', 'djangorestframework', 'drf-spectacular']
+
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+
+def code_version():
+    """Return the version of the code the schema is generated from.
+
+    Unless CODE_VERSION is set, this is a digest of the project's Python
+    sources and the versions of the packages the schema depends on.
+    """
+    return settings.CODE_VERSION or _source_digest()
+
+
+@functools.lru_cache(maxsize=None)
+def _source_digest():
+    digest = hashlib.sha256()
+    base_dir = Path(settings.BASE_DIR)
+    for path in sorted(base_dir.rglob('*.py')):
+        digest.update(str(path.relative_to(base_dir)).encode())
+        digest.update(path.read_bytes())
+    for package in PACKAGES:
+        digest.update(f'{package}=={metadata.version(package)}'.encode())
+
+    return digest.hexdigest()[:16]
+
+
+def generate():
+    """Return the schema rendered in each format as {format: bytes}."""
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    schema = generator.get_schema(
+        request=None, public=spectacular_settings.SERVE_PUBLIC
+    )
+    return {
+        schema_format: renderer().render(schema, renderer_context={})
+        for schema_format, renderer in RENDERERS.items()
+    }
+
+
+def _path(name):
+    return os.path.join(settings.SCHEMA_ROOT, name)
+
+
+def _write(name, content):
+    """Write content to a schema file, replacing it atomically."""
+    tmp = _path(f'.{name}.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(content)
+    os.replace(tmp, _path(name))
+
+
+def stored_version():
+    """Return the code version of the stored schema, if any."""
+    try:
+        with open(_path(VERSION_FILE)) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def build(force=False):
+    """Store the schema of the current code version.
+
+    Returns whether the schema was written; an up to date schema is kept
+    unless force is set.
+    """
+    version = code_version()
+    if not force and stored_version() == version:
+        return False
+
+    os.makedirs(settings.SCHEMA_ROOT, exist_ok=True)
+    for schema_format, content in generate().items():
+        _write(f'openapi.{schema_format}', content)
+    # Written last, so a partial build is never taken as current.
+    _write(VERSION_FILE, f'{version}\n'.encode())
+    return True
+
+
+def _load(version):
+    """Return the stored schema of version, or None when stale."""
+    if stored_version() != version:
+        return None
+
+    schemas = {}
+    try:
+        for schema_format in RENDERERS:
+            with open(_path(f'openapi.{schema_format}'), 'rb') as f:
+                schemas[schema_format] = f.read()
+    except FileNotFoundError:
+        return None
+
+    return schemas
+
+
+def get_schemas():
+    """Return the schema of the current code version in each format.
+
+    The stored schema is read once per process. When it is missing or
+    was built from other code, the schema is generated in process.
+    """
+    version = code_version()
+    with _loaded_lock:
+        if version not in _loaded:
+            schemas = _load(version)
+            if schemas is None:
+                logger.warning(
+                    'No stored OpenAPI schema for code version %s, '
+                    'generating it; run build_schema at deploy.', version
+                )
+                schemas = generate()
+            _loaded.clear()
+            _loaded[version] = schemas
+
+        return version, _loaded[version]
+
+
+class PrebuiltSchemaView(SpectacularAPIView):
+    """Serve the prebuilt schema, with an ETag of its code version.
+
+    Requests for a language or API version other than the default are
+    still generated on demand.
+    """
+
+    @extend_schema(**SCHEMA_KWARGS)
+    def get(self, request, *args, **kwargs):
+        if request.GET.get('lang') or request.GET.get('version'):
+            return super().get(request, *args, **kwargs)
+
+        renderer = request.accepted_renderer
+        version, schemas = get_schemas()
+        etag = quote_etag(f'{version}-{renderer.format}')
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            content_type = renderer.media_type
+            if renderer.charset:
+                content_type += f'; charset={renderer.charset}'
+            response = HttpResponse(
+                schemas[renderer.format], content_type=content_type
+            )
+            response['Content-Disposition'] = (
+                'inline; filename="'
+                f'{spectacular_settings.TITLE or "schema"}.{renderer.format}"'
+            )
+
+        response['ETag'] = etag
+        patch_cache_control(
+            response, public=True, max_age=settings.SCHEMA_CACHE_MAX_AGE
+        )
+        return response
@@ -0,0 +1,60 @@
+"""
+Signal handlers for the core app.
+"""
+from collections import Counter
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core import storage
+from core.models import Episode, Product
+
+# File fields whose files are shared through the content addressed storage.
+STORED_FILE_FIELDS = {
+    Product: ['image', 'image_thumbnail', 'image_medium', 'image_webp'],
+    Episode: ['image'],
+}
+
+
+def _stored_files(instance):
+    """Return the names of the stored files instance points at."""
+    fields = STORED_FILE_FIELDS[type(instance)]
+    return [getattr(instance, field).name for field in fields]
+
+
+@receiver(pre_save, sender=Product)
+@receiver(pre_save, sender=Episode)
+def remember_stored_files(sender, instance, update_fields=None, **kwargs):
+    """Record the files an instance pointed at before it is saved."""
+    fields = STORED_FILE_FIELDS[sender]
+    if update_fields is not None and not set(fields) & set(update_fields):
+        instance._stored_files_before = None
+        return
+
+    previous = None
+    if instance.pk is not None:
+        previous = sender.objects.filter(pk=instance.pk).values_list(
+            *fields
+        ).first()
+    instance._stored_files_before = list(previous or [])
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Episode)
+def count_stored_files(sender, instance, **kwargs):
+    """Move file references from the old files to the new ones."""
+    before = getattr(instance, '_stored_files_before', None)
+    if before is None:
+        return
+
+    before = Counter(filter(None, before))
+    after = Counter(filter(None, _stored_files(instance)))
+    storage.acquire((after - before).elements())
+    storage.release((before - after).elements())
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Episode)
+def release_stored_files(sender, instance, **kwargs):
+    """Drop the file references of a deleted instance."""
+    storage.release(_stored_files(instance))
@@ -0,0 +1,63 @@
+"""
+Static files storage writing precompressed copies.
+
+collectstatic stores a gzip (and, with brotli installed, a brotli) copy
+next to each compressible file, e.g. `app.js.gz` and `app.js.br`, so the
+proxy can send them without compressing on every request.
+"""
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import StaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = {
+    '.css', '.html', '.ico', '.js', '.json', '.map', '.svg', '.txt',
+    '.xml', '.eot', '.otf', '.ttf',
+}
+
+
+def compressors():
+    """Return the (suffix, compress) pairs to apply to static files."""
+    pairs = [('.gz', lambda data: gzip.compress(data, 9, mtime=0))]
+    if brotli is not None:
+        pairs.append(('.br', lambda data: brotli.compress(data, quality=11)))
+
+    return pairs
+
+
+class CompressedStaticFilesStorage(StaticFilesStorage):
+    """Static files storage adding .gz and .br siblings of text files.
+
+    Files smaller than `min_size` bytes, and copies that would not be
+    smaller than the original, are skipped.
+    """
+    min_size = 256
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            return
+
+        for name in paths:
+            ext = os.path.splitext(name)[1].lower()
+            if ext not in COMPRESSIBLE_EXTENSIONS:
+                continue
+
+            with self.open(name) as f:
+                content = f.read()
+            if len(content) < self.min_size:
+                continue
+
+            for suffix, compress in compressors():
+                compressed = compress(content)
+                if len(compressed) < len(content):
+                    # Replace stale copies rather than getting a new name.
+                    self.delete(name + suffix)
+                    self.save(name + suffix, ContentFile(compressed))
+
+            yield name, name, True
@@ -0,0 +1,150 @@
+"""
+Content addressed file storage.
+
+Every stored file is named after the SHA-256 of its bytes, so identical
+uploads are kept once and a name never changes content, which lets the
+proxy serve them with far-future cache headers. Files are shared between
+rows, so they are reference counted in StoredFile and only deleted once
+nothing has pointed at them for STORED_FILE_GRACE seconds.
+
+The grace period covers the time between saving a file and the row that
+points at it taking its reference: saving content that is already stored
+restarts it, and files are only deleted under the lock of their StoredFile
+row, which save() takes too.
+"""
+import hashlib
+import os
+import tempfile
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.models import StoredFile
+
+CONTENT_DIR = 'uploads/cas'
+# Most files deleted by one collect() call.
+COLLECT_BATCH_SIZE = 100
+
+
+def content_name(digest, ext):
+    """Return the storage name of content with the given digest."""
+    return f'{CONTENT_DIR}/{digest[:2]}/{digest}{ext.lower()}'
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage naming files after the hash of their content.
+
+    Content may carry a precomputed `sha256` hex digest (e.g. hashed while
+    it was streamed in) to avoid reading it twice.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # A name identifies its content, so an existing file is a duplicate.
+        return name
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+
+        digest = getattr(content, 'sha256', None)
+        if digest is None:
+            hasher = hashlib.sha256()
+            for chunk in content.chunks():
+                hasher.update(chunk)
+            digest = hasher.hexdigest()
+            content.seek(0)
+
+        name = content_name(digest, os.path.splitext(name)[1])
+        # Restarts the grace period of an unreferenced file, waiting for a
+        # collect() that is deleting it to finish first.
+        StoredFile.objects.filter(
+            name=name, references__lte=0
+        ).update(released_at=timezone.now())
+        if self.exists(name):
+            if hasattr(content, 'temporary_file_path'):
+                os.remove(content.temporary_file_path())
+            return name
+
+        return super().save(name, content, max_length=max_length)
+
+    def _save(self, name, content):
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+
+        # Write beside the target and rename, so a file is never seen half
+        # written and concurrent saves of the same content are harmless.
+        if hasattr(content, 'temporary_file_path'):
+            file_move_safe(
+                content.temporary_file_path(), full_path, allow_overwrite=True
+            )
+        else:
+            fd, tmp_path = tempfile.mkstemp(dir=directory)
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in content.chunks():
+                    f.write(chunk)
+            os.replace(tmp_path, full_path)
+
+        if self.file_permissions_mode is not None:
+            os.chmod(full_path, self.file_permissions_mode)
+
+        return name
+
+
+def acquire(names):
+    """Add a reference to each stored file in names."""
+    for name, count in Counter(filter(None, names)).items():
+        updated = StoredFile.objects.filter(name=name).update(
+            references=F('references') + count
+        )
+        if updated:
+            continue
+        try:
+            with transaction.atomic():
+                StoredFile.objects.create(name=name, references=count)
+        except IntegrityError:
+            StoredFile.objects.filter(name=name).update(
+                references=F('references') + count
+            )
+
+
+def release(names):
+    """Drop a reference to each stored file in names.
+
+    Files left without references are deleted by a later collect().
+    """
+    names = list(filter(None, names))
+    for name, count in Counter(names).items():
+        StoredFile.objects.filter(name=name).update(
+            references=F('references') - count,
+            released_at=timezone.now(),
+        )
+
+    if names:
+        transaction.on_commit(collect)
+
+
+def collect():
+    """Delete the stored files unreferenced for the whole grace period."""
+    cutoff = timezone.now() - timedelta(seconds=settings.STORED_FILE_GRACE)
+    with transaction.atomic():
+        names = list(
+            StoredFile.objects.select_for_update(skip_locked=True).filter(
+                Q(released_at__isnull=True) | Q(released_at__lte=cutoff),
+                references__lte=0,
+            ).values_list('name', flat=True)[:COLLECT_BATCH_SIZE]
+        )
+        # Delete under the row locks, so a concurrent save() of the same
+        # content waits and then writes the file again.
+        for name in names:
+            default_storage.delete(name)
+        StoredFile.objects.filter(name__in=names).delete()
@@ -2,34 +2,498 @@
 """
 Test custom Django management commands.
 """
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
 from unittest.mock import patch
 
 from psycopg2 import OperationalError as Psycopg2OpError
 
-from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import (
+    LiveServerTestCase,
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
+from core.management.commands import importtime, wait_for_db
+from core.models import Product
+from product import tasks
 
-@patch('core.management.commands.wait_for_db.Command.check')
+
+@patch('core.management.commands.wait_for_db.probe')
 class CommandTests(SimpleTestCase):
     """Test commands."""
 
-    def test_wait_for_db_ready(self, patched_check):
+    def test_wait_for_db_ready(self, patched_probe):
         """Test waiting for database if database ready."""
-        patched_check.return_value = True
-
         call_command('wait_for_db')
 
-        patched_check.assert_called_once_with(databases=['default'])
+        patched_probe.assert_called_once_with('default', 2)
 
     @patch('time.sleep')
-    def test_wait_for_db_delay(self, patched_sleep, patched_check):
+    def test_wait_for_db_delay(self, patched_sleep, patched_probe):
         """Test waiting for database when getting OperationalError."""
-        patched_check.side_effect = [Psycopg2OpError] * 2 + \
-            [OperationalError] * 3 + [True]
+        patched_probe.side_effect = [Psycopg2OpError] * 2 + \
+            [OperationalError] * 3 + [None]
 
         call_command('wait_for_db')
 
-        self.assertEqual(patched_check.call_count, 6)
-        patched_check.assert_called_with(databases=['default'])
+        self.assertEqual(patched_probe.call_count, 6)
+        patched_probe.assert_called_with('default', 2)
+
+    @patch('time.sleep')
+    def test_wait_for_db_backoff(self, patched_sleep, patched_probe):
+        """Test retries back off exponentially, with jitter, to a cap."""
+        patched_probe.side_effect = [OperationalError] * 6 + [None]
+
+        call_command('wait_for_db', initial_delay=0.5, max_delay=4)
+
+        delays = [c.args[0] for c in patched_sleep.call_args_list]
+        for delay, cap in zip(delays, [0.5, 1, 2, 4, 4, 4]):
+            self.assertGreaterEqual(delay, cap / 2)
+            self.assertLessEqual(delay, cap)
+
+    @patch('time.sleep')
+    @patch('time.monotonic')
+    def test_wait_for_db_timeout(
+        self, patched_monotonic, patched_sleep, patched_probe
+    ):
+        """Test the command fails once the deadline has passed."""
+        patched_monotonic.side_effect = [0, 3, 9, 11]
+        patched_probe.side_effect = OperationalError('refused')
+
+        with self.assertRaisesMessage(CommandError, 'after 10 seconds'):
+            call_command(
+                'wait_for_db', timeout=10, initial_delay=5, max_delay=5
+            )
+
+        self.assertEqual(patched_probe.call_count, 3)
+        # The last wait is cut short at the deadline.
+        self.assertEqual(patched_sleep.call_args_list[-1].args[0], 1)
+
+
+class WaitForDbProbeTests(TestCase):
+    """Tests for the wait_for_db probe."""
+
+    def test_probe(self):
+        """Test the probe connects to the database with a timeout."""
+        connection = connections['default']
+        with patch.object(
+            connection, 'get_new_connection',
+            wraps=connection.get_new_connection,
+        ) as patched_connect:
+            wait_for_db.probe('default', 3)
+
+        params = patched_connect.call_args.args[0]
+        self.assertEqual(params['connect_timeout'], 3)
+
+    def test_probe_unavailable(self):
+        """Test the probe raises when the database cannot be reached."""
+        connection = connections['default']
+        params = {**connection.get_connection_params(), 'port': 1}
+        with patch.object(
+            connection, 'get_connection_params', return_value=params
+        ):
+            with self.assertRaises(Psycopg2OpError):
+                wait_for_db.probe('default', 2)
+
+
+class BenchmarkCommandTests(TestCase):
+    """Test the benchmark command."""
+
+    def _benchmark(self, *args, **options):
+        """Run the benchmark at a tiny scale and return its results."""
+        out = StringIO()
+        call_command(
+            'benchmark', *args, users=2, products=5, iterations=2, warmup=0,
+            stdout=out, **options,
+        )
+        return json.loads(out.getvalue())
+
+    def test_benchmark_reports_every_scenario(self):
+        """Test each scenario is measured and the data rolled back."""
+        report = self._benchmark()
+
+        self.assertEqual(set(report['results']), {
+            'product-list', 'product-list-uncached', 'product-search',
+            'product-detail', 'product-create', 'product-upload-image',
+            'user-token', 'user-me', 'serializer-product-list',
+            'serializer-product-list-rows', 'serializer-product-detail',
+        })
+        for result in report['results'].values():
+            self.assertEqual(result['iterations'], 2)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+        self.assertEqual(report['parameters']['products'], 5)
+        self.assertFalse(Product.objects.exists())
+        self.assertFalse(get_user_model().objects.exists())
+
+    def test_benchmark_selected_scenarios(self):
+        """Test only the requested scenarios are run."""
+        report = self._benchmark('--scenario', 'user-me')
+
+        self.assertEqual(list(report['results']), ['user-me'])
+
+    def test_benchmark_unknown_scenario(self):
+        """Test an unknown scenario name is rejected."""
+        with self.assertRaises(CommandError):
+            self._benchmark('--scenario', 'missing')
+
+
+class BuildSchemaCommandTests(SimpleTestCase):
+    """Tests for the build_schema command."""
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        settings = override_settings(SCHEMA_ROOT=root.name, CODE_VERSION='v1')
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def build_schema(self, *args):
+        """Run build_schema, returning its output."""
+        out = StringIO()
+        call_command('build_schema', *args, stdout=out)
+        return out.getvalue()
+
+    def test_build_schema(self):
+        """Test the schema is built once per code version."""
+        self.assertIn('Built', self.build_schema())
+        self.assertIn('up to date', self.build_schema())
+        self.assertIn('Built', self.build_schema('--force'))
+
+
+class BenchmarkSlowClientsCommandTests(LiveServerTestCase):
+    """Tests for the benchmark_slow_clients command."""
+
+    def test_benchmark_slow_clients(self):
+        """Test requests are measured alongside slow clients."""
+        out = StringIO()
+        url = f'{self.live_server_url}/api/product/product/'
+
+        call_command(
+            'benchmark_slow_clients', targets=[f'live={url}'],
+            slow_clients=2, interval=0.1, requests=3, concurrency=2,
+            stdout=out,
+        )
+
+        result = json.loads(out.getvalue())['results']['live']
+        self.assertEqual(result['responses'], {'200': 3})
+        self.assertEqual(result['latency']['iterations'], 3)
+
+    def test_invalid_target(self):
+        """Test targets must be named http URLs."""
+        with self.assertRaises(CommandError):
+            call_command(
+                'benchmark_slow_clients', targets=['https://example.com/']
+            )
+
+
+@override_settings(
+    SERVER_WORKERS=0,
+    SERVER_WORKERS_PER_CPU=2,
+    SERVER_MAX_WORKERS=64,
+    SERVER_THREADS=4,
+    SERVER_MAX_REQUESTS=5000,
+    SERVER_MAX_WORKER_LIFETIME=3600,
+    SERVER_HARAKIRI=30,
+    SERVER_LISTEN=1024,
+    SERVER_CHEAPER=True,
+    SERVER_PRELOAD=True,
+)
+@patch(
+    'core.management.commands.uwsgi_config.max_listen', return_value=4096
+)
+class UwsgiConfigCommandTests(SimpleTestCase):
+    """Tests for the uwsgi_config command."""
+
+    def uwsgi_config(self, *args):
+        """Run uwsgi_config, returning its options as a dict."""
+        out = StringIO()
+        call_command('uwsgi_config', *args, stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0], '[uwsgi]')
+        return dict(line.split(' = ', 1) for line in lines[1:])
+
+    def test_sized_to_cpus(self, patched_max_listen):
+        """Test workers, recycling and spawning follow the CPU count."""
+        config = self.uwsgi_config('--cpus', '8')
+
+        self.assertEqual(config['processes'], '16')
+        self.assertEqual(config['threads'], '4')
+        self.assertEqual(config['cheaper'], '4')
+        self.assertEqual(config['max-requests'], '5000')
+        self.assertEqual(config['max-requests-delta'], '31')
+        self.assertEqual(config['harakiri'], '30')
+        self.assertEqual(config['listen'], '1024')
+        self.assertEqual(config['lazy-apps'], 'false')
+        self.assertEqual(config['thunder-lock'], 'true')
+
+    def test_single_cpu(self, patched_max_listen):
+        """Test a single CPU host still gets a spare worker."""
+        config = self.uwsgi_config('--cpus', '1')
+
+        self.assertEqual(config['processes'], '2')
+        self.assertEqual(config['cheaper'], '1')
+
+    @override_settings(
+        SERVER_WORKERS=1, SERVER_THREADS=1, SERVER_CHEAPER=True,
+        SERVER_MAX_REQUESTS=0, SERVER_HARAKIRI=0, SERVER_PRELOAD=False,
+    )
+    def test_explicit_settings(self, patched_max_listen):
+        """Test explicit settings override sizing and disable options."""
+        config = self.uwsgi_config('--cpus', '8')
+
+        self.assertEqual(config['processes'], '1')
+        self.assertEqual(config['lazy-apps'], 'true')
+        for option in [
+            'threads', 'cheaper', 'thunder-lock', 'max-requests', 'harakiri',
+        ]:
+            self.assertNotIn(option, config)
+
+    def test_workers_only(self, patched_max_listen):
+        """Test --workers prints the worker count the ASGI server uses."""
+        out = StringIO()
+        call_command('uwsgi_config', '--cpus', '3', '--workers', stdout=out)
+
+        self.assertEqual(out.getvalue(), '6\n')
+
+    @override_settings(SERVER_MAX_WORKERS=10)
+    def test_max_workers_and_listen_limit(self, patched_max_listen):
+        """Test workers are capped and the backlog fits the kernel limit."""
+        patched_max_listen.return_value = 128
+
+        config = self.uwsgi_config('--cpus', '32')
+
+        self.assertEqual(config['processes'], '10')
+        self.assertEqual(config['listen'], '128')
+
+    def test_cgroup_quota(self, patched_max_listen):
+        """Test the available CPUs are limited by the cgroup CPU quota."""
+        with tempfile.NamedTemporaryFile('w') as cpu_max, \
+                patch('core.utils.CGROUP_V2_CPU_MAX', cpu_max.name), \
+                patch('os.sched_getaffinity', return_value=set(range(8))):
+            cpu_max.write('150000 100000\n')
+            cpu_max.flush()
+            config = self.uwsgi_config()
+            self.assertEqual(config['processes'], '4')
+
+            cpu_max.seek(0)
+            cpu_max.write('max 100000\n')
+            cpu_max.truncate()
+            cpu_max.flush()
+            config = self.uwsgi_config()
+            self.assertEqual(config['processes'], '16')
+
+
+class ImportTimeCommandTests(SimpleTestCase):
+    """Tests for the importtime command."""
+
+    def test_parse_importtime(self):
+        """Test -X importtime output is parsed and summarized."""
+        output = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       100 |        100 |     PIL._version\n'
+            'import time:      2000 |       2100 |   PIL\n'
+            'import time:       500 |       2600 | product.uploads\n'
+        )
+
+        imports = importtime.parse_importtime(output)
+        result = importtime.report(imports, limit=2)
+
+        self.assertEqual(imports[0], ('PIL._version', 100, 100, 2))
+        self.assertEqual(imports[2], ('product.uploads', 500, 2600, 0))
+        self.assertEqual(result['import_ms'], 2.6)
+        self.assertEqual(
+            [m['module'] for m in result['modules']],
+            ['product.uploads', 'PIL'],
+        )
+        self.assertEqual(
+            result['packages'],
+            [
+                {'package': 'PIL', 'self_ms': 2.1},
+                {'package': 'product', 'self_ms': 0.5},
+            ],
+        )
+
+    def test_importtime(self):
+        """Test startup imports are reported, without the deferred ones."""
+        out = StringIO()
+
+        call_command('importtime', '--limit', '1000', stdout=out)
+
+        result = json.loads(out.getvalue())
+        self.assertEqual(result['module'], 'app.wsgi')
+        self.assertGreater(result['startup_ms'], 0)
+        packages = [p['package'] for p in result['packages']]
+        modules = [m['module'] for m in result['modules']]
+        self.assertIn('django', packages)
+        self.assertIn('product.views', modules)
+        for package in ('PIL', 'brotli', 'multiprocessing'):
+            self.assertNotIn(package, packages)
+        for module in ('drf_spectacular.views', 'drf_spectacular.openapi'):
+            self.assertNotIn(module, modules)
+
+
+class PrepareDeployCommandTests(TestCase):
+    """Tests for the prepare_deploy command."""
+
+    def setUp(self):
+        self.source = tempfile.TemporaryDirectory()
+        self.addCleanup(self.source.cleanup)
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.static_root = os.path.join(root.name, 'static')
+        settings = override_settings(
+            STATIC_ROOT=self.static_root,
+            STATICFILES_DIRS=[self.source.name],
+            STATICFILES_FINDERS=[
+                'django.contrib.staticfiles.finders.FileSystemFinder',
+            ],
+            STATICFILES_STORAGE=(
+                'django.contrib.staticfiles.storage.StaticFilesStorage'
+            ),
+            SCHEMA_ROOT=os.path.join(root.name, 'schema'),
+            CODE_VERSION='v1',
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.write_static('app.css', 'body { margin: 0; }')
+
+    def write_static(self, name, content):
+        """Write a static source file."""
+        with open(os.path.join(self.source.name, name), 'w') as f:
+            f.write(content)
+
+    def prepare_deploy(self):
+        """Run prepare_deploy, returning its output."""
+        out = StringIO()
+        call_command('prepare_deploy', stdout=out)
+        return out.getvalue()
+
+    def test_unchanged_steps_skipped(self):
+        """Test steps with nothing to do are skipped on the next run."""
+        output = self.prepare_deploy()
+        self.assertIn('1 static file copied', output)
+        self.assertIn('Built', output)
+        self.assertIn('Migrations are up to date.', output)
+        self.assertTrue(
+            os.path.exists(os.path.join(self.static_root, 'app.css'))
+        )
+
+        output = self.prepare_deploy()
+        self.assertIn('Static files are up to date.', output)
+        self.assertIn('up to date', output.splitlines()[1])
+
+    def test_changed_static_files_collected(self):
+        """Test static files are collected again when a source changes."""
+        self.prepare_deploy()
+        self.write_static('app.css', 'body { padding: 0; }')
+
+        output = self.prepare_deploy()
+
+        self.assertIn('1 static file copied', output)
+        with open(os.path.join(self.static_root, 'app.css')) as f:
+            self.assertEqual(f.read(), 'body { padding: 0; }')
+
+    def test_pending_migrations_applied(self):
+        """Test migrate runs when migrations are pending."""
+        with patch(
+            'core.management.commands.prepare_deploy.pending_migrations',
+            return_value=[('migration', False)],
+        ):
+            output = self.prepare_deploy()
+
+        self.assertIn('Running migrations', output)
+
+
+@patch('product.tasks.generate_renditions')
+class GenerateRenditionsCommandTests(TestCase):
+    """Tests for the generate_renditions command."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123'
+        )
+
+    def create_product(self, minutes_ago, **params):
+        """Create a product last updated the given minutes ago."""
+        product = Product.objects.create(
+            user=self.user, title='Product', **params
+        )
+        Product.objects.filter(pk=product.pk).update(
+            updated_at=timezone.now() - timedelta(minutes=minutes_ago)
+        )
+        return product
+
+    def generate_renditions(self):
+        """Run generate_renditions, returning its report."""
+        out = StringIO()
+        call_command('generate_renditions', stdout=out)
+        return json.loads(out.getvalue())
+
+    def test_missing_renditions_generated(self, patched_generate):
+        """Test only images left without renditions are rendered."""
+        missing = self.create_product(
+            10, image='a.jpg', renditions_pending=True
+        )
+        self.create_product(1, image='b.jpg', renditions_pending=True)
+        self.create_product(10, image='c.jpg', image_thumbnail='c-t.jpg')
+        self.create_product(10)
+
+        report = self.generate_renditions()
+
+        self.assertEqual(report, {'generated': 1, 'failed': 0})
+        patched_generate.assert_called_once_with(missing.id)
+
+    def test_failures_reported(self, patched_generate):
+        """Test a failing product does not stop the others."""
+        first = self.create_product(10, image='a.jpg', renditions_pending=True)
+        second = self.create_product(
+            10, image='b.jpg', renditions_pending=True
+        )
+        patched_generate.side_effect = [OSError, None]
+
+        report = self.generate_renditions()
+
+        self.assertEqual(report, {'generated': 1, 'failed': 1})
+        self.assertEqual(
+            [c.args for c in patched_generate.call_args_list],
+            [(first.id,), (second.id,)],
+        )
+
+    @override_settings(PRODUCT_IMAGE_MAX_FAILURES=2)
+    def test_failing_images_given_up(self, patched_generate):
+        """Test images that failed too often are no longer rendered."""
+        self.create_product(
+            10, image='a.jpg', renditions_pending=True, rendition_failures=2
+        )
+        retried = self.create_product(
+            10, image='b.jpg', renditions_pending=True, rendition_failures=1
+        )
+
+        report = self.generate_renditions()
+
+        self.assertEqual(report, {'generated': 1, 'failed': 0})
+        patched_generate.assert_called_once_with(retried.id)
+
+    def test_missing_renditions_use_index(self, patched_generate):
+        """Test pending images are found through their partial index."""
+        with CaptureQueriesContext(connection) as ctx:
+            tasks.missing_renditions(300)
+        [query] = ctx.captured_queries
+
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f'EXPLAIN {query["sql"]}')
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+
+        self.assertIn('core_product_renditions_idx', plan)
@@ -0,0 +1,223 @@
+"""
+Tests for response compression and precompressed static files.
+"""
+import gzip
+import os
+import tempfile
+from unittest import skipUnless
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.files.base import ContentFile
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core import middleware
+from core.middleware import CompressionMiddleware, accepted_encodings
+from core.staticfiles import CompressedStaticFilesStorage
+
+BODY = b'{"title": "Sample product"}' * 100
+
+
+def respond(content=BODY, content_type='application/json', **headers):
+    """Return a view returning content with the given headers."""
+    def view(request):
+        response = HttpResponse(content, content_type=content_type)
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    return view
+
+
+@override_settings(
+    RESPONSE_COMPRESSION=True,
+    RESPONSE_COMPRESSION_MIN_SIZE=1024,
+    RESPONSE_COMPRESSION_AUTHENTICATED=False,
+)
+class CompressionMiddlewareTests(SimpleTestCase):
+    """Tests for CompressionMiddleware."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def get(self, view, **extra):
+        """Return the response of the middleware around view."""
+        request = self.factory.get('/api/product/products/', **extra)
+        return CompressionMiddleware(view)(request)
+
+    def test_gzip(self):
+        """Test responses are gzipped for clients accepting only gzip."""
+        res = self.get(respond(), HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(res['Vary'], 'Accept-Encoding')
+        self.assertEqual(res['Content-Length'], str(len(res.content)))
+        self.assertEqual(gzip.decompress(res.content), BODY)
+
+    @skipUnless(middleware.get_brotli(), 'brotli is not installed')
+    def test_brotli(self):
+        """Test brotli is preferred when the client accepts it."""
+        res = self.get(respond(), HTTP_ACCEPT_ENCODING='gzip, br')
+
+        self.assertEqual(res['Content-Encoding'], 'br')
+        self.assertEqual(
+            middleware.get_brotli().decompress(res.content), BODY
+        )
+
+    def test_rejected_encoding(self):
+        """Test encodings with a zero quality are not used."""
+        res = self.get(respond(), HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+
+        self.assertFalse(res.has_header('Content-Encoding'))
+        self.assertEqual(res['Vary'], 'Accept-Encoding')
+        self.assertEqual(res.content, BODY)
+
+    def test_small_response(self):
+        """Test responses below the size threshold are not compressed."""
+        with override_settings(RESPONSE_COMPRESSION_MIN_SIZE=len(BODY) + 1):
+            res = self.get(respond(), HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertFalse(res.has_header('Content-Encoding'))
+        self.assertFalse(res.has_header('Vary'))
+
+    def test_binary_response(self):
+        """Test responses of non textual types are not compressed."""
+        view = respond(content_type='image/jpeg')
+        res = self.get(view, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertFalse(res.has_header('Content-Encoding'))
+
+    def test_streaming_and_encoded_responses(self):
+        """Test streaming and already encoded responses are left alone."""
+        def stream(request):
+            return StreamingHttpResponse(
+                iter([BODY]), content_type='application/json'
+            )
+
+        res = self.get(stream, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(res.has_header('Content-Encoding'))
+
+        view = respond(**{'Content-Encoding': 'identity'})
+        res = self.get(view, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(res['Content-Encoding'], 'identity')
+        self.assertEqual(res.content, BODY)
+
+    def test_etag_made_weak(self):
+        """Test a strong ETag is made weak when compressing."""
+        res = self.get(respond(ETag='"abc"'), HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(res['ETag'], 'W/"abc"')
+
+    def test_credentials_not_compressed(self):
+        """Test responses to requests with credentials are not compressed."""
+        for extra in [
+            {'HTTP_AUTHORIZATION': 'Token abc'},
+            {'HTTP_COOKIE': 'sessionid=abc'},
+            {'HTTP_COOKIE': 'csrftoken=abc'},
+        ]:
+            with self.subTest(extra=extra):
+                res = self.get(
+                    respond(), HTTP_ACCEPT_ENCODING='gzip', **extra
+                )
+
+                self.assertFalse(res.has_header('Content-Encoding'))
+                self.assertEqual(res['Vary'], 'Accept-Encoding')
+
+    @override_settings(RESPONSE_COMPRESSION_AUTHENTICATED=True)
+    def test_credentials_compressed_when_allowed(self):
+        """Test authenticated responses are compressed when allowed."""
+        res = self.get(
+            respond(),
+            HTTP_ACCEPT_ENCODING='gzip',
+            HTTP_AUTHORIZATION='Token abc',
+        )
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+
+    @override_settings(RESPONSE_COMPRESSION=False)
+    def test_disabled(self):
+        """Test the middleware is skipped when compression is disabled."""
+        with self.assertRaises(MiddlewareNotUsed):
+            CompressionMiddleware(respond())
+
+    def test_accepted_encodings(self):
+        """Test parsing the Accept-Encoding header."""
+        self.assertEqual(
+            accepted_encodings('gzip;q=1.0, BR ; q=0.5, deflate;q=0.000'),
+            {'gzip', 'br'},
+        )
+
+
+class CompressedStaticFilesStorageTests(SimpleTestCase):
+    """Tests for CompressedStaticFilesStorage."""
+
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.root.cleanup)
+        self.storage = CompressedStaticFilesStorage(location=self.root.name)
+
+    def collect(self, files):
+        """Store files and post process them, returning processed names."""
+        for name, content in files.items():
+            self.storage.save(name, ContentFile(content))
+
+        return [
+            name for name, _, processed in
+            self.storage.post_process(dict.fromkeys(files))
+            if processed
+        ]
+
+    def path(self, name):
+        """Return the file system path of a stored name."""
+        return os.path.join(self.root.name, name)
+
+    def test_compressed_siblings(self):
+        """Test text files get compressed siblings next to them."""
+        script = b'function noop() { return null; }\n' * 50
+
+        processed = self.collect({'js/app.js': script})
+
+        self.assertEqual(processed, ['js/app.js'])
+        with open(self.path('js/app.js.gz'), 'rb') as f:
+            self.assertEqual(gzip.decompress(f.read()), script)
+        brotli = middleware.get_brotli()
+        if brotli:
+            with open(self.path('js/app.js.br'), 'rb') as f:
+                content = brotli.decompress(f.read())
+            self.assertEqual(content, script)
+
+    def test_recollect_replaces_siblings(self):
+        """Test collecting again replaces the existing compressed copies."""
+        self.collect({'app.css': b'body { margin: 0; }\n' * 50})
+        self.storage.delete('app.css')
+        stylesheet = b'body { padding: 0; }\n' * 50
+
+        self.collect({'app.css': stylesheet})
+
+        self.assertEqual(
+            sorted(name for name in os.listdir(self.root.name)
+                   if name.startswith('app.css.gz')),
+            ['app.css.gz'],
+        )
+        with open(self.path('app.css.gz'), 'rb') as f:
+            self.assertEqual(gzip.decompress(f.read()), stylesheet)
+
+    def test_skipped_files(self):
+        """Test small and binary files are not compressed."""
+        processed = self.collect({
+            'small.js': b'noop();',
+            'image.png': b'\x89PNG' + b'\x00' * 1024,
+        })
+
+        self.assertEqual(processed, [])
+        self.assertEqual(
+            sorted(os.listdir(self.root.name)), ['image.png', 'small.js']
+        )
+
+    def test_dry_run(self):
+        """Test nothing is written on a dry run."""
+        self.storage.save('app.js', ContentFile(b'noop();\n' * 100))
+
+        list(self.storage.post_process({'app.js': None}, dry_run=True))
+
+        self.assertEqual(os.listdir(self.root.name), ['app.js'])
@@ -0,0 +1,75 @@
+"""
+Tests for database connection reuse.
+"""
+from unittest.mock import patch
+
+from django.core.signals import request_finished, request_started
+from django.db import connection
+from django.test import TransactionTestCase
+
+
+class ConnectionReuseTests(TransactionTestCase):
+    """Tests for persistent, health checked connections."""
+
+    def setUp(self):
+        connection.close()
+
+    def tearDown(self):
+        connection.close()
+
+    def _serve_request(self, queries=1):
+        """Run queries between request signals and return the connection."""
+        request_started.send(sender=self.__class__)
+        try:
+            for _ in range(queries):
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+            return connection.connection
+        finally:
+            request_finished.send(sender=self.__class__)
+
+    @patch.dict(connection.settings_dict, {'CONN_MAX_AGE': 60})
+    def test_connection_reused_across_requests(self):
+        """Test consecutive requests share one connection."""
+        first = self._serve_request()
+        second = self._serve_request()
+
+        self.assertIsNotNone(first)
+        self.assertIs(first, second)
+
+    @patch.dict(connection.settings_dict, {'CONN_MAX_AGE': 0})
+    def test_connection_closed_without_max_age(self):
+        """Test a zero CONN_MAX_AGE opens a connection per request."""
+        first = self._serve_request()
+        second = self._serve_request()
+
+        self.assertIsNot(first, second)
+
+    @patch.dict(
+        connection.settings_dict,
+        {'CONN_MAX_AGE': 60, 'CONN_HEALTH_CHECKS': True},
+    )
+    def test_unusable_connection_is_replaced(self):
+        """Test a broken persistent connection is replaced before use."""
+        first = self._serve_request()
+
+        with patch.object(
+            connection, 'is_usable', return_value=False
+        ) as mock_usable:
+            second = self._serve_request(queries=2)
+
+        mock_usable.assert_called_once()
+        self.assertIsNot(first, second)
+
+    @patch.dict(
+        connection.settings_dict,
+        {'CONN_MAX_AGE': 60, 'CONN_HEALTH_CHECKS': False},
+    )
+    def test_health_checks_disabled(self):
+        """Test reused connections are not checked when disabled."""
+        self._serve_request()
+
+        with patch.object(connection, 'is_usable') as mock_usable:
+            self._serve_request()
+
+        mock_usable.assert_not_called()
@@ -0,0 +1,151 @@
+"""
+Tests for password hashing on the process pool.
+"""
+import fcntl
+import os
+import tempfile
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import Mock, patch
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import hashing
+
+PASSWORD = 'testpass123'
+
+
+class HashingTests(TestCase):
+    """Tests for hashing passwords on the pool."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        lock_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(lock_dir.cleanup)
+        lock_settings = override_settings(PASSWORD_HASH_LOCK_DIR=lock_dir.name)
+        lock_settings.enable()
+        self.addCleanup(lock_settings.disable)
+
+    def hold_slots(self, start=0, stop=None):
+        """Take hashing slots, all by default, as other workers would."""
+        for index in range(start, stop or hashing._slot_count()):
+            fd = os.open(hashing._slot_path(index), os.O_RDWR | os.O_CREAT)
+            self.addCleanup(os.close, fd)
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def test_hash_on_pool(self):
+        """Test passwords are hashed and checked on the pool."""
+        encoded = hashing.make_password(PASSWORD)
+
+        self.assertIsNotNone(hashing._pool)
+        self.assertEqual(identify_hasher(encoded).algorithm, 'argon2')
+        self.assertTrue(hashing.check_password(PASSWORD, encoded))
+        self.assertFalse(hashing.check_password('wrong', encoded))
+
+    @override_settings(PASSWORD_HASH_WORKERS=0)
+    def test_hash_inline(self):
+        """Test passwords are hashed in process without workers."""
+        hashing._discard_pool()
+
+        encoded = hashing.make_password(PASSWORD)
+        self.assertTrue(hashing.check_password(PASSWORD, encoded))
+
+        self.assertIsNone(hashing._pool)
+
+    def test_unusable_passwords(self):
+        """Test unusable passwords never match and are not hashed."""
+        encoded = hashing.make_password(None)
+        self.hold_slots()
+
+        self.assertFalse(hashing.check_password(None, encoded))
+        self.assertFalse(hashing.check_password(PASSWORD, encoded))
+        self.assertFalse(hashing.check_password(PASSWORD, 'invalid'))
+
+    def test_outdated_hash_updated(self):
+        """Test the setter gets passwords hashed with another hasher."""
+        encoded = make_password(PASSWORD, hasher='pbkdf2_sha256')
+        setter = Mock()
+
+        self.assertFalse(hashing.check_password('wrong', encoded, setter))
+        setter.assert_not_called()
+        self.assertTrue(hashing.check_password(PASSWORD, encoded, setter))
+        setter.assert_called_once_with(PASSWORD)
+
+    def test_slots_per_cpu(self):
+        """Test one hash may be in progress per CPU by default."""
+        with patch('core.hashing.available_cpus', return_value=3):
+            self.assertEqual(hashing._slot_count(), 3)
+
+        with override_settings(PASSWORD_HASH_QUEUE_SIZE=5):
+            self.assertEqual(hashing._slot_count(), 5)
+
+    @patch('core.hashing.available_cpus', Mock(return_value=3))
+    def test_saturated(self):
+        """Test hashing fails fast when every slot on the host is taken."""
+        self.hold_slots(start=1)
+        encoded = hashing.make_password(PASSWORD)
+
+        self.hold_slots(stop=1)
+        with self.assertRaises(hashing.HashingUnavailable):
+            hashing.make_password(PASSWORD)
+        with self.assertRaises(hashing.HashingUnavailable):
+            hashing.check_password(PASSWORD, encoded)
+
+    @override_settings(PASSWORD_HASH_WORKERS=0)
+    def test_saturated_inline(self):
+        """Test hashing on the request thread takes a slot too."""
+        self.hold_slots()
+
+        with self.assertRaises(hashing.HashingUnavailable):
+            hashing.make_password(PASSWORD)
+
+    def test_slot_released(self):
+        """Test slots are free again after hashing, also in pool processes."""
+        hashing._discard_pool()
+        hashing.make_password(PASSWORD)
+
+        self.hold_slots()
+
+    def test_broken_pool_replaced(self):
+        """Test a pool whose process died is replaced."""
+        pool = hashing._get_pool()
+        future = Mock()
+        future.result.side_effect = BrokenProcessPool()
+
+        with patch.object(pool, 'submit', return_value=future):
+            with self.assertRaises(hashing.HashingUnavailable):
+                hashing.make_password(PASSWORD)
+
+        self.assertIsNot(hashing._get_pool(), pool)
+        self.assertTrue(hashing.make_password(PASSWORD))
+
+    def test_saturated_api(self):
+        """Test logins and signups get a 503 when hashing is saturated."""
+        get_user_model().objects.create_user(
+            email='user@example.com', password=PASSWORD
+        )
+        self.hold_slots()
+        client = APIClient()
+
+        res = client.post(
+            reverse('user:token'),
+            {'email': 'user@example.com', 'password': PASSWORD},
+        )
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(res['Retry-After'], '1')
+
+        res = client.post(
+            reverse('user:create'),
+            {'email': 'new@example.com', 'password': PASSWORD, 'name': 'N'},
+        )
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertFalse(
+            get_user_model().objects.filter(email='new@example.com').exists()
+        )
@@ -0,0 +1,80 @@
+"""
+Tests for the request metrics middleware.
+"""
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import Product
+
+PRODUCTS_URL = reverse('product:product-list')
+
+
+@override_settings(REQUEST_METRICS=True, REQUEST_QUERY_BUDGET=0)
+class RequestMetricsMiddlewareTests(TestCase):
+    """Tests for RequestMetricsMiddleware."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123'
+        )
+        self.product = Product.objects.create(
+            user=user, title='Sample product'
+        )
+
+    def _timings(self, res):
+        """Return the Server-Timing metrics of res keyed by name."""
+        timings = {}
+        for metric in res['Server-Timing'].split(', '):
+            name, *params = metric.split(';')
+            timings[name] = dict(param.split('=', 1) for param in params)
+        return timings
+
+    def test_server_timing_header(self):
+        """Test responses report query count and timings."""
+        with self.assertLogs('core.middleware', 'INFO'):
+            res = self.client.get(
+                reverse('product:product-detail', args=[self.product.id])
+            )
+
+        timings = self._timings(res)
+        self.assertEqual(set(timings), {'db', 'serializer', 'total'})
+        self.assertRegex(timings['db']['desc'], r'^"[1-9]\d* queries"$')
+        self.assertGreater(float(timings['serializer']['dur']), 0)
+        self.assertGreaterEqual(
+            float(timings['total']['dur']), float(timings['db']['dur'])
+        )
+
+    def test_logs_request_metrics(self):
+        """Test each request is logged as JSON."""
+        with self.assertLogs('core.middleware', 'INFO') as logs:
+            res = self.client.get(PRODUCTS_URL)
+
+        self.assertEqual(logs.records[0].levelname, 'INFO')
+        fields = json.loads(logs.records[0].getMessage())
+        self.assertEqual(fields['path'], PRODUCTS_URL)
+        self.assertEqual(fields['status'], res.status_code)
+        self.assertGreater(fields['queries'], 0)
+        self.assertEqual(logs.records[0].metrics, fields)
+
+    @override_settings(REQUEST_QUERY_BUDGET=1)
+    def test_over_budget_logs_warning(self):
+        """Test requests over the query budget are logged as warnings."""
+        with self.assertLogs('core.middleware', 'INFO') as logs:
+            self.client.get(PRODUCTS_URL)
+
+        self.assertEqual(logs.records[0].levelname, 'WARNING')
+
+    @override_settings(REQUEST_METRICS=False)
+    def test_disabled(self):
+        """Test no metrics are reported when disabled."""
+        res = self.client.get(PRODUCTS_URL)
+
+        self.assertNotIn('Server-Timing', res)
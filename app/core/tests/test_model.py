@@ -3,6 +3,7 @@ Tests for models.
 """
 from unittest.mock import patch
 
+from django.db import IntegrityError
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
@@ -73,6 +74,17 @@ class TestModels(TestCase):
 
         self.assertEqual(str(clothing_size), clothing_size.name)
 
+    def test_tag_name_unique_per_user(self):
+        """Test a user cannot have two tags with the same name."""
+        user = create_user()
+        models.Tag.objects.create(user=user, name="Tag1")
+        models.Tag.objects.create(
+            user=create_user(email="other@example.com"), name="Tag1"
+        )
+
+        with self.assertRaises(IntegrityError):
+            models.Tag.objects.create(user=user, name="Tag1")
+
     @patch('core.models.uuid.uuid4')
     def test_product_file_name_uuid(self, mock_uuid):
         """Test generating image path."""
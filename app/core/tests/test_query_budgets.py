@@ -0,0 +1,199 @@
+"""
+Query budgets of the product API endpoints.
+
+Each budget is the number of queries the endpoint runs today with several
+rows in play, so a regression that adds a query per row (or any query at
+all) fails here before it reaches production.
+"""
+import shutil
+import tempfile
+
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    ClothingSize,
+    Product,
+    Tag,
+)
+from core.tests.utils import QueryBudgetMixin
+
+PRODUCTS_URL = reverse('product:product-list')
+BULK_URL = reverse('product:product-bulk')
+
+
+def detail_url(product_id):
+    """Create and return a product detail URL."""
+    return reverse('product:product-detail', args=[product_id])
+
+
+def upload_url(product_id):
+    """Create and return a product image upload URL."""
+    return reverse('product:product-upload-image', args=[product_id])
+
+
+def chunked_upload_url(product_id):
+    """Create and return a resumable product image upload URL."""
+    return reverse('product:product-upload-image-chunked', args=[product_id])
+
+
+@override_settings(PRODUCT_IMAGE_WORKERS=0)
+class ProductQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Query budgets of the product endpoints."""
+
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123'
+        )
+        self.client.force_authenticate(self.user)
+
+        tags = [
+            Tag.objects.create(user=self.user, name=f'Tag {i}')
+            for i in range(3)
+        ]
+        sizes = [
+            ClothingSize.objects.create(user=self.user, name=name)
+            for name in ['S', 'M', 'L']
+        ]
+        self.products = []
+        for i in range(10):
+            product = Product.objects.create(
+                user=self.user, title=f'Jazz {i}', description='Music'
+            )
+            product.tags.add(*tags)
+            product.clothing_sizes.add(*sizes)
+            self.products.append(product)
+        self.tags = tags
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def test_list(self):
+        """Test listing products, prefetching tags and sizes."""
+        with self.assertQueryBudget(4):
+            res = self.client.get(PRODUCTS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_list_cached(self):
+        """Test a cached list only queries its validators."""
+        self.client.get(PRODUCTS_URL)
+
+        with self.assertQueryBudget(1):
+            res = self.client.get(PRODUCTS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_list_filtered_and_searched(self):
+        """Test filtering and searching adds no queries."""
+        with self.assertQueryBudget(4):
+            res = self.client.get(PRODUCTS_URL, {
+                'owner': self.user.id,
+                'tags': self.tags[0].id,
+                'q': 'jazz',
+            })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_detail(self):
+        """Test retrieving a product."""
+        with self.assertQueryBudget(4):
+            res = self.client.get(detail_url(self.products[0].id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_create(self):
+        """Test creating a product with new and existing names."""
+        payload = {
+            'title': 'New',
+            'tags': [{'name': 'Tag 0'}, {'name': 'New tag'}],
+            'clothing_sizes': [{'name': 'XL'}],
+        }
+
+        with self.assertQueryBudget(11):
+            res = self.client.post(PRODUCTS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_partial_update(self):
+        """Test updating a product and replacing its tags."""
+        with self.assertQueryBudget(8):
+            res = self.client.patch(
+                detail_url(self.products[0].id),
+                {'title': 'Renamed', 'tags': [{'name': 'Tag 1'}]},
+                format='json',
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_delete(self):
+        """Test deleting a product and its assignments."""
+        with self.assertQueryBudget(4):
+            res = self.client.delete(detail_url(self.products[0].id))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_bulk_create(self):
+        """Test bulk creating products in one INSERT."""
+        payload = [{'title': f'Bulk {i}'} for i in range(20)]
+
+        with self.assertQueryBudget(3):
+            res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_bulk_update(self):
+        """Test bulk updating products in one UPDATE."""
+        payload = [
+            {'id': product.id, 'title': 'Renamed'}
+            for product in self.products
+        ]
+
+        with self.assertQueryBudget(4):
+            res = self.client.patch(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_bulk_delete(self):
+        """Test bulk deleting products."""
+        payload = {'ids': [product.id for product in self.products]}
+
+        with self.assertQueryBudget(6):
+            res = self.client.delete(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_upload_image(self):
+        """Test uploading a product image."""
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file:
+            Image.new('RGB', (10, 10)).save(image_file, format='JPEG')
+            image_file.seek(0)
+
+            with self.assertQueryBudget(8):
+                res = self.client.post(
+                    upload_url(self.products[0].id),
+                    {'image': image_file},
+                    format='multipart',
+                )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_start_chunked_upload(self):
+        """Test starting a resumable upload."""
+        with self.assertQueryBudget(1):
+            res = self.client.post(chunked_upload_url(self.products[0].id))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
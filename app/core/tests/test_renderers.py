@@ -0,0 +1,127 @@
+"""
+Tests for the orjson backed renderer and parser.
+"""
+import datetime
+import uuid
+from decimal import Decimal
+from io import BytesIO
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    """Tests for FastJSONRenderer."""
+
+    def assertRendersLikeJSONRenderer(self, data, media_type=None):
+        """Assert data renders to the same bytes as with JSONRenderer."""
+        self.assertEqual(
+            FastJSONRenderer().render(data, media_type),
+            JSONRenderer().render(data, media_type),
+        )
+
+    def test_decimal(self):
+        """Test decimals render as numbers."""
+        self.assertRendersLikeJSONRenderer(
+            {'price': Decimal('12.50'), 'rate': Decimal('0.1')}
+        )
+
+    def test_datetimes(self):
+        """Test dates and times render in DRF's ISO 8601 format."""
+        self.assertRendersLikeJSONRenderer({
+            'utc': datetime.datetime(
+                2024, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc
+            ),
+            'current': timezone.now(),
+            'offset': datetime.datetime(
+                2024, 5, 1, 12, 30,
+                tzinfo=datetime.timezone(datetime.timedelta(hours=3)),
+            ),
+            'naive': datetime.datetime(2024, 5, 1, 12, 30),
+            'date': datetime.date(2024, 5, 1),
+            'time': datetime.time(12, 30, 15),
+            'duration': datetime.timedelta(hours=1, seconds=3),
+        })
+
+    def test_uuid(self):
+        """Test UUIDs render as strings."""
+        self.assertRendersLikeJSONRenderer({'id': uuid.uuid4()})
+
+    def test_lazy_translation(self):
+        """Test lazy translation strings render as their text."""
+        self.assertRendersLikeJSONRenderer(
+            {'detail': gettext_lazy('This field is required.')}
+        )
+
+    def test_serializer_containers(self):
+        """Test serializer output with non-string keys and unicode."""
+        self.assertRendersLikeJSONRenderer(ReturnList([
+            ReturnDict({'title': 'Café ☕', 'tags': ()}, serializer=None),
+            {0: ['error'], 1: None, 'ok': True, 'n': 1.5},
+        ], serializer=None))
+
+    def test_line_separators_escaped(self):
+        """Test U+2028 and U+2029 are escaped like JSONRenderer does."""
+        self.assertRendersLikeJSONRenderer({'text': 'a\u2028b\u2029c'})
+
+    def test_indent_falls_back(self):
+        """Test indented output is rendered by JSONRenderer."""
+        self.assertRendersLikeJSONRenderer(
+            {'a': [1, 2]}, 'application/json; indent=4'
+        )
+
+    def test_large_integer_falls_back(self):
+        """Test integers orjson cannot encode are rendered all the same."""
+        self.assertRendersLikeJSONRenderer({'big': 2 ** 70})
+
+    def test_none(self):
+        """Test None renders as an empty body."""
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    @patch('core.renderers.orjson', None)
+    def test_without_orjson(self):
+        """Test the renderer works when orjson is not installed."""
+        self.assertRendersLikeJSONRenderer({'id': uuid.uuid4()})
+
+
+class FastJSONParserTests(SimpleTestCase):
+    """Tests for FastJSONParser."""
+
+    def test_parse(self):
+        """Test parsing matches JSONParser."""
+        body = '{"title": "Café", "ids": [1, 2.5, null, true]}'.encode()
+
+        self.assertEqual(
+            FastJSONParser().parse(BytesIO(body)),
+            JSONParser().parse(BytesIO(body)),
+        )
+
+    def test_invalid_json(self):
+        """Test malformed JSON raises a parse error."""
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(BytesIO(b'{"title": '))
+
+    def test_nan_rejected(self):
+        """Test NaN is rejected, as JSONParser does in strict mode."""
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(BytesIO(b'{"n": NaN}'))
+
+    def test_other_encoding_falls_back(self):
+        """Test bodies in other encodings are parsed by JSONParser."""
+        body = '{"title": "Café"}'.encode('latin-1')
+
+        data = FastJSONParser().parse(
+            BytesIO(body), parser_context={'encoding': 'latin-1'}
+        )
+
+        self.assertEqual(data, {'title': 'Café'})
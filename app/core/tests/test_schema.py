@@ -0,0 +1,96 @@
+"""
+Tests for the prebuilt OpenAPI schema.
+"""
+import tempfile
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from core import schema
+
+SCHEMA_URL = reverse('api-schema')
+
+
+class PrebuiltSchemaTests(SimpleTestCase):
+    """Tests for building and serving the prebuilt schema."""
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        settings = override_settings(SCHEMA_ROOT=root.name, CODE_VERSION='v1')
+        settings.enable()
+        self.addCleanup(settings.disable)
+        schema._loaded.clear()
+        self.addCleanup(schema._loaded.clear)
+
+    def test_build_skips_current_version(self):
+        """Test the schema is only rebuilt for a new code version."""
+        self.assertTrue(schema.build())
+        self.assertEqual(schema.stored_version(), 'v1')
+
+        with patch('core.schema.generate') as patched_generate:
+            self.assertFalse(schema.build())
+            patched_generate.assert_not_called()
+
+        with override_settings(CODE_VERSION='v2'):
+            self.assertTrue(schema.build())
+        self.assertEqual(schema.stored_version(), 'v2')
+
+    def test_serves_stored_schema(self):
+        """Test the stored schema is served without generating it."""
+        schema.build()
+
+        with patch('core.schema.generate') as patched_generate:
+            yaml = self.client.get(SCHEMA_URL)
+            json = self.client.get(SCHEMA_URL, {'format': 'json'})
+            patched_generate.assert_not_called()
+
+        self.assertEqual(yaml.status_code, 200)
+        self.assertTrue(yaml.content.startswith(b'openapi: '))
+        self.assertEqual(yaml['ETag'], '"v1-yaml"')
+        self.assertIn('max-age=', yaml['Cache-Control'])
+        self.assertEqual(json.status_code, 200)
+        self.assertTrue(json['Content-Type'].startswith(
+            'application/vnd.oai.openapi+json'
+        ))
+        self.assertEqual(json.json()['openapi'], '3.0.3')
+        self.assertEqual(json['ETag'], '"v1-json"')
+
+    def test_not_modified(self):
+        """Test a request with the current ETag gets a 304."""
+        etag = self.client.get(SCHEMA_URL)['ETag']
+
+        res = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res['ETag'], etag)
+
+    def test_stale_schema_generated(self):
+        """Test a schema stored for other code is not served."""
+        with override_settings(CODE_VERSION='v0'):
+            schema.build()
+
+        with patch(
+            'core.schema.generate', return_value={'yaml': b'new', 'json': b''}
+        ):
+            res = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(res.content, b'new')
+        self.assertEqual(res['ETag'], '"v1-yaml"')
+
+    def test_language_generated_on_demand(self):
+        """Test schemas for a given language are generated per request."""
+        with patch('core.schema.get_schemas') as patched_get_schemas:
+            res = self.client.get(SCHEMA_URL, {'lang': 'en'})
+            patched_get_schemas.assert_not_called()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res.content.startswith(b'openapi: '))
+
+    def test_code_version_from_sources(self):
+        """Test the code version defaults to a digest of the sources."""
+        with override_settings(CODE_VERSION=''):
+            version = schema.code_version()
+
+        self.assertRegex(version, r'^[0-9a-f]{16}$')
@@ -0,0 +1,183 @@
+"""
+Tests for the content addressed file storage.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import models, storage
+from core.storage import ContentAddressedStorage
+
+
+class ContentAddressedStorageTests(TestCase):
+    """Tests for ContentAddressedStorage."""
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.storage = ContentAddressedStorage(location=self.location)
+
+    def tearDown(self):
+        shutil.rmtree(self.location)
+
+    def test_name_is_content_hash(self):
+        """Test files are named after the SHA-256 of their content."""
+        digest = hashlib.sha256(b'content').hexdigest()
+
+        name = self.storage.save('uploads/a.JPG', ContentFile(b'content'))
+
+        self.assertEqual(name, f'uploads/cas/{digest[:2]}/{digest}.jpg')
+        with self.storage.open(name) as f:
+            self.assertEqual(f.read(), b'content')
+
+    def test_identical_content_is_stored_once(self):
+        """Test saving the same content twice keeps a single file."""
+        first = self.storage.save('a.jpg', ContentFile(b'content'))
+        second = self.storage.save('b.jpg', ContentFile(b'content'))
+        other = self.storage.save('c.jpg', ContentFile(b'other'))
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        files = [n for _, _, names in os.walk(self.location) for n in names]
+        self.assertEqual(len(files), 2)
+
+    def test_precomputed_digest_is_trusted(self):
+        """Test a digest carried by the content skips rehashing."""
+        content = ContentFile(b'content')
+        content.sha256 = 'ab' * 32
+
+        name = self.storage.save('a.png', content)
+
+        self.assertEqual(name, f'uploads/cas/ab/{"ab" * 32}.png')
+
+
+class StoredFileReferenceTests(TestCase):
+    """Tests for reference counting of stored files."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.media_root, STORED_FILE_GRACE=0
+        )
+        self.settings_override.enable()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123'
+        )
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def _create(self, model, content=b'image', **params):
+        """Create a row of model whose image holds content."""
+        instance = model(user=self.user, title='Title', **params)
+        instance.image.save('image.jpg', ContentFile(content), save=False)
+        instance.save()
+        return instance
+
+    def _references(self, name):
+        """Return the reference count of the stored file name."""
+        return models.StoredFile.objects.get(name=name).references
+
+    def test_shared_file_is_counted_across_models(self):
+        """Test products and episodes share and count the same file."""
+        product = self._create(models.Product)
+        episode = self._create(
+            models.Episode, link_youtube='yt', link_spotify='sp'
+        )
+
+        self.assertEqual(product.image.name, episode.image.name)
+        self.assertEqual(self._references(product.image.name), 2)
+
+    def test_file_is_deleted_with_last_reference(self):
+        """Test a file is kept while referenced and deleted afterwards."""
+        first = self._create(models.Product)
+        second = self._create(models.Product)
+        name = first.image.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(default_storage.exists(name))
+        self.assertEqual(self._references(name), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(models.StoredFile.objects.filter(name=name).exists())
+
+    def test_replacing_a_file_moves_the_reference(self):
+        """Test changing an image releases the previous file."""
+        product = self._create(models.Product)
+        old_name = product.image.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product.image.save('new.jpg', ContentFile(b'new image'))
+
+        self.assertFalse(default_storage.exists(old_name))
+        self.assertEqual(self._references(product.image.name), 1)
+
+    def test_saving_other_fields_keeps_references(self):
+        """Test saves that do not touch the image leave counts alone."""
+        product = self._create(models.Product)
+
+        product.title = 'New title'
+        product.save()
+        product.save(update_fields=['title'])
+
+        self.assertEqual(self._references(product.image.name), 1)
+
+    @override_settings(STORED_FILE_GRACE=60)
+    def test_file_is_kept_for_grace_period(self):
+        """Test an unreferenced file is only deleted after the grace period."""
+        product = self._create(models.Product)
+        name = product.image.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product.delete()
+        self.assertTrue(default_storage.exists(name))
+
+        models.StoredFile.objects.filter(name=name).update(
+            released_at=timezone.now() - timedelta(seconds=61)
+        )
+        storage.collect()
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(models.StoredFile.objects.filter(name=name).exists())
+
+    @override_settings(STORED_FILE_GRACE=60)
+    def test_saving_released_content_restarts_grace_period(self):
+        """Test saving content awaiting deletion keeps it for the new row."""
+        product = self._create(models.Product)
+        name = product.image.name
+        with self.captureOnCommitCallbacks(execute=True):
+            product.delete()
+        models.StoredFile.objects.filter(name=name).update(
+            released_at=timezone.now() - timedelta(seconds=61)
+        )
+
+        default_storage.save('image.jpg', ContentFile(b'image'))
+        storage.collect()
+        self.assertTrue(default_storage.exists(name))
+
+        product = self._create(models.Product)
+        self.assertEqual(product.image.name, name)
+        self.assertEqual(self._references(name), 1)
+
+    def test_collected_content_is_written_again(self):
+        """Test saving content deleted by collect() stores it again."""
+        product = self._create(models.Product)
+        name = product.image.name
+        with self.captureOnCommitCallbacks(execute=True):
+            product.delete()
+        self.assertFalse(default_storage.exists(name))
+
+        product = self._create(models.Product)
+
+        self.assertTrue(default_storage.exists(name))
+        self.assertEqual(self._references(name), 1)
@@ -0,0 +1,27 @@
+"""
+Helpers shared by the test suites.
+"""
+from contextlib import contextmanager
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """TestCase mixin asserting how many queries a block may run."""
+
+    @contextmanager
+    def assertQueryBudget(self, budget, using='default'):
+        """Fail if the block runs more than budget queries on using."""
+        with CaptureQueriesContext(connections[using]) as ctx:
+            yield ctx
+
+        queries = len(ctx.captured_queries)
+        if queries > budget:
+            self.fail(
+                f'{queries} queries run, over the budget of {budget}:\n'
+                + '\n'.join(
+                    f'{i}. {query["sql"]}'
+                    for i, query in enumerate(ctx.captured_queries, 1)
+                )
+            )
@@ -0,0 +1,48 @@
+"""
+Helpers shared by the apps.
+"""
+import math
+import os
+
+CGROUP_V2_CPU_MAX = '/sys/fs/cgroup/cpu.max'
+CGROUP_V1_CPU_QUOTA = '/sys/fs/cgroup/cpu/cpu.cfs_quota_us'
+CGROUP_V1_CPU_PERIOD = '/sys/fs/cgroup/cpu/cpu.cfs_period_us'
+
+
+def read_fields(path):
+    """Return the whitespace separated fields of a file, or None."""
+    try:
+        with open(path) as f:
+            return f.read().split()
+    except OSError:
+        return None
+
+
+def cpu_quota():
+    """Return the CPUs the cgroup CPU quota allows, or None if unlimited."""
+    cpu_max = read_fields(CGROUP_V2_CPU_MAX)
+    if cpu_max:
+        quota, period = cpu_max[0], cpu_max[1]
+    else:
+        quota = read_fields(CGROUP_V1_CPU_QUOTA)
+        period = read_fields(CGROUP_V1_CPU_PERIOD)
+        if not quota or not period:
+            return None
+        quota, period = quota[0], period[0]
+
+    if quota in ('max', '-1'):
+        return None
+    return int(quota) / int(period)
+
+
+def available_cpus():
+    """Return the CPUs this process may run on, within its cgroup quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # pragma: no cover
+        cpus = os.cpu_count() or 1
+
+    quota = cpu_quota()
+    if quota is not None:
+        cpus = min(cpus, max(1, math.ceil(quota)))
+    return cpus
@@ -0,0 +1,50 @@
+"""
+Views shared by the apps.
+"""
+import functools
+
+from django.utils.module_loading import import_string
+
+from rest_framework.schemas import DefaultSchema
+
+
+class LazyView:
+    """A view importing the DRF view class at view_path on first use.
+
+    Rarely requested views, such as the schema and API docs, then keep
+    their imports out of worker startup and the first request. Like the
+    view returned by APIView.as_view(), it exposes `cls` and `initkwargs`
+    for schema generation, and is exempt from CSRF, which DRF enforces for
+    session authentication itself.
+    """
+    csrf_exempt = True
+
+    def __init__(self, view_path, **initkwargs):
+        self.view_path = view_path
+        self.initkwargs = initkwargs
+
+    @functools.cached_property
+    def cls(self):
+        return import_string(self.view_path)
+
+    @functools.cached_property
+    def view(self):
+        return self.cls.as_view(**self.initkwargs)
+
+    def __call__(self, request, *args, **kwargs):
+        return self.view(request, *args, **kwargs)
+
+
+class LazySchema(DefaultSchema):
+    """A DefaultSchema resolving DEFAULT_SCHEMA_CLASS for view instances only.
+
+    Routers read `schema` from viewset classes while listing their extra
+    actions, which for DefaultSchema imports the schema class, and with it
+    drf_spectacular, when the URLconf is loaded. Read from a class, this
+    returns itself; schema generation only reads it from view instances.
+    """
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        return super().__get__(instance, owner)
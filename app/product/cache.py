@@ -0,0 +1,114 @@
+"""
+Versioned response cache for product APIs.
+
+Rendered responses are stored under keys that embed a catalog version
+counter. Any write to the catalog bumps the counter, which orphans every
+previously cached response at once instead of tracking individual keys.
+"""
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+
+CATALOG_VERSION_KEY = 'product:catalog-version'
+
+# Set while bump_once() defers the bumps of the current thread.
+_batch = threading.local()
+
+
+def get_catalog_version():
+    """Return the current catalog version, seeding it when missing."""
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        # Seed from the clock so an evicted counter never comes back at a
+        # value that stale responses are still stored under.
+        seed = time.time_ns()
+        cache.add(CATALOG_VERSION_KEY, seed, timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY, seed)
+
+    return version
+
+
+def _bump():
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.add(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def bump_catalog_version():
+    """Invalidate every cached product response.
+
+    The counter is bumped straight away, so reads later in the same
+    transaction see its writes. Within a transaction it is bumped once
+    more when that commits, so a read racing the commit cannot store the
+    pre-commit rows under the new version; that bump is scheduled once
+    per transaction, however many writes it makes.
+    """
+    if getattr(_batch, 'active', False):
+        return
+
+    _bump()
+    connection = transaction.get_connection()
+    if connection.in_atomic_block and not any(
+        entry[1] is _bump for entry in connection.run_on_commit
+    ):
+        transaction.on_commit(_bump)
+
+
+@contextmanager
+def bump_once():
+    """Bump the catalog version once for all the writes made within.
+
+    Signal handlers would otherwise bump it for every row written.
+    """
+    if getattr(_batch, 'active', False):
+        yield
+        return
+
+    _batch.active = True
+    try:
+        yield
+    finally:
+        _batch.active = False
+    bump_catalog_version()
+
+
+def request_digest(request):
+    """Return a digest of everything a product response varies on."""
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    return hashlib.sha256('|'.join([
+        request.accepted_renderer.format,
+        request.build_absolute_uri(request.path),
+        query,
+    ]).encode()).hexdigest()
+
+
+def response_key(kind, request):
+    """Return the cache key for a response to request."""
+    return f'product:{kind}:{get_catalog_version()}:{request_digest(request)}'
+
+
+def get_response(key):
+    """Return the cached response stored under key, if any."""
+    cached = cache.get(key)
+    if cached is None:
+        return None
+
+    content, content_type = cached
+    return HttpResponse(content, content_type=content_type)
+
+
+def set_response(key, response):
+    """Store a rendered response under key."""
+    cache.set(
+        key,
+        (response.content, response['Content-Type']),
+        settings.PRODUCT_CACHE_TIMEOUT,
+    )
@@ -0,0 +1,185 @@
+"""
+Pagination for product APIs.
+"""
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import BooleanField, Expression, F, Q, Value
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+
+from product.search import RANK_ANNOTATION
+
+
+def _reverse_ordering(ordering):
+    return tuple(
+        field[1:] if field.startswith('-') else f'-{field}'
+        for field in ordering
+    )
+
+
+class RowComparison(Expression):
+    """Compare columns with values as rows, e.g. (a, b) < (1, 2).
+
+    Unlike the equivalent OR of conditions, PostgreSQL uses a row
+    comparison as an index condition on an index over the same columns.
+    """
+    output_field = BooleanField()
+
+    def __init__(self, columns, operator, values):
+        super().__init__()
+        self.columns = list(columns)
+        self.operator = operator
+        self.values = list(values)
+
+    def get_source_expressions(self):
+        return [*self.columns, *self.values]
+
+    def set_source_expressions(self, exprs):
+        self.columns = exprs[:len(self.columns)]
+        self.values = exprs[len(self.columns):]
+
+    def as_sql(self, compiler, connection):
+        columns = [compiler.compile(column) for column in self.columns]
+        values = [compiler.compile(value) for value in self.values]
+        sql = '({}) {} ({})'.format(
+            ', '.join(sql for sql, _ in columns),
+            self.operator,
+            ', '.join(sql for sql, _ in values),
+        )
+        params = [param for _, params in columns + values for param in params]
+        return sql, params
+
+
+class KeysetCursorPagination(CursorPagination):
+    """Cursor pagination on every field of the ordering, not just the first.
+
+    DRF's cursor holds the first ordering field and skips the rows tied on
+    it with an offset, which is capped, so long runs of ties loop forever.
+    Here the cursor holds the value of each ordering field and pages are
+    filtered on them as a tuple. The ordering must end with a unique field,
+    so positions are unique and no offset is ever needed.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        position = None if self.cursor is None else self.cursor.position
+
+        ordering = _reverse_ordering(self.ordering) if reverse \
+            else self.ordering
+        queryset = queryset.order_by(*ordering)
+        try:
+            if position is not None:
+                queryset = queryset.filter(
+                    self._after(queryset, ordering, position)
+                )
+            # Fetch an extra row to tell whether a page follows this one.
+            results = list(queryset[:self.page_size + 1])
+        except (ValidationError, ValueError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+        self.page = results[:self.page_size]
+        following = None
+        if len(results) > len(self.page):
+            following = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = position is not None
+            self.has_previous = following is not None
+            self.next_position, self.previous_position = position, following
+        else:
+            self.has_next = following is not None
+            self.has_previous = position is not None
+            self.next_position, self.previous_position = following, position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def _after(self, queryset, ordering, position):
+        """Return a filter for the rows following position in ordering."""
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        fields = [field.lstrip('-') for field in ordering]
+        descending = {field.startswith('-') for field in ordering}
+        if len(descending) == 1:
+            return RowComparison(
+                [F(field) for field in fields],
+                '<' if descending.pop() else '>',
+                [
+                    Value(
+                        output_field.to_python(value),
+                        output_field=output_field,
+                    )
+                    for output_field, value in zip(
+                        self._output_fields(queryset, fields), values
+                    )
+                ],
+            )
+
+        # Mixed directions cannot be compared as one row.
+        after = Q()
+        for i, field in enumerate(ordering):
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            after |= Q(
+                **dict(zip(fields[:i], values[:i])),
+                **{f'{fields[i]}__{lookup}': values[i]},
+            )
+
+        return after
+
+    def _output_fields(self, queryset, fields):
+        """Return the model field or annotation type of each of fields."""
+        annotations = queryset.query.annotations
+        return [
+            annotations[field].output_field if field in annotations
+            else queryset.model._meta.get_field(field)
+            for field in fields
+        ]
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            name = field.lstrip('-')
+            if isinstance(instance, dict):
+                value = instance[name]
+            else:
+                value = getattr(instance, name)
+            values.append(str(value))
+
+        return json.dumps(values, separators=(',', ':'))
+
+
+class ProductCursorPagination(KeysetCursorPagination):
+    """Keyset pagination over (created_at, id), newest first.
+
+    Ranked search results are paginated by (rank, id), most relevant first.
+    """
+    ordering = ('-created_at', '-id')
+    search_ordering = (f'-{RANK_ANNOTATION}', '-id')
+    page_size = settings.PRODUCT_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.PRODUCT_MAX_PAGE_SIZE
+
+    def get_ordering(self, request, queryset, view):
+        if RANK_ANNOTATION in queryset.query.annotations:
+            return self.search_ordering
+
+        return super().get_ordering(request, queryset, view)
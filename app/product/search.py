@@ -0,0 +1,33 @@
+"""
+Full-text search over products.
+
+Each product row carries a tsvector of its title (weight A) and description
+(weight B), kept current by a trigger on core_product and indexed with GIN,
+so matching never scans the table. Both are PostgreSQL features, as is the
+search_vector column, so the app runs on PostgreSQL only.
+"""
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
+
+# Must match the configuration used by the core_product trigger.
+SEARCH_CONFIG = 'english'
+RANK_ANNOTATION = 'search_rank'
+
+
+def search_query(text):
+    """Return a query for text using web search syntax."""
+    return SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+
+
+def filter_products(queryset, text):
+    """Narrow queryset to the products matching text."""
+    return queryset.filter(search_vector=search_query(text))
+
+
+def rank_products(queryset, text):
+    """Annotate queryset with the relevance of each product to text."""
+    # ts_rank() returns a real, which is cast to double precision so the
+    # value held in a pagination cursor compares equal to the row's rank.
+    rank = SearchRank(F('search_vector'), search_query(text))
+    return queryset.annotate(**{RANK_ANNOTATION: Cast(rank, FloatField())})
@@ -1,15 +1,23 @@
 """
 Serializers for product API.
 """
-
+from django.conf import settings
+from django.utils import timezone
 
 from rest_framework import serializers
 
+from core.metrics import TimedSerializerMixin
 from core.models import (
     Product,
+    ProductClothingSize,
+    ProductTag,
     Tag,
     ClothingSize
 )
+from product import (
+    cache,
+    uploads,
+)
 
 
 class ClothingSizeSerializer(serializers.ModelSerializer):
@@ -28,37 +36,97 @@ class TagsSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class ProductSerializers(serializers.ModelSerializer):
+class ProductSerializers(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializers for product."""
-    # tags = TagsSerializer(many=True, required=False)
-    # clothing_sizes = ClothingSizeSerializer(many=True, required=False)
+    tags = TagsSerializer(many=True, required=False)
+    clothing_sizes = ClothingSizeSerializer(many=True, required=False)
 
     class Meta:
         model = Product
         fields = [
-            'id', 'title', 'youtube', 'spotify', 'image'
+            'id', 'title', 'youtube', 'spotify', 'tags', 'clothing_sizes',
+            'image', 'image_thumbnail', 'image_medium', 'image_webp',
         ]
-        read_only_fields = ['id']
+        # Images are uploaded with the upload-image actions, which queue
+        # their renditions.
+        read_only_fields = ['id', 'image']
+
+    def _get_or_create(self, model, items):
+        """Return the user's objects of model named in items.
+
+        Existing names are fetched in one query and missing ones inserted
+        in one more, relying on the unique (user, name) constraint to skip
+        names created concurrently.
+        """
+        auth_user = self.context['request'].user
+        names = list(dict.fromkeys(item['name'] for item in items))
+        if not names:
+            return []
+
+        objects = {
+            obj.name: obj
+            for obj in model.objects.filter(user=auth_user, name__in=names)
+        }
+        missing = [name for name in names if name not in objects]
+        if missing:
+            model.objects.bulk_create(
+                [model(user=auth_user, name=name) for name in missing],
+                ignore_conflicts=True,
+            )
+            # Ignored conflicts leave no primary keys, so read them back.
+            objects.update(
+                (obj.name, obj)
+                for obj in model.objects.filter(
+                    user=auth_user, name__in=missing
+                )
+            )
+
+        return [objects[name] for name in names]
+
+    def _get_or_create_tags(self, tags, product):
+        """Handle getting or creating tags as needed."""
+        ProductTag.objects.bulk_create(
+            [
+                ProductTag(product=product, tag=tag)
+                for tag in self._get_or_create(Tag, tags)
+            ],
+            ignore_conflicts=True,
+        )
+
+    def _get_or_create_clothing_sizes(self, clothing_sizes, product):
+        """Handle getting or creating clothing sizes as needed."""
+        ProductClothingSize.objects.bulk_create(
+            [
+                ProductClothingSize(product=product, clothing_size=size)
+                for size in self._get_or_create(ClothingSize, clothing_sizes)
+            ],
+            ignore_conflicts=True,
+        )
 
     def create(self, validated_data):
+        """Create a product."""
         tags = validated_data.pop('tags', [])
         clothing_sizes = validated_data.pop('clothing_sizes', [])
         product = Product.objects.create(**validated_data)
         self._get_or_create_tags(tags, product)
         self._get_or_create_clothing_sizes(clothing_sizes, product)
+        # The through rows were inserted without m2m_changed signals.
+        cache.bump_catalog_version()
 
         return product
 
     def update(self, instance, validated_data):
         """Update products."""
-        # tags = validated_data.pop('tags', None)
-        # clothing_sizes = validated_data.pop('clothing_sizes', None)
-        # if tags is not None:
-        #     instance.tags.clear()
-        #     self._get_or_create_tags(tags, instance)
-        # if clothing_sizes is not None:
-        #     instance.clothing_sizes.clear()
-        #     self._get_or_create_clothing_sizes(clothing_sizes, instance)
+        tags = validated_data.pop('tags', None)
+        clothing_sizes = validated_data.pop('clothing_sizes', None)
+        # Deleting the through rows directly skips m2m_changed, whose
+        # handlers would touch the product that save() updates below.
+        if tags is not None:
+            ProductTag.objects.filter(product=instance).delete()
+            self._get_or_create_tags(tags, instance)
+        if clothing_sizes is not None:
+            ProductClothingSize.objects.filter(product=instance).delete()
+            self._get_or_create_clothing_sizes(clothing_sizes, instance)
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
@@ -73,11 +141,169 @@ class ProductDetailSerializers(ProductSerializers):
         fields = ProductSerializers.Meta.fields + ['description', 'image']
 
 
-class ProductImageSerializer(serializers.ModelSerializer):
+def _related_by_product(through, field, product_ids):
+    """Return {product id: [{'id', 'name'}]} of a relation of products."""
+    related = {}
+    if not product_ids:
+        return related
+
+    rows = through.objects.filter(
+        product_id__in=product_ids
+    ).order_by(f'{field}_id').values_list(
+        'product_id', f'{field}_id', f'{field}__name'
+    )
+    for product_id, related_id, name in rows:
+        related.setdefault(product_id, []).append(
+            {'id': related_id, 'name': name}
+        )
+    return related
+
+
+class ProductRowsSerializer(serializers.ListSerializer):
+    """Represent a page of product rows, loading their relations in bulk."""
+
+    def to_representation(self, data):
+        rows = list(data)
+        product_ids = [row['id'] for row in rows]
+        self.child.related = {
+            'tags': _related_by_product(ProductTag, 'tag', product_ids),
+            'clothing_sizes': _related_by_product(
+                ProductClothingSize, 'clothing_size', product_ids
+            ),
+        }
+
+        return [self.child.to_representation(row) for row in rows]
+
+
+class ProductListSerializer(TimedSerializerMixin, serializers.BaseSerializer):
+    """Read-only equivalent of ProductSerializers for the product list.
+
+    Takes rows of `.values(*columns)` rather than model instances and
+    builds the same output directly, skipping the per-field overhead of a
+    ModelSerializer. Used with many=True, the tags and clothing sizes of
+    all rows are loaded with one query each.
+    """
+    columns = (
+        'id', 'title', 'youtube', 'spotify',
+        'image', 'image_thumbnail', 'image_medium', 'image_webp',
+    )
+    related = None
+
+    class Meta:
+        list_serializer_class = ProductRowsSerializer
+
+    def _url(self, column, name):
+        """Return the URL of a stored image, as an ImageField would."""
+        if not name:
+            return None
+
+        url = Product._meta.get_field(column).storage.url(name)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request is not None else url
+
+    def to_representation(self, row):
+        related = self.related or {}
+        product_id = row['id']
+        return {
+            'id': product_id,
+            'title': row['title'],
+            'youtube': row['youtube'],
+            'spotify': row['spotify'],
+            'tags': related.get('tags', {}).get(product_id, []),
+            'clothing_sizes': related.get('clothing_sizes', {}).get(
+                product_id, []
+            ),
+            'image': self._url('image', row['image']),
+            'image_thumbnail': self._url(
+                'image_thumbnail', row['image_thumbnail']
+            ),
+            'image_medium': self._url('image_medium', row['image_medium']),
+            'image_webp': self._url('image_webp', row['image_webp']),
+        }
+
+
+class ProductBulkListSerializer(serializers.ListSerializer):
+    """Create and update products in batched statements."""
+
+    def create(self, validated_data):
+        """Insert all products with bulk INSERTs."""
+        return Product.objects.bulk_create(
+            [Product(**attrs) for attrs in validated_data],
+            batch_size=settings.PRODUCT_BULK_BATCH_SIZE,
+        )
+
+    def update(self, instance, validated_data):
+        """Apply the changes to the products in instance (keyed by id)."""
+        now = timezone.now()
+        fields = {'updated_at'}
+        products = []
+        for attrs in validated_data:
+            product = instance[attrs.pop('id')]
+            for attr, value in attrs.items():
+                setattr(product, attr, value)
+                fields.add(attr)
+            # bulk_update() bypasses save(), so auto_now is not applied.
+            product.updated_at = now
+            products.append(product)
+
+        Product.objects.bulk_update(
+            products, fields, batch_size=settings.PRODUCT_BULK_BATCH_SIZE
+        )
+        return products
+
+
+class ProductBulkSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Serializer for products created in bulk."""
+
+    class Meta:
+        model = Product
+        fields = ['id', 'title', 'description', 'youtube', 'spotify']
+        read_only_fields = ['id']
+        list_serializer_class = ProductBulkListSerializer
+
+
+class ProductBulkUpdateSerializer(ProductBulkSerializer):
+    """Serializer for products updated in bulk."""
+    id = serializers.IntegerField()
+
+    def validate(self, attrs):
+        """Check the product to update is given.
+
+        Partial updates skip the required check of every field, id too.
+        """
+        if 'id' not in attrs:
+            raise serializers.ValidationError(
+                {'id': [self.fields['id'].error_messages['required']]}
+            )
+        return attrs
+
+
+class ProductBulkDeleteSerializer(serializers.Serializer):
+    """Serializer for the ids of products deleted in bulk."""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=settings.PRODUCT_BULK_MAX_ITEMS,
+    )
+
+
+class ProductImageSerializer(
+    TimedSerializerMixin,
+    serializers.ModelSerializer,
+):
     """Serializer for uploading images to product."""
+    # Images are validated from their header in validate_image rather than
+    # fully decoded by an ImageField.
+    image = serializers.FileField()
 
     class Meta:
         model = Product
-        fields = ['id', 'image']
+        fields = [
+            'id', 'image', 'image_thumbnail', 'image_medium', 'image_webp',
+        ]
         read_only_fields = ['id']
-        extra_kwargs = {'image': {'required': 'True'}}
+
+    def validate_image(self, value):
+        """Check the upload is an acceptable image, named after its format."""
+        value.name = uploads.image_name(uploads.validate_image_header(value))
+        return value
@@ -0,0 +1,74 @@
+"""
+Signal handlers for the product app.
+"""
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.models import (
+    ClothingSize,
+    Product,
+    Tag,
+)
+from product.cache import bump_catalog_version
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=ClothingSize)
+@receiver(post_delete, sender=ClothingSize)
+def invalidate_product_cache(sender, **kwargs):
+    """Invalidate cached product responses after a catalog write."""
+    bump_catalog_version()
+
+
+def _touch_products(**lookup):
+    """Mark the products matching lookup as updated.
+
+    Product ETags and Last-Modified derive from updated_at, so it has to
+    move when the tags or sizes a product is rendered with change.
+    """
+    Product.objects.filter(**lookup).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def touch_tagged_products(sender, instance, created=False, **kwargs):
+    """Mark the products of a renamed or deleted tag as updated."""
+    if not created:
+        _touch_products(tags=instance)
+
+
+@receiver(post_save, sender=ClothingSize)
+@receiver(pre_delete, sender=ClothingSize)
+def touch_sized_products(sender, instance, created=False, **kwargs):
+    """Mark the products of a renamed or deleted size as updated."""
+    if not created:
+        _touch_products(clothing_sizes=instance)
+
+
+@receiver(m2m_changed, sender=Product.tags.through)
+@receiver(m2m_changed, sender=Product.clothing_sizes.through)
+def invalidate_product_cache_on_assignment(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    """Invalidate cached product responses after tags or sizes change."""
+    if not reverse:
+        if action.startswith('post_'):
+            _touch_products(pk=instance.pk)
+    elif action in ('post_add', 'post_remove'):
+        _touch_products(pk__in=pk_set)
+    elif action == 'pre_clear':
+        # Afterwards nothing links the tag or size to its products.
+        field = 'tags' if sender is Product.tags.through else 'clothing_sizes'
+        _touch_products(**{field: instance})
+
+    if action.startswith('post_'):
+        bump_catalog_version()
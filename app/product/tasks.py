@@ -0,0 +1,181 @@
+"""
+Background tasks for the product app.
+
+Image renditions are generated by a small per-process thread pool so the
+upload request returns as soon as the original is stored. Pillow is only
+imported once there is an image to render. Jobs live in memory and are lost
+with their worker; the generate_renditions command picks them up again.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core import storage
+from core.models import Product
+from product import cache
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _renditions():
+    """Return the renditions to generate as (field, format, size, ext)."""
+    from PIL import features
+
+    renditions = [
+        ('image_thumbnail', 'JPEG', settings.PRODUCT_IMAGE_THUMBNAIL_SIZE,
+         '.jpg'),
+        ('image_medium', 'JPEG', settings.PRODUCT_IMAGE_MEDIUM_SIZE, '.jpg'),
+    ]
+    if features.check('webp'):
+        renditions.append(
+            ('image_webp', 'WEBP', settings.PRODUCT_IMAGE_MEDIUM_SIZE,
+             '.webp')
+        )
+
+    return renditions
+
+
+def _get_executor():
+    """Return the process wide rendition pool, starting it on first use.
+
+    The pool is created lazily so it is started in each forked worker
+    rather than in a parent process that preloads the application.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PRODUCT_IMAGE_WORKERS,
+                thread_name_prefix='product-image',
+            )
+
+    return _executor
+
+
+def _render(image, image_format, size):
+    """Return image scaled to fit size and encoded as image_format."""
+    rendition = image.copy()
+    rendition.thumbnail((size, size))
+    if image_format == 'JPEG' and rendition.mode not in ('RGB', 'L'):
+        rendition = rendition.convert('RGB')
+
+    buffer = BytesIO()
+    rendition.save(buffer, format=image_format, quality=85)
+    return buffer.getvalue()
+
+
+def _save_renditions(product):
+    """Store the renditions of product's image, returning their names."""
+    from PIL import Image, ImageOps
+
+    with product.image.open('rb') as f:
+        image = ImageOps.exif_transpose(Image.open(f))
+        image.load()
+
+    stem = os.path.splitext(os.path.basename(product.image.name))[0]
+    renditions = {}
+    for field, image_format, size, ext in _renditions():
+        file = getattr(product, field)
+        file.save(
+            f'{stem}{ext}',
+            ContentFile(_render(image, image_format, size)),
+            save=False,
+        )
+        renditions[field] = file.name
+
+    return renditions
+
+
+def generate_renditions(product_id):
+    """Generate and publish the renditions of a product image.
+
+    Failures are counted on the product, so missing_renditions stops
+    returning an image that cannot be rendered.
+    """
+    product = Product.objects.filter(pk=product_id).first()
+    if product is None:
+        return
+    if not product.image:
+        Product.objects.filter(
+            Q(image__isnull=True) | Q(image=''), pk=product_id
+        ).update(renditions_pending=False)
+        return
+
+    original = product.image.name
+    try:
+        renditions = _save_renditions(product)
+    except Exception:
+        Product.objects.filter(pk=product_id, image=original).update(
+            rendition_failures=F('rendition_failures') + 1
+        )
+        raise
+
+    # Only publish when the original was not replaced in the meantime.
+    # update() bypasses the signals that count file references.
+    with transaction.atomic():
+        updated = Product.objects.filter(
+            pk=product_id, image=original
+        ).update(
+            updated_at=timezone.now(), renditions_pending=False, **renditions
+        )
+        storage.acquire(renditions.values())
+        if not updated:
+            # Nothing points at the renditions, so leave them to collect().
+            storage.release(renditions.values())
+
+    if not updated:
+        return
+
+    cache.bump_catalog_version()
+
+
+def missing_renditions(min_age):
+    """Return the ids of the products whose image has no renditions.
+
+    Products updated in the last min_age seconds are left out, as their
+    renditions may still be in progress, and so are images that failed to
+    render PRODUCT_IMAGE_MAX_FAILURES times.
+    """
+    return list(
+        Product.objects.filter(
+            renditions_pending=True,
+            rendition_failures__lt=settings.PRODUCT_IMAGE_MAX_FAILURES,
+            updated_at__lt=timezone.now() - timedelta(seconds=min_age),
+        ).order_by('id').values_list('id', flat=True)
+    )
+
+
+def _run(product_id):
+    """Generate renditions on a pool thread."""
+    close_old_connections()
+    try:
+        generate_renditions(product_id)
+    except Exception:
+        logger.exception(
+            'Failed to generate renditions for product %s', product_id
+        )
+    finally:
+        close_old_connections()
+
+
+def enqueue_renditions(product_id):
+    """Generate the renditions of a product once the upload commits."""
+    def submit():
+        if settings.PRODUCT_IMAGE_WORKERS:
+            _get_executor().submit(_run, product_id)
+        else:
+            generate_renditions(product_id)
+
+    transaction.on_commit(submit)
@@ -0,0 +1,1351 @@
+"""
+Tests for the product API.
+"""
+import base64
+import os
+import shutil
+import tempfile
+import time
+from unittest.mock import patch
+
+from PIL import Image, features
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.move import file_move_safe
+from django.db import connection
+from django.db.models import Prefetch
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+
+from core.models import (
+    ClothingSize,
+    Product,
+    Tag,
+)
+from product import tasks
+from product.cache import get_catalog_version
+from product.pagination import ProductCursorPagination
+from product.serializers import ProductSerializers
+
+PRODUCTS_URL = reverse('product:product-list')
+BULK_URL = reverse('product:product-bulk')
+
+
+def detail_url(product_id):
+    """Create and return a product detail URL."""
+    return reverse('product:product-detail', args=[product_id])
+
+
+def create_user(email='user@example.com', password='testpass123'):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(email, password)
+
+
+def create_product(user, **params):
+    """Create and return a sample product."""
+    defaults = {
+        'title': 'Sample product',
+        'description': 'Sample description',
+        'youtube': 'https://youtube.com/watch?v=sample',
+        'spotify': 'https://open.spotify.com/episode/sample',
+    }
+    defaults.update(params)
+
+    return Product.objects.create(user=user, **defaults)
+
+
+class ProductPaginationTests(TestCase):
+    """Tests for the keyset pagination of the product list."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = create_user()
+
+    def test_list_is_paginated_newest_first(self):
+        """Test the list returns a page of products, newest first."""
+        products = [
+            create_product(self.user, title=f'Product {i}') for i in range(3)
+        ]
+
+        res = self.client.get(PRODUCTS_URL, {'page_size': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ids = [item['id'] for item in res.data['results']]
+        self.assertEqual(ids, [products[2].id, products[1].id])
+        self.assertIsNotNone(res.data['next'])
+        self.assertIsNone(res.data['previous'])
+
+    def test_following_cursor_returns_next_page(self):
+        """Test the next cursor walks the whole list without overlap."""
+        products = [
+            create_product(self.user, title=f'Product {i}') for i in range(5)
+        ]
+
+        seen = []
+        url, params = PRODUCTS_URL, {'page_size': 2}
+        while url:
+            res = self.client.get(url, params)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            seen.extend(item['id'] for item in res.data['results'])
+            url, params = res.data['next'], None
+
+        self.assertEqual(seen, [p.id for p in reversed(products)])
+
+    def test_cursor_walks_long_runs_of_ties(self):
+        """Test more rows than the offset cutoff sharing created_at."""
+        Product.objects.bulk_create([
+            Product(user=self.user, title=f'Product {i}')
+            for i in range(1500)
+        ])
+        Product.objects.update(created_at=timezone.now())
+        expected = list(
+            Product.objects.order_by('-id').values_list('id', flat=True)
+        )
+
+        seen = []
+        url, params = PRODUCTS_URL, {'page_size': 200}
+        while url:
+            res = self.client.get(url, params)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            seen.extend(item['id'] for item in res.data['results'])
+            last, url, params = res, res.data['next'], None
+        self.assertEqual(seen, expected)
+
+        seen = []
+        url = last.data['previous']
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            seen[:0] = [item['id'] for item in res.data['results']]
+            url = res.data['previous']
+        self.assertEqual(seen, expected[:1400])
+
+    def test_cursor_is_an_index_condition(self):
+        """Test a following page is bounded by the index, not filtered."""
+        for i in range(3):
+            create_product(self.user, title=f'Product {i}')
+        url = self.client.get(PRODUCTS_URL, {'page_size': 1}).data['next']
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        [sql] = [
+            q['sql'] for q in ctx.captured_queries
+            if 'FROM "core_product"' in q['sql']
+            and 'LIMIT' in q['sql']
+        ]
+        self.assertIn(
+            '("core_product"."created_at", "core_product"."id") <', sql
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f'EXPLAIN {sql}')
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+        self.assertIn('core_product_created_id_idx', plan)
+        self.assertIn('Index Cond: (ROW(created_at, id) <', plan)
+        self.assertNotIn('Filter', plan)
+
+    def test_invalid_cursor(self):
+        """Test a malformed cursor is rejected."""
+        cursor = base64.b64encode(b'p=["not a date","1"]').decode()
+
+        res = self.client.get(PRODUCTS_URL, {'cursor': cursor})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    @patch.object(ProductCursorPagination, 'max_page_size', 2)
+    def test_page_size_is_capped(self):
+        """Test page_size above the configured maximum is clamped."""
+        for i in range(3):
+            create_product(self.user, title=f'Product {i}')
+
+        res = self.client.get(PRODUCTS_URL, {'page_size': 10})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 2)
+
+
+class ProductQueryTests(TestCase):
+    """Tests for the SQL emitted by the product endpoints."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = create_user()
+        self.other_user = create_user(email='other@example.com')
+        self.product = create_product(self.user)
+        create_product(self.other_user)
+
+    def _product_queries(self, url, params=None):
+        """Request url and return the SQL of the product queries it ran."""
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(url, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res, [
+            q['sql'] for q in ctx.captured_queries
+            if 'FROM "core_product"' in q['sql']
+        ]
+
+    def test_list_without_filters_is_not_distinct(self):
+        """Test the unfiltered list neither joins nor deduplicates."""
+        res, queries = self._product_queries(PRODUCTS_URL)
+
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertEqual(len(queries), 2)
+        for sql in queries:
+            self.assertNotIn('DISTINCT', sql)
+            self.assertNotIn('JOIN', sql)
+            self.assertNotIn('WHERE', sql)
+
+    def test_filter_by_owner(self):
+        """Test filtering by owner is a plain condition on the product."""
+        res, queries = self._product_queries(
+            PRODUCTS_URL, {'owner': f'{self.user.id}'}
+        )
+
+        self.assertEqual(
+            [item['id'] for item in res.data['results']], [self.product.id]
+        )
+        self.assertEqual(len(queries), 2)
+        for sql in queries:
+            self.assertIn('"core_product"."user_id" IN (', sql)
+            self.assertNotIn('DISTINCT', sql)
+            self.assertNotIn('JOIN', sql)
+
+    def test_filter_by_invalid_owner(self):
+        """Test a malformed owner filter is rejected."""
+        res = self.client.get(PRODUCTS_URL, {'owner': 'abc'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_detail_is_not_distinct(self):
+        """Test the detail lookups are primary key fetches."""
+        res, queries = self._product_queries(detail_url(self.product.id))
+
+        self.assertEqual(res.data['id'], self.product.id)
+        self.assertEqual(len(queries), 2)
+        for sql in queries:
+            self.assertNotIn('DISTINCT', sql)
+            self.assertIn('"core_product"."id" = ', sql)
+
+
+class ProductTagTests(TestCase):
+    """Tests for tags and clothing sizes on products."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+
+    def test_create_product_with_tags_and_sizes(self):
+        """Test creating a product creates its tags and clothing sizes."""
+        existing = Tag.objects.create(user=self.user, name='Jazz')
+        payload = {
+            'title': 'Jazz hour',
+            'tags': [{'name': 'Jazz'}, {'name': 'Live'}],
+            'clothing_sizes': [{'name': 'M'}],
+        }
+
+        res = self.client.post(PRODUCTS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        product = Product.objects.get(id=res.data['id'])
+        self.assertEqual(
+            sorted(product.tags.values_list('name', flat=True)),
+            ['Jazz', 'Live'],
+        )
+        self.assertIn(existing, product.tags.all())
+        self.assertEqual(
+            list(product.clothing_sizes.values_list('name', flat=True)),
+            ['M'],
+        )
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+
+    def _create_queries(self, payload):
+        """Create a product and return the number of queries it ran."""
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.post(PRODUCTS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return len(ctx.captured_queries)
+
+    def test_create_tags_in_constant_queries(self):
+        """Test tags and sizes are resolved in batches, not per name."""
+        few = self._create_queries({
+            'title': 'Few',
+            'tags': [{'name': 'a'}],
+            'clothing_sizes': [{'name': 'S'}],
+        })
+        many = self._create_queries({
+            'title': 'Many',
+            'tags': [{'name': name} for name in 'abcdef'],
+            'clothing_sizes': [{'name': name} for name in ['S', 'M', 'L']],
+        })
+
+        self.assertEqual(many, few)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 6)
+
+    def test_create_with_repeated_names(self):
+        """Test a name repeated in the payload is assigned once."""
+        res = self.client.post(
+            PRODUCTS_URL,
+            {'title': 'Jazz', 'tags': [{'name': 'Jazz'}, {'name': 'Jazz'}]},
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [tag['name'] for tag in res.data['tags']], ['Jazz']
+        )
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+
+    def test_update_replaces_tags(self):
+        """Test updating tags replaces the product's tags."""
+        product = create_product(self.user)
+        product.tags.add(Tag.objects.create(user=self.user, name='Old'))
+
+        res = self.client.patch(
+            detail_url(product.id),
+            {'tags': [{'name': 'New'}]},
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            list(product.tags.values_list('name', flat=True)), ['New']
+        )
+
+    def test_filter_by_tags(self):
+        """Test filtering by tags uses an EXISTS subquery."""
+        jazz = Tag.objects.create(user=self.user, name='Jazz')
+        rock = Tag.objects.create(user=self.user, name='Rock')
+        both = create_product(self.user, title='Both')
+        both.tags.add(jazz, rock)
+        only_rock = create_product(self.user, title='Rock')
+        only_rock.tags.add(rock)
+        create_product(self.user, title='Untagged')
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(
+                PRODUCTS_URL, {'tags': f'{jazz.id},{rock.id}'}
+            )
+
+        self.assertEqual(
+            [item['id'] for item in res.data['results']],
+            [only_rock.id, both.id],
+        )
+        queries = [
+            q['sql'] for q in ctx.captured_queries
+            if 'FROM "core_product"' in q['sql']
+        ]
+        self.assertEqual(len(queries), 2)
+        for sql in queries:
+            self.assertIn('EXISTS', sql)
+            self.assertNotIn('DISTINCT', sql)
+            self.assertNotIn('JOIN', sql)
+
+    def test_filter_by_clothing_sizes(self):
+        """Test filtering by clothing sizes."""
+        small = ClothingSize.objects.create(user=self.user, name='S')
+        large = ClothingSize.objects.create(user=self.user, name='L')
+        product = create_product(self.user)
+        product.clothing_sizes.add(small)
+        create_product(self.user).clothing_sizes.add(large)
+
+        res = self.client.get(PRODUCTS_URL, {'clothing_sizes': small.id})
+
+        self.assertEqual(
+            [item['id'] for item in res.data['results']], [product.id]
+        )
+        self.assertEqual(res.data['results'][0]['clothing_sizes'], [
+            {'id': small.id, 'name': 'S'},
+        ])
+
+    def test_filter_by_invalid_tags(self):
+        """Test a malformed tags filter is rejected."""
+        res = self.client.get(PRODUCTS_URL, {'tags': '1,x'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def _count_list_queries(self):
+        """Return the number of queries a list request runs."""
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(PRODUCTS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return len(ctx.captured_queries)
+
+    def test_list_query_count_is_constant(self):
+        """Test tags and sizes are prefetched rather than fetched per row."""
+        tag = Tag.objects.create(user=self.user, name='Jazz')
+        size = ClothingSize.objects.create(user=self.user, name='M')
+        product = create_product(self.user)
+        product.tags.add(tag)
+        product.clothing_sizes.add(size)
+        expected = self._count_list_queries()
+
+        for i in range(5):
+            product = create_product(self.user, title=f'Product {i}')
+            product.tags.add(tag)
+            product.clothing_sizes.add(size)
+
+        self.assertEqual(self._count_list_queries(), expected)
+
+    def test_tag_assignment_invalidates_cache(self):
+        """Test adding a tag to a product invalidates cached lists."""
+        product = create_product(self.user)
+        self.client.get(PRODUCTS_URL)
+
+        product.tags.add(Tag.objects.create(user=self.user, name='Jazz'))
+        res = self.client.get(PRODUCTS_URL)
+
+        self.assertEqual(
+            [tag['name'] for tag in res.json()['results'][0]['tags']],
+            ['Jazz'],
+        )
+
+
+class ProductListSerializerTests(TestCase):
+    """Tests for the row based product list serializer."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = create_user()
+
+    def test_list_matches_model_serializer(self):
+        """Test the list renders exactly what ProductSerializers would."""
+        jazz = Tag.objects.create(user=self.user, name='Jazz')
+        live = Tag.objects.create(user=self.user, name='Live')
+        size = ClothingSize.objects.create(user=self.user, name='M')
+        tagged = create_product(self.user, title='Tagged é')
+        tagged.tags.add(live, jazz)
+        tagged.clothing_sizes.add(size)
+        with_images = create_product(
+            self.user,
+            image='uploads/cas/ab/abc.jpg',
+            image_thumbnail='uploads/product/thumb é.jpg',
+        )
+        create_product(self.user, title='Plain', youtube='', spotify='')
+
+        res = self.client.get(PRODUCTS_URL)
+
+        request = APIRequestFactory().get(PRODUCTS_URL)
+        products = Product.objects.order_by(
+            '-created_at', '-id'
+        ).prefetch_related(
+            Prefetch('tags', queryset=Tag.objects.order_by('id')),
+            Prefetch(
+                'clothing_sizes', queryset=ClothingSize.objects.order_by('id')
+            ),
+        )
+        expected = ProductSerializers(
+            products, many=True, context={'request': request}
+        ).data
+        renderer = JSONRenderer()
+        self.assertEqual(
+            renderer.render(res.data['results']), renderer.render(expected)
+        )
+        self.assertEqual(
+            [item['id'] for item in res.data['results']][1],
+            with_images.id,
+        )
+
+    def test_list_loads_relations_once(self):
+        """Test relations are loaded with one query each for the page."""
+        tag = Tag.objects.create(user=self.user, name='Jazz')
+        for i in range(5):
+            create_product(self.user, title=f'Product {i}').tags.add(tag)
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(PRODUCTS_URL)
+
+        self.assertEqual(len(res.data['results']), 5)
+        tag_queries = [
+            q['sql'] for q in ctx.captured_queries
+            if 'FROM "core_producttag"' in q['sql']
+        ]
+        self.assertEqual(len(tag_queries), 1)
+
+
+class ProductCacheTests(TestCase):
+    """Tests for the versioned product response cache."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = create_user()
+        self.product = create_product(self.user)
+
+    def test_repeated_list_is_served_from_cache(self):
+        """Test a repeated list request only queries its validators."""
+        first = self.client.get(PRODUCTS_URL)
+
+        with self.assertNumQueries(1):
+            second = self.client.get(PRODUCTS_URL)
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['Content-Type'], first['Content-Type'])
+
+    def test_repeated_detail_is_served_from_cache(self):
+        """Test a repeated detail request only queries its validators."""
+        url = detail_url(self.product.id)
+        first = self.client.get(url)
+
+        with self.assertNumQueries(1):
+            second = self.client.get(url)
+
+        self.assertEqual(second.content, first.content)
+
+    def test_query_params_are_part_of_the_key(self):
+        """Test differently filtered lists are cached separately."""
+        other = create_product(create_user(email='other@example.com'))
+        self.client.get(PRODUCTS_URL)
+
+        res = self.client.get(PRODUCTS_URL, {'owner': other.user.id})
+
+        self.assertEqual(
+            [item['id'] for item in res.json()['results']], [other.id]
+        )
+
+    def test_save_invalidates_cache(self):
+        """Test saving a product invalidates cached responses."""
+        url = detail_url(self.product.id)
+        self.client.get(PRODUCTS_URL)
+        self.client.get(url)
+
+        self.product.title = 'New title'
+        self.product.save()
+
+        list_res = self.client.get(PRODUCTS_URL)
+        detail_res = self.client.get(url)
+        self.assertEqual(list_res.json()['results'][0]['title'], 'New title')
+        self.assertEqual(detail_res.json()['title'], 'New title')
+
+    def test_delete_invalidates_cache(self):
+        """Test deleting a product invalidates cached responses."""
+        url = detail_url(self.product.id)
+        self.client.get(PRODUCTS_URL)
+        self.client.get(url)
+
+        self.product.delete()
+
+        self.assertEqual(self.client.get(PRODUCTS_URL).json()['results'], [])
+        self.assertEqual(
+            self.client.get(url).status_code, status.HTTP_404_NOT_FOUND
+        )
+
+    def test_browsable_api_is_not_cached(self):
+        """Test only JSON responses are cached."""
+        self.client.get(PRODUCTS_URL, {'format': 'api'})
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(PRODUCTS_URL, {'format': 'api'})
+
+        self.assertGreater(len(ctx.captured_queries), 0)
+
+
+class ProductConditionalGetTests(TestCase):
+    """Tests for ETag and Last-Modified handling of product resources."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = create_user()
+        self.product = create_product(self.user)
+
+    def test_list_emits_validators(self):
+        """Test the list response carries an ETag and Last-Modified."""
+        res = self.client.get(PRODUCTS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res['ETag'].startswith('"'))
+        self.assertEqual(
+            res['Last-Modified'],
+            http_date(int(self.product.updated_at.timestamp())),
+        )
+
+    def test_list_if_none_match_returns_not_modified(self):
+        """Test a matching If-None-Match is answered with one query."""
+        etag = self.client.get(PRODUCTS_URL)['ETag']
+        cache.clear()
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(PRODUCTS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+        self.assertEqual(res.content, b'')
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertIn('COUNT(', ctx.captured_queries[0]['sql'])
+        self.assertIn('MAX(', ctx.captured_queries[0]['sql'])
+
+    def test_validators_see_writes_missed_by_the_cache(self):
+        """Test writes made without bumping the cache change the ETag."""
+        etag = self.client.get(PRODUCTS_URL)['ETag']
+        Product.objects.filter(pk=self.product.pk).update(
+            updated_at=timezone.now()
+        )
+
+        res = self.client.get(PRODUCTS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_list_if_modified_since_returns_not_modified(self):
+        """Test an up to date If-Modified-Since is answered with 304."""
+        last_modified = self.client.get(PRODUCTS_URL)['Last-Modified']
+
+        res = self.client.get(
+            PRODUCTS_URL, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_etag_changes_after_write(self):
+        """Test creating and deleting products changes the list ETag."""
+        etag = self.client.get(PRODUCTS_URL)['ETag']
+
+        other = create_product(self.user, title='Other')
+        res = self.client.get(PRODUCTS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+        other.delete()
+        res = self.client.get(PRODUCTS_URL, HTTP_IF_NONE_MATCH=res['ETag'])
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_list_etag_depends_on_query(self):
+        """Test different pages of the list have different ETags."""
+        etag = self.client.get(PRODUCTS_URL)['ETag']
+
+        res = self.client.get(PRODUCTS_URL, {'page_size': 1})
+
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_detail_if_none_match_returns_not_modified(self):
+        """Test a matching If-None-Match on the detail returns 304."""
+        url = detail_url(self.product.id)
+        etag = self.client.get(url)['ETag']
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_etag_changes_after_update(self):
+        """Test updating a product changes its ETag."""
+        url = detail_url(self.product.id)
+        etag = self.client.get(url)['ETag']
+
+        self.product.title = 'New title'
+        self.product.save()
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['title'], 'New title')
+
+    def test_etags_change_after_tag_assigned(self):
+        """Test assigning a tag changes the list and detail ETags."""
+        url = detail_url(self.product.id)
+        list_etag = self.client.get(PRODUCTS_URL)['ETag']
+        detail_etag = self.client.get(url)['ETag']
+        tag = Tag.objects.create(user=self.user, name='Jazz')
+
+        tag.product_set.add(self.product)
+
+        res = self.client.get(PRODUCTS_URL, HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['tags'][0]['name'], 'Jazz')
+
+    def test_detail_etag_changes_after_tag_renamed(self):
+        """Test renaming a product's tag changes its ETag."""
+        url = detail_url(self.product.id)
+        tag = Tag.objects.create(user=self.user, name='Jazz')
+        self.product.tags.add(tag)
+        etag = self.client.get(url)['ETag']
+
+        tag.name = 'Blues'
+        tag.save()
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['tags'][0]['name'], 'Blues')
+
+    def test_detail_etag_changes_after_size_deleted(self):
+        """Test deleting a product's size changes its ETag."""
+        url = detail_url(self.product.id)
+        size = ClothingSize.objects.create(user=self.user, name='M')
+        self.product.clothing_sizes.add(size)
+        etag = self.client.get(url)['ETag']
+
+        size.delete()
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['clothing_sizes'], [])
+
+    def test_missing_detail_has_no_validators(self):
+        """Test a missing product is a plain 404."""
+        res = self.client.get(detail_url(self.product.id + 1))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(res.has_header('ETag'))
+
+
+class ProductBulkApiTests(TestCase):
+    """Tests for the bulk product endpoints."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_requires_authentication(self):
+        """Test anonymous requests to the bulk endpoints are refused."""
+        client = APIClient()
+
+        for method in (client.post, client.patch, client.delete):
+            res = method(BULK_URL, [], format='json')
+            self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_bulk_with_token(self):
+        """Test the bulk endpoints accept the user's API token."""
+        token = Token.objects.create(user=self.user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        res = client.post(BULK_URL, [{'title': 'New'}], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(
+            Product.objects.filter(user=self.user, title='New').exists()
+        )
+
+    def test_bulk_create(self):
+        """Test creating many products in a single request."""
+        payload = [
+            {'title': f'Product {i}', 'youtube': f'yt{i}'} for i in range(3)
+        ]
+
+        with self.assertNumQueries(3):
+            res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        products = Product.objects.filter(user=self.user).order_by('id')
+        self.assertEqual(
+            [p.title for p in products], [item['title'] for item in payload]
+        )
+        self.assertEqual(
+            [item['id'] for item in res.data], [p.id for p in products]
+        )
+
+    def test_bulk_create_reports_errors_by_index(self):
+        """Test invalid items are reported by index and nothing is saved."""
+        payload = [
+            {'title': 'Valid'},
+            {'title': ''},
+            {'title': 'Valid too'},
+            {'youtube': 'missing title'},
+        ]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(sorted(res.data), [1, 3])
+        self.assertIn('title', res.data[1])
+        self.assertFalse(Product.objects.exists())
+
+    def test_bulk_create_rejects_non_list(self):
+        """Test the bulk payload must be a list."""
+        res = self.client.post(BULK_URL, {'title': 'x'}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(PRODUCT_BULK_MAX_ITEMS=2)
+    def test_bulk_create_limits_items(self):
+        """Test payloads above the configured size are rejected."""
+        payload = [{'title': f'Product {i}'} for i in range(3)]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Product.objects.exists())
+
+    def test_bulk_create_invalidates_cache(self):
+        """Test bulk created products show up in cached lists."""
+        self.client.get(PRODUCTS_URL)
+
+        self.client.post(BULK_URL, [{'title': 'New'}], format='json')
+        res = self.client.get(PRODUCTS_URL)
+
+        self.assertEqual(res.json()['results'][0]['title'], 'New')
+
+    def test_bulk_update(self):
+        """Test partially updating many products in a single request."""
+        products = [create_product(self.user) for _ in range(2)]
+        before = products[0].updated_at
+        payload = [
+            {'id': products[0].id, 'title': 'First'},
+            {'id': products[1].id, 'spotify': 'new spotify'},
+        ]
+
+        res = self.client.patch(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        for product in products:
+            product.refresh_from_db()
+        self.assertEqual(products[0].title, 'First')
+        self.assertEqual(products[1].spotify, 'new spotify')
+        self.assertEqual(products[1].title, 'Sample product')
+        self.assertGreater(products[0].updated_at, before)
+
+    def test_bulk_update_other_users_product(self):
+        """Test products of other users cannot be bulk updated."""
+        own = create_product(self.user)
+        other = create_product(create_user(email='other@example.com'))
+        payload = [
+            {'id': own.id, 'title': 'Mine'},
+            {'id': other.id, 'title': 'Not mine'},
+        ]
+
+        res = self.client.patch(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(res.data), [1])
+        self.assertIn('id', res.data[1])
+        own.refresh_from_db()
+        self.assertEqual(own.title, 'Sample product')
+
+    def test_bulk_update_requires_id(self):
+        """Test items without an id are rejected rather than failing."""
+        product = create_product(self.user)
+        payload = [{'id': product.id, 'title': 'First'}, {'title': 'x'}]
+
+        res = self.client.patch(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(res.data), [1])
+        self.assertIn('id', res.data[1])
+        product.refresh_from_db()
+        self.assertEqual(product.title, 'Sample product')
+
+    def test_bulk_update_string_id(self):
+        """Test ids given as numeric strings find their product."""
+        product = create_product(self.user)
+        payload = [{'id': str(product.id), 'title': 'First'}]
+
+        res = self.client.patch(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data[0]['id'], product.id)
+        product.refresh_from_db()
+        self.assertEqual(product.title, 'First')
+
+    def test_bulk_delete(self):
+        """Test deleting many of the user's products in one request."""
+        products = [create_product(self.user) for _ in range(3)]
+        other = create_product(create_user(email='other@example.com'))
+        ids = [products[0].id, products[1].id, other.id]
+
+        res = self.client.delete(BULK_URL, {'ids': ids}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['deleted'], 2)
+        self.assertEqual(
+            set(Product.objects.values_list('id', flat=True)),
+            {products[2].id, other.id},
+        )
+
+    def test_bulk_delete_bumps_catalog_version_once(self):
+        """Test a bulk delete bumps the catalog version once, not per row."""
+        # bulk_create sends no signals, so nothing is pending beforehand.
+        products = Product.objects.bulk_create(
+            Product(user=self.user, title=f'Product {i}') for i in range(3)
+        )
+        ids = [product.id for product in products]
+        version = get_catalog_version()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.delete(BULK_URL, {'ids': ids}, format='json')
+            self.assertEqual(get_catalog_version(), version + 1)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(get_catalog_version(), version + 2)
+
+
+def image_upload_url(product_id):
+    """Create and return an image upload URL."""
+    return reverse('product:product-upload-image', args=[product_id])
+
+
+def create_image_file(size=(1200, 800), image_format='JPEG', suffix='.jpg'):
+    """Create and return a temporary image file opened for reading."""
+    image_file = tempfile.NamedTemporaryFile(suffix=suffix)
+    Image.new('RGB', size, color='red').save(image_file, format=image_format)
+    image_file.seek(0)
+    return image_file
+
+
+@override_settings(PRODUCT_IMAGE_WORKERS=0, STORED_FILE_GRACE=0)
+class ImageUploadTests(TestCase):
+    """Tests for the image upload API."""
+
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.product = create_product(self.user)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def test_upload_image(self):
+        """Test uploading an image stores it and schedules renditions."""
+        url = image_upload_url(self.product.id)
+        with create_image_file() as image_file:
+            with self.captureOnCommitCallbacks() as callbacks:
+                res = self.client.post(
+                    url, {'image': image_file}, format='multipart'
+                )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('image', res.data)
+        self.assertIsNone(res.data['image_thumbnail'])
+        self.product.refresh_from_db()
+        self.assertTrue(os.path.exists(self.product.image.path))
+        self.assertTrue(self.product.renditions_pending)
+        self.assertTrue(callbacks)
+
+    def test_image_not_writable_by_update(self):
+        """Test images can only be set through the upload actions."""
+        with create_image_file() as image_file:
+            res = self.client.patch(
+                detail_url(self.product.id),
+                {'title': 'New', 'image': image_file},
+                format='multipart',
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.title, 'New')
+        self.assertFalse(self.product.image)
+
+    def test_renditions_are_generated_after_commit(self):
+        """Test the renditions are generated and exposed once ready."""
+        url = image_upload_url(self.product.id)
+        with create_image_file() as image_file:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(
+                    url, {'image': image_file}, format='multipart'
+                )
+
+        self.product.refresh_from_db()
+        expected = [
+            (self.product.image_thumbnail, 'JPEG', 320),
+            (self.product.image_medium, 'JPEG', 1024),
+        ]
+        if features.check('webp'):
+            expected.append((self.product.image_webp, 'WEBP', 1024))
+        else:
+            self.assertFalse(self.product.image_webp)
+        for file, image_format, size in expected:
+            with Image.open(file.path) as image:
+                self.assertEqual(image.format, image_format)
+                self.assertEqual(max(image.size), size)
+
+        self.assertFalse(self.product.renditions_pending)
+        res = self.client.get(detail_url(self.product.id))
+        self.assertTrue(
+            res.data['image_thumbnail'].endswith(
+                self.product.image_thumbnail.url
+            )
+        )
+
+    def test_rendition_failures_counted(self):
+        """Test images that cannot be rendered have their failures counted."""
+        self.product.image.save('broken.jpg', ContentFile(b'not an image'))
+        Product.objects.filter(pk=self.product.pk).update(
+            renditions_pending=True
+        )
+
+        for _ in range(2):
+            with self.assertRaises(OSError):
+                tasks.generate_renditions(self.product.id)
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.rendition_failures, 2)
+        self.assertTrue(self.product.renditions_pending)
+
+    def test_reupload_clears_previous_renditions(self):
+        """Test uploading a new image drops the old renditions at once."""
+        url = image_upload_url(self.product.id)
+        with create_image_file() as image_file:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(
+                    url, {'image': image_file}, format='multipart'
+                )
+
+        with create_image_file() as image_file:
+            res = self.client.post(
+                url, {'image': image_file}, format='multipart'
+            )
+
+        self.assertIsNone(res.data['image_thumbnail'])
+        self.product.refresh_from_db()
+        self.assertFalse(self.product.image_thumbnail)
+
+    def test_stale_renditions_are_discarded(self):
+        """Test renditions of a replaced image are not published."""
+        url = image_upload_url(self.product.id)
+        with create_image_file() as image_file:
+            self.client.post(url, {'image': image_file}, format='multipart')
+        self.product.refresh_from_db()
+
+        with patch('product.tasks.Product.objects.filter') as mock_filter:
+            mock_filter.return_value.first.return_value = self.product
+            mock_filter.return_value.update.return_value = 0
+            with self.captureOnCommitCallbacks(execute=True):
+                tasks.generate_renditions(self.product.id)
+
+        self.product.refresh_from_db()
+        self.assertFalse(self.product.image_thumbnail)
+        stored = [
+            os.path.join(root, name)
+            for root, _, names in os.walk(self.media_root) for name in names
+        ]
+        self.assertEqual(stored, [self.product.image.path])
+
+    @override_settings(PRODUCT_IMAGE_WORKERS=2)
+    def test_renditions_are_queued_on_the_pool(self):
+        """Test renditions run on the worker pool when it is enabled."""
+        with patch('product.tasks._get_executor') as mock_executor:
+            with self.captureOnCommitCallbacks(execute=True):
+                tasks.enqueue_renditions(self.product.id)
+
+        mock_executor.return_value.submit.assert_called_once_with(
+            tasks._run, self.product.id
+        )
+
+    def test_upload_image_bad_request(self):
+        """Test uploading an invalid image."""
+        url = image_upload_url(self.product.id)
+        res = self.client.post(
+            url, {'image': 'notanimage'}, format='multipart'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+def chunked_upload_url(product_id):
+    """Create and return a resumable image upload URL."""
+    return reverse('product:product-upload-image-chunked', args=[product_id])
+
+
+@override_settings(PRODUCT_IMAGE_WORKERS=0)
+class StreamingImageUploadTests(TestCase):
+    """Tests for streamed and resumable image uploads."""
+
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.client = APIClient()
+        self.user = create_user()
+        self.product = create_product(self.user)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def _stored_files(self):
+        """Return the paths of every file under MEDIA_ROOT."""
+        return [
+            os.path.join(root, name)
+            for root, _, names in os.walk(self.media_root) for name in names
+        ]
+
+    def test_upload_is_moved_into_storage(self):
+        """Test a multipart upload is moved, not copied, into storage."""
+        url = image_upload_url(self.product.id)
+        with create_image_file() as image_file:
+            with patch(
+                'core.storage.file_move_safe', wraps=file_move_safe
+            ) as mock_move:
+                res = self.client.post(
+                    url, {'image': image_file}, format='multipart'
+                )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.product.refresh_from_db()
+        mock_move.assert_called_once()
+        self.assertEqual(mock_move.call_args[0][1], self.product.image.path)
+        self.assertEqual(self._stored_files(), [self.product.image.path])
+        with Image.open(self.product.image.path) as image:
+            self.assertEqual(image.size, (1200, 800))
+
+    def test_upload_is_validated_without_decoding(self):
+        """Test validating an upload only reads the image header."""
+        url = image_upload_url(self.product.id)
+        with create_image_file() as image_file:
+            with patch('PIL.ImageFile.ImageFile.load') as mock_load:
+                res = self.client.post(
+                    url, {'image': image_file}, format='multipart'
+                )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        mock_load.assert_not_called()
+
+    def test_invalid_upload_is_removed(self):
+        """Test a file that is not an image is rejected and deleted."""
+        url = image_upload_url(self.product.id)
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as bad_file:
+            bad_file.write(b'not an image')
+            bad_file.seek(0)
+            res = self.client.post(
+                url, {'image': bad_file}, format='multipart'
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self._stored_files(), [])
+
+    @override_settings(PRODUCT_IMAGE_MAX_PIXELS=100 * 100)
+    def test_oversized_image_is_rejected(self):
+        """Test images above the pixel limit are rejected from the header."""
+        url = image_upload_url(self.product.id)
+        with create_image_file(size=(101, 100)) as image_file:
+            res = self.client.post(
+                url, {'image': image_file}, format='multipart'
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self._stored_files(), [])
+        self.product.refresh_from_db()
+        self.assertFalse(self.product.image)
+
+    def test_upload_is_named_after_its_format(self):
+        """Test the stored name ignores the extension sent by the client."""
+        url = image_upload_url(self.product.id)
+        image_file = create_image_file(image_format='PNG', suffix='.jpg')
+        with image_file:
+            res = self.client.post(
+                url, {'image': image_file}, format='multipart'
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.product.refresh_from_db()
+        self.assertTrue(self.product.image.name.endswith('.png'))
+
+    def _start_upload(self):
+        """Start a resumable upload and return its id."""
+        res = self.client.post(chunked_upload_url(self.product.id))
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return res.data['upload_id']
+
+    def _put_chunk(self, upload_id, data, start, total):
+        """Send data as the chunk at start of a total byte upload."""
+        end = start + len(data) - 1
+        return self.client.put(
+            chunked_upload_url(self.product.id),
+            data,
+            content_type='application/octet-stream',
+            HTTP_UPLOAD_ID=upload_id,
+            HTTP_CONTENT_RANGE=f'bytes {start}-{end}/{total}',
+        )
+
+    def test_chunked_upload(self):
+        """Test an image sent in chunks is assembled and set."""
+        with create_image_file(image_format='PNG', suffix='.png') as f:
+            content = f.read()
+        upload_id = self._start_upload()
+        chunks = [content[i:i + 1000] for i in range(0, len(content), 1000)]
+
+        start = 0
+        with self.captureOnCommitCallbacks(execute=True):
+            for chunk in chunks:
+                res = self._put_chunk(upload_id, chunk, start, len(content))
+                start += len(chunk)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.product.refresh_from_db()
+        self.assertTrue(self.product.image.name.endswith('.png'))
+        with open(self.product.image.path, 'rb') as f:
+            self.assertEqual(f.read(), content)
+        self.assertTrue(self.product.image_thumbnail)
+
+    def test_chunked_upload_resume(self):
+        """Test a client can resume from the offset the server reports."""
+        with create_image_file() as f:
+            content = f.read()
+        upload_id = self._start_upload()
+        res = self._put_chunk(upload_id, content[:100], 0, len(content))
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(res.data['offset'], 100)
+
+        res = self._put_chunk(upload_id, content[200:], 200, len(content))
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(res.data['offset'], 100)
+
+        res = self.client.get(
+            chunked_upload_url(self.product.id), {'upload_id': upload_id}
+        )
+        self.assertEqual(res.data['offset'], 100)
+
+        res = self._put_chunk(upload_id, content[100:], 100, len(content))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_chunked_upload_invalid_image(self):
+        """Test a completed upload that is not an image is discarded."""
+        upload_id = self._start_upload()
+
+        res = self._put_chunk(upload_id, b'not an image', 0, 12)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self._stored_files(), [])
+
+    def test_chunked_upload_unknown_id(self):
+        """Test chunks for an unknown upload are rejected."""
+        res = self._put_chunk('0' * 32, b'data', 0, 4)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self._stored_files(), [])
+
+    @override_settings(PRODUCT_IMAGE_MAX_OPEN_UPLOADS=2)
+    def test_chunked_uploads_in_progress_limited(self):
+        """Test a product only has a few resumable uploads at once."""
+        self._start_upload()
+        self._start_upload()
+
+        res = self.client.post(chunked_upload_url(self.product.id))
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        other = create_product(self.user)
+        res = self.client.post(chunked_upload_url(other.id))
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    @override_settings(PRODUCT_IMAGE_UPLOAD_TTL=60)
+    def test_expired_chunked_uploads_removed(self):
+        """Test uploads idle past the TTL are deleted by the next start."""
+        upload_id = self._start_upload()
+        res = self._put_chunk(upload_id, b'data', 0, 10)
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        [path] = self._stored_files()
+        idle_since = time.time() - 61
+        os.utime(path, (idle_since, idle_since))
+
+        self._start_upload()
+
+        self.assertNotIn(path, self._stored_files())
+        res = self.client.get(
+            chunked_upload_url(self.product.id), {'upload_id': upload_id}
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(PRODUCT_IMAGE_MAX_UPLOAD_SIZE=10)
+    def test_chunked_upload_too_large(self):
+        """Test uploads above the size limit are refused up front."""
+        upload_id = self._start_upload()
+
+        res = self._put_chunk(upload_id, b'data', 0, 11)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ProductSearchTests(TestCase):
+    """Tests for full-text search of the product list."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = create_user()
+
+    def _search(self, text, **params):
+        """Search the product list and return the matching ids."""
+        res = self.client.get(PRODUCTS_URL, {'q': text, **params})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [item['id'] for item in res.data['results']]
+
+    def test_search_ranks_title_over_description(self):
+        """Test title matches rank above description matches."""
+        in_description = create_product(
+            self.user, title='Weekly show', description='All about jazz'
+        )
+        in_title = create_product(
+            self.user, title='Jazz hour', description='Music'
+        )
+        create_product(self.user, title='Rock', description='Guitars')
+
+        self.assertEqual(
+            self._search('jazz'), [in_title.id, in_description.id]
+        )
+
+    def test_search_matches_word_forms(self):
+        """Test search matches stemmed word forms."""
+        product = create_product(self.user, title='Running tips')
+
+        self.assertEqual(self._search('runs'), [product.id])
+
+    def test_search_reflects_updates(self):
+        """Test the search vector follows title changes."""
+        product = create_product(self.user, title='Old title')
+        product.title = 'Renamed episode'
+        product.save()
+
+        self.assertEqual(self._search('renamed'), [product.id])
+        self.assertEqual(self._search('old'), [])
+
+    def test_search_uses_text_search_operator(self):
+        """Test matching runs against the indexed search vector."""
+        create_product(self.user, title='Jazz hour')
+
+        with CaptureQueriesContext(connection) as ctx:
+            self._search('jazz')
+
+        queries = [
+            q['sql'] for q in ctx.captured_queries
+            if 'FROM "core_product"' in q['sql']
+        ]
+        self.assertEqual(len(queries), 2)
+        for sql in queries:
+            self.assertIn('"core_product"."search_vector" @@', sql)
+
+    def test_search_results_paginate_by_rank(self):
+        """Test the cursor walks equally ranked results without overlap."""
+        products = [
+            create_product(self.user, title=f'Jazz {i}') for i in range(5)
+        ]
+
+        seen = []
+        url, params = PRODUCTS_URL, {'q': 'jazz', 'page_size': 2}
+        while url:
+            res = self.client.get(url, params)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            seen.extend(item['id'] for item in res.data['results'])
+            url, params = res.data['next'], None
+
+        self.assertEqual(seen, [p.id for p in reversed(products)])
@@ -0,0 +1,285 @@
+"""
+Streaming and resumable uploads of product images.
+
+Uploads are streamed to a partial file under MEDIA_ROOT, hashed on the way
+in, and validated from the image header alone, so a large upload is never
+held in memory nor fully decoded on the request path. Saving one moves the
+partial file into the content addressed storage without copying it.
+
+Stored images are named after their detected format, never the client's
+file name. Partial files untouched for PRODUCT_IMAGE_UPLOAD_TTL seconds are
+deleted whenever a resumable upload starts, so abandoned ones cannot pile
+up, and a product may only have PRODUCT_IMAGE_MAX_OPEN_UPLOADS resumable
+uploads in progress.
+"""
+import fcntl
+import hashlib
+import os
+import re
+import secrets
+import time
+import uuid
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import (
+    FileUploadHandler,
+    StopFutureHandlers,
+    StopUpload,
+)
+
+from rest_framework.exceptions import ValidationError
+
+ALLOWED_FORMATS = {
+    'JPEG': '.jpg',
+    'PNG': '.png',
+    'GIF': '.gif',
+    'WEBP': '.webp',
+}
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+UPLOAD_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+CHUNK_SIZE = 64 * 2 ** 10
+PARTIAL_DIR = os.path.join('uploads', 'partial')
+
+
+def validate_image_header(file):
+    """Check file is an allowed image format and size from its header.
+
+    Returns the detected format. Pillow only parses the header on open, so
+    this never decodes pixel data.
+    """
+    # Pillow is imported on first use, keeping it out of worker startup.
+    from PIL import Image, UnidentifiedImageError
+
+    file.seek(0)
+    try:
+        with Image.open(file) as image:
+            image_format, (width, height) = image.format, image.size
+    except (Image.DecompressionBombError, UnidentifiedImageError, OSError):
+        raise ValidationError('Upload a valid image.')
+    finally:
+        file.seek(0)
+
+    if image_format not in ALLOWED_FORMATS:
+        raise ValidationError(f'Unsupported image format {image_format}.')
+    if width * height > settings.PRODUCT_IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            f'Image is too large ({width}x{height} pixels).'
+        )
+
+    return image_format
+
+
+def image_name(image_format):
+    """Return the name to store an image of image_format under."""
+    return f'upload{ALLOWED_FORMATS[image_format]}'
+
+
+def _partial_path(name):
+    """Return the path of a partial upload called name."""
+    return default_storage.path(os.path.join(PARTIAL_DIR, name))
+
+
+def _sweep_partial_uploads():
+    """Delete expired partial uploads and return the names of the others."""
+    cutoff = time.time() - settings.PRODUCT_IMAGE_UPLOAD_TTL
+    try:
+        entries = list(os.scandir(default_storage.path(PARTIAL_DIR)))
+    except FileNotFoundError:
+        return []
+
+    names = []
+    for entry in entries:
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+            else:
+                names.append(entry.name)
+        except FileNotFoundError:
+            pass
+
+    return names
+
+
+class StreamedUpload(UploadedFile):
+    """An uploaded file streamed to a partial file under MEDIA_ROOT."""
+
+    def __init__(self, file, path, sha256=None, **kwargs):
+        super().__init__(file, **kwargs)
+        self.path = path
+        self.sha256 = sha256
+
+    def temporary_file_path(self):
+        """Return the path of the partial file."""
+        return self.path
+
+    def discard(self):
+        """Close and delete the partial file."""
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def discard(files):
+    """Delete the streamed uploads in files, e.g. after a failed validation."""
+    for file in files.values():
+        if isinstance(file, StreamedUpload):
+            file.discard()
+
+
+class ProductImageUploadHandler(FileUploadHandler):
+    """Stream and hash the `image` field of a multipart upload."""
+    field_name = 'image'
+
+    def new_file(self, field_name, file_name, *args, **kwargs):
+        super().new_file(field_name, file_name, *args, **kwargs)
+        self.file = None
+        if field_name != self.field_name:
+            return
+
+        self.path = _partial_path(uuid.uuid4().hex)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.file = open(self.path, 'xb+')
+        self.hasher = hashlib.sha256()
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.file is None:
+            return raw_data
+
+        if start + len(raw_data) > settings.PRODUCT_IMAGE_MAX_UPLOAD_SIZE:
+            self.upload_interrupted()
+            raise StopUpload(connection_reset=True)
+
+        self.file.write(raw_data)
+        self.hasher.update(raw_data)
+
+    def file_complete(self, file_size):
+        if self.file is None:
+            return None
+
+        self.file.seek(0)
+        return StreamedUpload(
+            self.file,
+            self.path,
+            sha256=self.hasher.hexdigest(),
+            name=self.file_name,
+            content_type=self.content_type,
+            size=file_size,
+            charset=self.charset,
+            content_type_extra=self.content_type_extra,
+        )
+
+    def upload_interrupted(self):
+        if self.file is not None:
+            self.file.close()
+            os.remove(self.path)
+            self.file = None
+
+
+class UploadOffsetMismatch(Exception):
+    """A chunk did not start where the partial upload ends."""
+
+    def __init__(self, offset):
+        super().__init__(offset)
+        self.offset = offset
+
+
+class ChunkedUpload:
+    """A resumable image upload sent as a series of byte ranges."""
+
+    def __init__(self, product_id, upload_id):
+        if not UPLOAD_ID_RE.match(upload_id or ''):
+            raise ValidationError('Invalid upload id.')
+
+        self.upload_id = upload_id
+        self.path = _partial_path(f'{product_id}-{upload_id}')
+
+    @classmethod
+    def start(cls, product_id):
+        """Create and return a new, empty upload for a product."""
+        prefix = f'{product_id}-'
+        in_progress = sum(
+            name.startswith(prefix) for name in _sweep_partial_uploads()
+        )
+        if in_progress >= settings.PRODUCT_IMAGE_MAX_OPEN_UPLOADS:
+            raise ValidationError(
+                'Too many uploads in progress for this product.'
+            )
+
+        upload = cls(product_id, secrets.token_hex(16))
+        os.makedirs(os.path.dirname(upload.path), exist_ok=True)
+        open(upload.path, 'xb').close()
+        return upload
+
+    @property
+    def offset(self):
+        """Return the number of bytes received so far."""
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            raise ValidationError('Unknown upload id.')
+
+    def append(self, stream, content_range):
+        """Append the byte range content_range read from stream.
+
+        Returns the new offset and whether the upload is complete.
+        """
+        match = CONTENT_RANGE_RE.match(content_range or '')
+        if not match:
+            raise ValidationError('Expected a Content-Range header.')
+        start, end, total = (int(value) for value in match.groups())
+        if end < start or end >= total:
+            raise ValidationError('Invalid Content-Range header.')
+        if total > settings.PRODUCT_IMAGE_MAX_UPLOAD_SIZE:
+            raise ValidationError('Upload is too large.')
+        if not os.path.exists(self.path):
+            raise ValidationError('Unknown upload id.')
+
+        with open(self.path, 'ab') as f:
+            # Serialise concurrent chunks of the same upload.
+            fcntl.flock(f, fcntl.LOCK_EX)
+            offset = f.seek(0, os.SEEK_END)
+            if start != offset:
+                raise UploadOffsetMismatch(offset)
+
+            remaining = end - start + 1
+            while remaining and stream is not None:
+                data = stream.read(min(CHUNK_SIZE, remaining))
+                if not data:
+                    break
+                f.write(data)
+                remaining -= len(data)
+
+            if remaining:
+                f.truncate(offset)
+                raise ValidationError('Chunk is shorter than its range.')
+
+            return f.tell(), f.tell() == total
+
+    def finish(self):
+        """Validate the complete upload and return it as a file to save."""
+        file = open(self.path, 'rb')
+        try:
+            image_format = validate_image_header(file)
+        except ValidationError:
+            file.close()
+            self.discard()
+            raise
+
+        return StreamedUpload(
+            file,
+            self.path,
+            name=image_name(image_format),
+            size=self.offset,
+        )
+
+    def discard(self):
+        """Delete the partial upload."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
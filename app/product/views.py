@@ -1,19 +1,45 @@
 """
 View for product.
 """
+import hashlib
+
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.db import transaction
+from django.db.models import Count, Exists, Max, OuterRef, Prefetch
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
 from rest_framework import (
     viewsets,
     mixins,
     status,
 )
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import (
+    AllowAny,
+    IsAuthenticated,
+)
 
 from core.models import (
-    Product
+    ClothingSize,
+    Product,
+    ProductClothingSize,
+    ProductTag,
+    Tag,
+)
+from core.views import LazySchema
+from product import (
+    cache,
+    search,
+    serializers,
+    tasks,
+    uploads,
 )
-from product import serializers
+from product.pagination import ProductCursorPagination
+from user.authentication import CachedTokenAuthentication
 
 
 # @extend_schema_view(
@@ -26,28 +52,206 @@ class ProductViewSet(viewsets.ModelViewSet):
     serializer_class = serializers.ProductDetailSerializers
     queryset = Product.objects.all()
     permission_classes = [AllowAny]
+    pagination_class = ProductCursorPagination
+    schema = LazySchema()
+
+    def initialize_request(self, request, *args, **kwargs):
+        """Stream image uploads straight into MEDIA_ROOT."""
+        drf_request = super().initialize_request(request, *args, **kwargs)
+        if self.action == 'upload_image':
+            request.upload_handlers = [
+                uploads.ProductImageUploadHandler(request),
+                TemporaryFileUploadHandler(request),
+            ]
+
+        return drf_request
 
     def _params_to_ints(self, qs):
         """Convert a list strings to integers"""
-        return [int(str_id) for str_id in qs.split(',')]
+        try:
+            return [int(str_id) for str_id in qs.split(',')]
+        except ValueError:
+            raise ValidationError('Expected a comma separated list of ids.')
+
+    def _search_text(self):
+        """Return the full-text search requested with `?q=`, if any."""
+        return self.request.query_params.get('q', '').strip()
 
     def get_queryset(self):
-        """Retrieve products for the authenticated user."""
-        # Get the 'tags' query parameter from the request.
-        # tags = self.request.query_params.get('tags')
-        # # Get the 'clothing_sizes' query parameter from the request.
-        # clothing_sizes = self.request.query_params.get('clothing_sizes')
-        # # Initialize the queryset with the default queryset for the view.
+        """Retrieve products, narrowed by the requested filters.
+
+        Filters only ever add conditions on the product row itself, so the
+        result never needs deduplicating; many-valued relations must be
+        filtered through EXISTS subqueries rather than joins.
+        """
+        owner = self.request.query_params.get('owner')
+        tags = self.request.query_params.get('tags')
+        clothing_sizes = self.request.query_params.get('clothing_sizes')
+        text = self._search_text()
         queryset = self.queryset
+        if self.action == 'retrieve':
+            # The list loads relations itself; other actions do not render
+            # them, or reload them.
+            queryset = queryset.prefetch_related(
+                Prefetch('tags', queryset=Tag.objects.order_by('id')),
+                Prefetch(
+                    'clothing_sizes',
+                    queryset=ClothingSize.objects.order_by('id'),
+                ),
+            )
+        if owner:
+            queryset = queryset.filter(
+                user_id__in=self._params_to_ints(owner)
+            )
+        if tags:
+            queryset = queryset.filter(Exists(
+                ProductTag.objects.filter(
+                    product=OuterRef('pk'),
+                    tag_id__in=self._params_to_ints(tags),
+                )
+            ))
+        if clothing_sizes:
+            queryset = queryset.filter(Exists(
+                ProductClothingSize.objects.filter(
+                    product=OuterRef('pk'),
+                    clothing_size_id__in=self._params_to_ints(clothing_sizes),
+                )
+            ))
+        if text:
+            queryset = search.filter_products(queryset, text)
+
+        return queryset
+
+    def paginate_queryset(self, queryset):
+        """Rank search results so they are paginated by relevance.
+
+        Ranking is left out of get_queryset so that counting the matches
+        for the list validators does not compute it.
+        """
+        text = self._search_text()
+        if text:
+            queryset = search.rank_products(queryset, text)
+
+        return super().paginate_queryset(queryset)
+
+    def _cached(self, request, kind, handler, *args, **kwargs):
+        """Serve a rendered JSON response from the versioned cache."""
+        if request.accepted_renderer.format != 'json':
+            return handler(request, *args, **kwargs)
+
+        key = cache.response_key(kind, request)
+        response = cache.get_response(key)
+        if response is not None:
+            return response
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response.accepted_renderer = request.accepted_renderer
+            response.accepted_media_type = request.accepted_media_type
+            response.renderer_context = self.get_renderer_context()
+            response.render()
+            cache.set_response(key, response)
+
+        return response
 
-        return queryset.distinct()
+    def _validators(self, request, stats):
+        """Return the ETag and Last-Modified timestamp for request.
+
+        stats returns the number of rows and their latest update time. It
+        runs on every request, so workers holding the response in their own
+        cache never answer 304 for rows another worker has changed.
+        """
+        count, last_modified = stats()
+        if count is None:
+            return None
+        etag = hashlib.sha256(
+            f'{cache.request_digest(request)}|{count}|'
+            f'{last_modified.isoformat() if last_modified else ""}'
+            .encode()
+        ).hexdigest()
+        return (
+            quote_etag(etag),
+            int(last_modified.timestamp()) if last_modified else None,
+        )
+
+    def _conditional(self, request, kind, handler, stats, *args, **kwargs):
+        """Answer a conditional GET, falling back to the cached response."""
+        validators = self._validators(request, stats)
+        if validators is None:
+            return self._cached(request, kind, handler, *args, **kwargs)
+
+        etag, last_modified = validators
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = self._cached(request, kind, handler, *args, **kwargs)
+        if response.status_code in (
+            status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED
+        ):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+
+        return response
+
+    def _list_stats(self):
+        """Return the row count and latest update of the filtered list."""
+        stats = self.filter_queryset(self.get_queryset()).aggregate(
+            count=Count('id'), last_modified=Max('updated_at'),
+        )
+        return stats['count'], stats['last_modified']
+
+    def _detail_stats(self):
+        """Return the row count and update time of the requested product."""
+        try:
+            updated_at = self.get_queryset().filter(
+                pk=self.kwargs[self.lookup_field]
+            ).values_list('updated_at', flat=True).first()
+        except (TypeError, ValueError):
+            updated_at = None
+        return (None, None) if updated_at is None else (1, updated_at)
+
+    def _list(self, request, *args, **kwargs):
+        """Render a page of the list from rows rather than instances."""
+        queryset = self.filter_queryset(self.get_queryset()).values(
+            *serializers.ProductListSerializer.columns,
+            # Read by the cursor pagination.
+            'created_at',
+        )
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    def list(self, request, *args, **kwargs):
+        """List products, served from the cache when possible."""
+        return self._conditional(
+            request, 'list', self._list, self._list_stats, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve a product, served from the cache when possible."""
+        return self._conditional(
+            request, 'detail', super().retrieve, self._detail_stats,
+            *args, **kwargs
+        )
 
     def get_serializer_class(self):
         """Return the serializer class for request."""
         if self.action == 'list':
-            return serializers.ProductSerializers
-        elif self.action == 'upload_image':
+            # The row serializer declares no fields to document, so the
+            # schema describes the equivalent model serializer.
+            if getattr(self, 'swagger_fake_view', False):
+                return serializers.ProductSerializers
+            return serializers.ProductListSerializer
+        elif self.action in ('upload_image', 'upload_image_chunk'):
             return serializers.ProductImageSerializer
+        elif self.action == 'bulk_create':
+            return serializers.ProductBulkSerializer
+        elif self.action == 'bulk_update':
+            return serializers.ProductBulkUpdateSerializer
+        elif self.action == 'bulk_destroy':
+            return serializers.ProductBulkDeleteSerializer
 
         return self.serializer_class
 
@@ -62,11 +266,172 @@ class ProductViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(product, data=request.data)
 
         if serializer.is_valid():
-            serializer.save()
+            # Renditions of the previous image are dropped straight away and
+            # regenerated in the background from the new one.
+            serializer.save(
+                image_thumbnail=None, image_medium=None, image_webp=None,
+                renditions_pending=True, rendition_failures=0,
+            )
+            tasks.enqueue_renditions(product.id)
             return Response(serializer.data, status=status.HTTP_200_OK)
 
+        uploads.discard(request.FILES)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(
+        methods=['POST'],
+        detail=True,
+        url_path='upload-image/chunked',
+        url_name='upload-image-chunked',
+    )
+    def start_image_upload(self, request, pk=None):
+        """Start a resumable image upload for a product."""
+        product = self.get_object()
+        upload = uploads.ChunkedUpload.start(product.id)
+
+        return Response(
+            {'upload_id': upload.upload_id, 'offset': 0},
+            status=status.HTTP_201_CREATED,
+        )
+
+    @start_image_upload.mapping.get
+    def image_upload_status(self, request, pk=None):
+        """Return how much of a resumable upload has been received."""
+        product = self.get_object()
+        upload = uploads.ChunkedUpload(
+            product.id, request.query_params.get('upload_id')
+        )
+
+        return Response({'offset': upload.offset}, status=status.HTTP_200_OK)
+
+    @start_image_upload.mapping.put
+    def upload_image_chunk(self, request, pk=None):
+        """Append a chunk, sent as the raw request body, to an upload.
+
+        The chunk's position is given by its Content-Range header. A chunk
+        that does not start at the current offset is refused with 409 and
+        the offset to resume from. The image is set once the last byte
+        arrives.
+        """
+        product = self.get_object()
+        upload = uploads.ChunkedUpload(
+            product.id, request.headers.get('Upload-Id')
+        )
+        try:
+            offset, complete = upload.append(
+                request.stream, request.headers.get('Content-Range')
+            )
+        except uploads.UploadOffsetMismatch as e:
+            return Response(
+                {'offset': e.offset}, status=status.HTTP_409_CONFLICT
+            )
+
+        if not complete:
+            return Response(
+                {'offset': offset}, status=status.HTTP_202_ACCEPTED
+            )
+
+        image = upload.finish()
+        with image:
+            product.image.save(image.name, image, save=False)
+        product.image_thumbnail = None
+        product.image_medium = None
+        product.image_webp = None
+        product.renditions_pending = True
+        product.rendition_failures = 0
+        product.save()
+        tasks.enqueue_renditions(product.id)
+
+        serializer = self.get_serializer(product)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    def _bulk_items(self, request):
+        """Return the list of items submitted to a bulk endpoint."""
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError('Expected a list of items.')
+        if len(items) > settings.PRODUCT_BULK_MAX_ITEMS:
+            raise ValidationError(
+                f'Ensure this list has no more than '
+                f'{settings.PRODUCT_BULK_MAX_ITEMS} items.'
+            )
+        return items
+
+    def _bulk_errors(self, serializer):
+        """Return the validation errors of a bulk payload keyed by index."""
+        return {
+            index: errors
+            for index, errors in enumerate(serializer.errors) if errors
+        }
+
+    @action(
+        methods=['POST'],
+        detail=False,
+        url_path='bulk',
+        url_name='bulk',
+        authentication_classes=[CachedTokenAuthentication],
+        permission_classes=[IsAuthenticated],
+    )
+    def bulk_create(self, request):
+        """Create many products in one transaction."""
+        serializer = self.get_serializer(
+            data=self._bulk_items(request), many=True
+        )
+        if not serializer.is_valid():
+            return Response(
+                self._bulk_errors(serializer),
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        with transaction.atomic(), cache.bump_once():
+            serializer.save(user=request.user)
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @bulk_create.mapping.patch
+    def bulk_update(self, request):
+        """Partially update many of the user's products in one transaction."""
+        serializer = self.get_serializer(
+            data=self._bulk_items(request), many=True, partial=True
+        )
+        if not serializer.is_valid():
+            return Response(
+                self._bulk_errors(serializer),
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Looked up from the validated ids, which may have been strings.
+        instances = Product.objects.filter(user=request.user).in_bulk(
+            [attrs['id'] for attrs in serializer.validated_data]
+        )
+        missing = {
+            index: {'id': ['Product not found.']}
+            for index, attrs in enumerate(serializer.validated_data)
+            if attrs['id'] not in instances
+        }
+        if missing:
+            return Response(missing, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer.instance = instances
+        with transaction.atomic(), cache.bump_once():
+            serializer.save()
+
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @bulk_create.mapping.delete
+    def bulk_destroy(self, request):
+        """Delete many of the user's products in one transaction."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic(), cache.bump_once():
+            deleted, _ = Product.objects.filter(
+                user=request.user,
+                id__in=serializer.validated_data['ids'],
+            ).delete()
+
+        return Response({'deleted': deleted}, status=status.HTTP_200_OK)
+
 
 # @extend_schema_view(
 #     list=extend_schema(
@@ -0,0 +1,105 @@
+"""
+Authentication classes for the user API.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from rest_framework.authentication import TokenAuthentication
+
+
+class TokenCache:
+    """Bounded LRU cache of token resolutions with a time to live.
+
+    Entries live in this process and, when TOKEN_AUTH_SHARED_CACHE names a
+    cache alias, in that shared cache too, so a worker can pick up tokens
+    resolved by another one.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _shared(self):
+        alias = settings.TOKEN_AUTH_SHARED_CACHE
+        return caches[alias] if alias else None
+
+    def _shared_key(self, key):
+        return f'user:token:{key}'
+
+    def get(self, key):
+        """Return the cached (user, token) for key, if any."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    return value
+                del self._entries[key]
+
+        shared = self._shared()
+        value = shared.get(self._shared_key(key)) if shared else None
+        if value is not None:
+            self._set_local(key, value)
+        return value
+
+    def set(self, key, value):
+        """Cache the (user, token) resolution of key."""
+        self._set_local(key, value)
+        shared = self._shared()
+        if shared:
+            shared.set(
+                self._shared_key(key),
+                value,
+                settings.TOKEN_AUTH_SHARED_CACHE_TTL,
+            )
+
+    def _set_local(self, key, value):
+        expires = time.monotonic() + settings.TOKEN_AUTH_CACHE_TTL
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.TOKEN_AUTH_CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys):
+        """Forget the resolutions of keys."""
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+        shared = self._shared()
+        if shared:
+            shared.delete_many([self._shared_key(key) for key in keys])
+
+    def clear(self):
+        """Forget every resolution held by this process."""
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that skips the token query for known tokens.
+
+    Resolutions are dropped when the token is deleted or its user is saved
+    (see user.signals). Other processes only see that through the shared
+    cache, or once their local entry expires after TOKEN_AUTH_CACHE_TTL.
+    """
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is None:
+            cached = super().authenticate_credentials(key)
+            token_cache.set(key, cached)
+
+        # Hand out copies so a request cannot leak state into the cache.
+        user, token = cached
+        return copy.copy(user), copy.copy(token)
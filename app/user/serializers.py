@@ -10,8 +10,10 @@ from django.utils.translation import gettext as _
 
 from rest_framework import serializers
 
+from core.metrics import TimedSerializerMixin
 
-class UserSerializers(serializers.ModelSerializer):
+
+class UserSerializers(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = get_user_model()
         fields = ['email', 'password', 'name']
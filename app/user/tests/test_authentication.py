@@ -0,0 +1,115 @@
+"""
+Tests for the cached token authentication.
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user.authentication import token_cache
+
+ME_URL = reverse('user:me')
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Tests for CachedTokenAuthentication."""
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Test name',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_token_is_resolved_once(self):
+        """Test repeated requests with a token run no auth queries."""
+        with self.assertNumQueries(1):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_invalid_token(self):
+        """Test an unknown token is rejected and not cached."""
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIsNone(token_cache.get('invalid'))
+
+    def test_deleted_token_is_rejected(self):
+        """Test a cached token stops working once deleted."""
+        self.client.get(ME_URL)
+
+        self.token.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_is_rejected(self):
+        """Test a cached user stops authenticating once deactivated."""
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_profile_update_is_visible(self):
+        """Test updating the profile refreshes the cached user."""
+        self.client.get(ME_URL)
+
+        self.client.patch(ME_URL, {'name': 'New name'})
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['name'], 'New name')
+
+    @override_settings(TOKEN_AUTH_CACHE_SIZE=1)
+    def test_cache_is_bounded(self):
+        """Test the least recently used resolution is evicted."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com', password='testpass123'
+        )
+        other_token = Token.objects.create(user=other)
+        self.client.get(ME_URL)
+
+        APIClient().get(
+            ME_URL, HTTP_AUTHORIZATION=f'Token {other_token.key}'
+        )
+
+        self.assertIsNone(token_cache.get(self.token.key))
+        self.assertIsNotNone(token_cache.get(other_token.key))
+
+    def test_entries_expire(self):
+        """Test resolutions are dropped after their time to live."""
+        with patch('user.authentication.time.monotonic', return_value=0):
+            self.client.get(ME_URL)
+
+        with patch('user.authentication.time.monotonic', return_value=31):
+            self.assertIsNone(token_cache.get(self.token.key))
+
+    @override_settings(TOKEN_AUTH_SHARED_CACHE='default')
+    def test_shared_cache(self):
+        """Test resolutions are shared through the configured cache."""
+        self.client.get(ME_URL)
+        token_cache.clear()
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -0,0 +1,166 @@
+"""
+Tests for password hashing and throttling of logins.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user.authentication import token_cache
+
+TOKEN_URL = reverse('user:token')
+PASSWORD = 'testpass123'
+
+
+class LoginTests(TestCase):
+    """Tests for the login endpoint."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        token_cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', password=PASSWORD, name='Name'
+        )
+
+    def login(self, email='user@example.com', password=PASSWORD, **extra):
+        return self.client.post(
+            TOKEN_URL, {'email': email, 'password': password}, **extra
+        )
+
+    def test_passwords_hashed_with_argon2(self):
+        """Test new passwords are hashed with the configured hasher."""
+        self.assertEqual(identify_hasher(self.user.password).algorithm,
+                         'argon2')
+
+    def test_login_rehashes_with_preferred_hasher(self):
+        """Test a login upgrades hashes made with another hasher."""
+        self.user.password = make_password(
+            PASSWORD, hasher='pbkdf2_sha256'
+        )
+        self.user.save()
+
+        res = self.login()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(identify_hasher(self.user.password).algorithm,
+                         'argon2')
+        self.assertTrue(self.user.check_password(PASSWORD))
+
+    def test_login_rehashes_after_cost_change(self):
+        """Test a login updates hashes made with an outdated cost."""
+        old_hash = self.user.password
+
+        with override_settings(PASSWORD_ARGON2_TIME_COST=3):
+            res = self.login()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertNotEqual(self.user.password, old_hash)
+        self.assertIn('t=3', self.user.password)
+
+    @override_settings(LOGIN_THROTTLE_EMAIL_RATE='2/min')
+    def test_throttle_per_email(self):
+        """Test repeated attempts on an email are throttled before hashing."""
+        self.login(password='wrong')
+        self.login(email=' USER@example.com', password='wrong')
+
+        with self.assertNumQueries(0):
+            res = self.login()
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        res = self.login(email='other@example.com')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(
+        LOGIN_THROTTLE_IP_RATE='2/min', LOGIN_THROTTLE_EMAIL_RATE=None
+    )
+    def test_throttle_per_address(self):
+        """Test repeated attempts from an address are throttled."""
+        self.login(email='a@example.com')
+        self.login(email='b@example.com')
+
+        res = self.login()
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        res = self.login(REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(
+        LOGIN_THROTTLE_IP_RATE='2/min', LOGIN_THROTTLE_EMAIL_RATE=None
+    )
+    def test_throttle_ignores_client_forwarded_for(self):
+        """Test addresses the client adds to X-Forwarded-For are ignored."""
+        for i in range(2):
+            self.login(HTTP_X_FORWARDED_FOR=f'192.0.2.{i}, 10.0.0.9')
+
+        res = self.login(HTTP_X_FORWARDED_FOR='192.0.2.99, 10.0.0.9')
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_presented_token_reused(self):
+        """Test a valid token for the email is returned without hashing."""
+        token = Token.objects.create(user=self.user)
+
+        with self.assertNumQueries(1):
+            res = self.login(
+                password='not-checked',
+                HTTP_AUTHORIZATION=f'Token {token.key}',
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {'token': token.key})
+
+    def test_presented_token_for_other_email(self):
+        """Test a token of another user does not skip the password check."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com', password=PASSWORD
+        )
+        token = Token.objects.create(user=other)
+
+        res = self.login(
+            password='wrong', HTTP_AUTHORIZATION=f'Token {token.key}'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalid_presented_token(self):
+        """Test an invalid token falls back to checking the password."""
+        res = self.login(HTTP_AUTHORIZATION='Token invalid')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data['token'], Token.objects.get(user=self.user).key
+        )
+
+    @override_settings(LOGIN_REUSE_PRESENTED_TOKEN=False)
+    def test_presented_token_reuse_disabled(self):
+        """Test the password is always checked when reuse is disabled."""
+        token = Token.objects.create(user=self.user)
+
+        res = self.login(
+            password='wrong', HTTP_AUTHORIZATION=f'Token {token.key}'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_body_not_an_object(self):
+        """Test login bodies that are not JSON objects are rejected."""
+        token = Token.objects.create(user=self.user)
+        bodies = [[], 'x', [{'email': 'user@example.com'}]]
+
+        for body in bodies:
+            with self.subTest(body=body):
+                res = self.client.post(
+                    TOKEN_URL, body, format='json',
+                    HTTP_AUTHORIZATION=f'Token {token.key}',
+                )
+
+                self.assertEqual(res.status_code,
+                                 status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,84 @@
+"""
+Query budgets of the user API endpoints.
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.tests.utils import QueryBudgetMixin
+from user.authentication import token_cache
+
+CREATE_USER_URL = reverse('user:create')
+TOKEN_URL = reverse('user:token')
+ME_URL = reverse('user:me')
+
+
+class UserQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Query budgets of the user endpoints."""
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', password='testpass123', name='Name'
+        )
+        self.token = Token.objects.create(user=self.user)
+
+    def test_create_user(self):
+        """Test creating a user."""
+        payload = {
+            'email': 'new@example.com',
+            'password': 'testpass123',
+            'name': 'New',
+        }
+
+        with self.assertQueryBudget(2):
+            res = self.client.post(CREATE_USER_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_token(self):
+        """Test obtaining a token."""
+        payload = {'email': 'user@example.com', 'password': 'testpass123'}
+
+        with self.assertQueryBudget(2):
+            res = self.client.post(TOKEN_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_me(self):
+        """Test retrieving the user with an uncached token."""
+        with self.assertQueryBudget(1):
+            res = self.client.get(
+                ME_URL, HTTP_AUTHORIZATION=f'Token {self.token.key}'
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_me_cached_token(self):
+        """Test a cached token needs no queries."""
+        self.client.get(ME_URL, HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+        with self.assertQueryBudget(0):
+            res = self.client.get(
+                ME_URL, HTTP_AUTHORIZATION=f'Token {self.token.key}'
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_update_me(self):
+        """Test updating the user."""
+        with self.assertQueryBudget(3):
+            res = self.client.patch(
+                ME_URL,
+                {'name': 'Renamed'},
+                HTTP_AUTHORIZATION=f'Token {self.token.key}',
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
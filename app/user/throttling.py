@@ -0,0 +1,52 @@
+"""
+Throttles for the login endpoint.
+
+Throttles run before the credentials are checked, so rejected attempts
+never reach the password hasher.
+"""
+import hashlib
+from collections.abc import Mapping
+
+from django.conf import settings
+
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class LoginRateThrottle(SimpleRateThrottle):
+    """Base throttle taking its rate from the setting named rate_setting.
+
+    A rate of None (an empty setting) disables the throttle.
+    """
+    rate_setting = None
+
+    def get_rate(self):
+        return getattr(settings, self.rate_setting) or None
+
+
+class LoginIPRateThrottle(LoginRateThrottle):
+    """Limit login attempts per client address."""
+    scope = 'login-ip'
+    rate_setting = 'LOGIN_THROTTLE_IP_RATE'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': self.get_ident(request),
+        }
+
+
+class LoginEmailRateThrottle(LoginRateThrottle):
+    """Limit login attempts per account, from any address."""
+    scope = 'login-email'
+    rate_setting = 'LOGIN_THROTTLE_EMAIL_RATE'
+
+    def get_cache_key(self, request, view):
+        if not isinstance(request.data, Mapping):
+            return None
+
+        email = request.data.get('email')
+        if not isinstance(email, str) or not email.strip():
+            return None
+
+        ident = hashlib.sha256(email.strip().lower().encode()).hexdigest()
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
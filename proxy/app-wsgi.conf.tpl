@@ -0,0 +1,4 @@
+uwsgi_pass              ${APP_HOST}:${APP_PORT};
+include                 /etc/nginx/uwsgi_params;
+# Replace any X-Forwarded-For sent by the client.
+uwsgi_param             HTTP_X_FORWARDED_FOR $remote_addr;
@@ -5,9 +5,27 @@ server {
         alias /vol/static;
     }
 
+    # collectstatic writes .gz (and .br) copies next to text assets. The
+    # .br copies are served by builds with ngx_brotli (brotli_static on).
+    location /static/static/ {
+        alias /vol/static/static/;
+        gzip_static on;
+        gzip_vary on;
+    }
+
+    # Content addressed uploads never change once written.
+    location /static/media/uploads/cas/ {
+        alias /vol/static/media/uploads/cas/;
+        add_header Cache-Control "public, max-age=31536000, immutable";
+    }
+
+    # Resumable uploads in progress are not public.
+    location /static/media/uploads/partial/ {
+        return 404;
+    }
+
     location / {
-        uwsgi_pass              ${APP_HOST}:${APP_PORT};
-        include                 /etc/nginx/uwsgi_params;
+        include                 /etc/nginx/app.conf;
         client_max_body_size    10M;
     }
 }
\ No newline at end of file
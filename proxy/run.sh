@@ -3,4 +3,7 @@
 set -e
 
 envsubst < /etc/nginx/default.conf.tpl > /etc/nginx/conf.d/default.conf
+# Only substitute our variables, leaving nginx's ($host, ...) alone.
+envsubst '${APP_HOST} ${APP_PORT}' \
+    < "/etc/nginx/app-${SERVER_MODE}.conf.tpl" > /etc/nginx/app.conf
 nginx -g 'daemon off;'
\ No newline at end of file
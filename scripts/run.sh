@@ -2,8 +2,28 @@
 
 set -e
 
-python manage.py wait_for_db
-python manage.py collectstatic --noinput
-python manage.py migrate
+python manage.py wait_for_db --timeout "${DB_WAIT_TIMEOUT:-60}"
+python manage.py prepare_deploy
 
-uwsgi --socket :9000 --workers 4 --master --enable-threads --module app.wsgi
\ No newline at end of file
+# Image renditions are queued in memory by each worker, so jobs are lost
+# when a worker is recycled or killed. Regenerate them every
+# PRODUCT_IMAGE_RECOVERY_INTERVAL seconds (0 disables this).
+RECOVERY_INTERVAL="${PRODUCT_IMAGE_RECOVERY_INTERVAL:-300}"
+if [ "$RECOVERY_INTERVAL" -gt 0 ]; then
+    while sleep "$RECOVERY_INTERVAL"; do
+        python manage.py generate_renditions || true
+    done &
+fi
+
+if [ "${SERVER_MODE:-wsgi}" = "asgi" ]; then
+    # Sized like uwsgi below. Only the proxy can reach the app, so trust
+    # its X-Forwarded-For.
+    exec gunicorn app.asgi:application \
+        --worker-class uvicorn.workers.UvicornWorker \
+        --workers "$(python manage.py uwsgi_config --workers)" \
+        --forwarded-allow-ips '*' \
+        --bind :9000
+fi
+
+# Sized to the host by the SERVER_* variables, see the uwsgi_config command.
+exec uwsgi --ini "exec://python manage.py uwsgi_config"